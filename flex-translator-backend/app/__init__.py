@@ -7,8 +7,17 @@ from app.config import Config
 from app.services.translation_service import TranslationService
 from app.services.chunk_service import ChunkService
 from app.services.documents_service import DocumentsService
+from app.services.ownership_service import OwnershipService
+from app.services.search_service import SearchService
+from app.services.translation_memory_service import TranslationMemoryService
+from app.services.revision_service import RevisionService
 from app.services.groups_service import GroupsService
 from app.services.progress_service import ProgressService
+from app.services import artifact_cache
+from app.services.deepl_job_service import DeeplJobService
+from app.services.event_service import EventService
+from app.services.analytics_service import AnalyticsService
+from app.services import analytics_rollup_service
 from app.routes.documents import documents_bp
 from app.routes.chunks import chunks_bp
 from app.routes.auth import auth_bp
@@ -17,6 +26,8 @@ from app.routes.groups import groups_bp
 from app.routes.settings import settings_bp
 from app.routes.analytics import analytics_bp
 from app.services.oauth_setup import init_oauth
+from app import migrations
+from app.utils import db_routing
 
 def create_app():
     """Create and configure the Flask application instance."""
@@ -26,7 +37,7 @@ def create_app():
     app.config.from_object(Config)
 
     # Set up CORS to allow frontend access
-    CORS(app, origins=["http://localhost:5173"], supports_credentials=True)
+    CORS(app, origins=["http://localhost:5173"], supports_credentials=True, expose_headers=["X-Next-Cursor"])
 
 
     # Serve frontend
@@ -52,6 +63,8 @@ def create_app():
 
     # Initialize Flask extensions
     db.init_app(app)
+    db_routing.init_app(app, db)
+    migrations.init_app(app)
 
     # Initialize OAuth (e.g., GitLab login)
     with app.app_context():
@@ -66,7 +79,36 @@ def create_app():
     app.chunk_service = ChunkService()
     app.translation_service = TranslationService(openai_key, deepl_key)
     app.groups_service = GroupsService()
+    app.search_service = SearchService()
+    app.translation_memory_service = TranslationMemoryService(
+        app.config['TRANSLATION_MEMORY_TTL'],
+        app.config['TRANSLATION_MEMORY_MAX_USERS']
+    )
     app.progress_service = ProgressService()
+    app.revision_service = RevisionService(
+        app.config['CHUNK_REVISION_SNAPSHOT_INTERVAL'],
+        app.config['CHUNK_REVISION_LIMIT']
+    )
+    app.event_service = EventService(
+        app.config['EVENT_POLL_SECONDS'],
+        app.config['EVENT_MAX_STREAMS'],
+        app.config['EVENT_RETENTION_HOURS']
+    )
+    app.ownership_service = OwnershipService(app.config['OWNERSHIP_CACHE_TTL'])
+    app.analytics_service = AnalyticsService(
+        app,
+        app.config['ANALYTICS_BATCH_SIZE'],
+        app.config['ANALYTICS_FLUSH_SECONDS'],
+        app.config['ANALYTICS_QUEUE_SIZE']
+    )
+    analytics_rollup_service.init_app(app)
+    artifact_cache.init_app(app)
+    app.deepl_job_service = DeeplJobService(
+        app.translation_service.deepl_translator,
+        app.config['DEEPL_JOB_DIR'],
+        app.artifact_cache,
+        app.logger
+    )
     
     # Register RESTful API with Blueprints
     api = Api(app)
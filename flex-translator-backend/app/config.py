@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load the .env file from one directory above this file
@@ -26,6 +27,19 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Optional read replica for read-only routes (see app/utils/db_routing.py).
+    # DB_REPLICA_URI takes any SQLAlchemy URL (e.g. sqlite:///replica.db for local testing),
+    # DB_HOST_REPLICA uses the primary's credentials and database name on another host.
+    DB_REPLICA_URI = os.getenv('DB_REPLICA_URI') or (
+        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{os.getenv('DB_HOST_REPLICA')}/{DB_NAME}"
+        if os.getenv('DB_HOST_REPLICA') else None
+    )
+    SQLALCHEMY_BINDS = {"replica": DB_REPLICA_URI} if DB_REPLICA_URI else {}
+    # Seconds a user's reads stay on the primary after they write (read-your-writes)
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+    # Seconds the replica is skipped after it fails
+    REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', 30))
+
     # Flask-Smorest settings
     API_TITLE = "Translation Service API"
     API_VERSION = "v1"
@@ -43,5 +57,37 @@ class Config:
     SECRET_REFRESH_KEY = os.getenv('SECRET_REFRESH_KEY')
 
     FRONTEND_DOMAIN = os.getenv('FRONTEND_DOMAIN')
+
+    # Disk cache for generated files (rendered DOCX downloads)
+    ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'flex_translator_cache'))
+    ARTIFACT_CACHE_MAX_BYTES = int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+    # State and results of background DeepL document translations
+    DEEPL_JOB_DIR = os.getenv('DEEPL_JOB_DIR', os.path.join(tempfile.gettempdir(), 'flex_translator_deepl_jobs'))
+
+    # Seconds an ownership check result is cached per worker (0 disables the cache)
+    OWNERSHIP_CACHE_TTL = float(os.getenv('OWNERSHIP_CACHE_TTL', 30))
+
+    # Buffered analytics writer: entries per batch, max seconds queued, max queued entries
+    ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', 100))
+    ANALYTICS_FLUSH_SECONDS = float(os.getenv('ANALYTICS_FLUSH_SECONDS', 2))
+    ANALYTICS_QUEUE_SIZE = int(os.getenv('ANALYTICS_QUEUE_SIZE', 10000))
+    # Seconds between analytics rollup runs in each worker (0 = only via `flask analytics-rollup`)
+    ANALYTICS_ROLLUP_INTERVAL = float(os.getenv('ANALYTICS_ROLLUP_INTERVAL', 300))
+
+    # Translation memory: seconds a user's index is kept per worker, indexes kept per worker
+    TRANSLATION_MEMORY_TTL = float(os.getenv('TRANSLATION_MEMORY_TTL', 600))
+    TRANSLATION_MEMORY_MAX_USERS = int(os.getenv('TRANSLATION_MEMORY_MAX_USERS', 50))
+
+    # Chunk translation history: a full snapshot at least every N revisions, revisions kept per chunk
+    CHUNK_REVISION_SNAPSHOT_INTERVAL = int(os.getenv('CHUNK_REVISION_SNAPSHOT_INTERVAL', 10))
+    CHUNK_REVISION_LIMIT = int(os.getenv('CHUNK_REVISION_LIMIT', 50))
+
+    # Progress event streams: open streams per worker (each holds a thread),
+    # seconds between checks for events committed by other workers,
+    # hours stored events are kept (pruned by the analytics rollup job)
+    EVENT_MAX_STREAMS = int(os.getenv('EVENT_MAX_STREAMS', 4))
+    EVENT_POLL_SECONDS = float(os.getenv('EVENT_POLL_SECONDS', 2))
+    EVENT_RETENTION_HOURS = float(os.getenv('EVENT_RETENTION_HOURS', 24))
    
 
@@ -1,5 +1,19 @@
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.db_routing import RoutingSession
 
 # Initialize SQLAlchemy instance globally.
 # This is later bound to the Flask app in create_app().
-db = SQLAlchemy()
+# RoutingSession sends reads of @read_only routes to the read replica, if configured.
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite (local testing) enforces foreign keys and ON DELETE CASCADE only when asked to."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
@@ -0,0 +1,90 @@
+"""
+Baseline: the schema of the 14082025 backup (mysql-init/14082025_backup.sql).
+
+Databases restored from the backup already have these tables; a new empty
+database gets them here. The tables are defined in this file as they were
+then, so later migrations change them step by step like on a restored database.
+"""
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, ForeignKey, Index, Integer, MetaData, String, Table, Text, text
+)
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+
+metadata = MetaData()
+
+Table(
+    "user", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("email", String(255), nullable=False),
+    Column("created_at", DateTime)
+)
+
+Table(
+    "document", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("original_text", Text().with_variant(MEDIUMTEXT, "mysql")),
+    Column("final_translation", Text().with_variant(MEDIUMTEXT, "mysql")),
+    Column("source_type", Enum("pdf", "paste"), server_default="paste"),
+    Column("created_at", DateTime),
+    Column("modified_at", DateTime)
+)
+
+Table(
+    "chunk", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_id", Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False),
+    Column("chunk_number", Integer, nullable=False),
+    Column("chunk_content", Text, nullable=False),
+    Column("created_at", DateTime),
+    Column("final_chunk_translation", Text)
+)
+
+Table(
+    "groups", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(255), nullable=False),
+    Column("user_id", Integer, nullable=False)
+)
+
+Table(
+    "group_documents", metadata,
+    Column("groups_id", Integer, ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True),
+    Column("document_id", Integer, ForeignKey("document.id", ondelete="CASCADE"), primary_key=True)
+)
+
+Table(
+    "user_settings", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, unique=True),
+    Column("initial_prompt", Text, nullable=False),
+    Column("conversation_history_prompt", Text, nullable=False),
+    Column("user_prompt_instructions", Text, nullable=False),
+    Column("dictionary_instructions", Text, nullable=False)
+)
+
+Table(
+    "analytics", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer),
+    Column("document_id", Integer),
+    Column("chunk_id", Integer),
+    Column("source_type", Enum("paste", "pdf", "docx")),
+    Column("translation_mode", Enum("manual", "auto", "deeplAPIAuto")),
+    Column("chosen_model", String(10)),
+    Column("original_text", Text),
+    Column("user_final", Text),
+    Column("edited", Boolean),
+    Column("user_prompts", Text),
+    Column("user_dictionary", Text),
+    Column("time_spent_sec", Integer),
+    Column("created_at", DateTime, server_default=text("CURRENT_TIMESTAMP")),
+    Column("updated_at", DateTime, server_default=text("CURRENT_TIMESTAMP")),
+    Index("idx_user_doc_chunk", "user_id", "document_id", "chunk_id")
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,38 @@
+"""
+Schema changes made after the 14082025 backup:
+- LaTeX, DOCX and PPTX source types
+- Chunk progress counters on document (NULL until counted)
+- document_event table for the SSE progress stream
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, text
+from app.migrations.helpers import add_column
+
+metadata = MetaData()
+# Only the referenced key of document
+Table("document", metadata, Column("id", Integer, primary_key=True))
+document_event = Table(
+    "document_event", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("document_id", Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("event_type", String(32), nullable=False),
+    Column("data", Text),
+    Column("created_at", DateTime)
+)
+
+
+def upgrade(conn):
+    if conn.dialect.name == "mysql":
+        conn.execute(text(
+            "ALTER TABLE document MODIFY source_type "
+            "enum('pdf','paste','latex','docx','pptx') DEFAULT 'paste'"
+        ))
+        conn.execute(text(
+            "ALTER TABLE analytics MODIFY source_type "
+            "enum('paste','pdf','docx','latex','pptx') DEFAULT NULL"
+        ))
+
+    add_column(conn, "document", "total_chunks", "INTEGER DEFAULT NULL")
+    add_column(conn, "document", "translated_chunks", "INTEGER DEFAULT NULL")
+
+    document_event.create(conn, checkfirst=True)
@@ -0,0 +1,27 @@
+"""
+Composite indexes for the hot query paths:
+- chunk (document_id, chunk_number): chunks of a document in order
+- document (user_id, modified_at): a user's documents by date
+- analytics (user_id, created_at): a user's analytics by time
+- analytics (document_id): analytics of a document
+- groups (user_id): a user's groups
+- user (email): login lookup
+
+The indexes are also declared in the models' __table_args__.
+"""
+
+from app.migrations.helpers import create_index
+
+INDEXES = (
+    ("chunk", "ix_chunk_document_id_chunk_number", ("document_id", "chunk_number")),
+    ("document", "ix_document_user_id_modified_at", ("user_id", "modified_at")),
+    ("analytics", "ix_analytics_user_id_created_at", ("user_id", "created_at")),
+    ("analytics", "ix_analytics_document_id", ("document_id",)),
+    ("groups", "ix_groups_user_id", ("user_id",)),
+    ("user", "ix_user_email", ("email",)),
+)
+
+
+def upgrade(conn):
+    for (table, name, columns) in INDEXES:
+        create_index(conn, table, name, columns)
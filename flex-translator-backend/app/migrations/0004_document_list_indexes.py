@@ -0,0 +1,26 @@
+"""
+Document list sorting and keyset pagination:
+- Fills in missing created_at/modified_at values, so every row has a sort key
+- document (user_id, created_at) and (user_id, title) indexes for the
+  'date' and 'name' sort orders ('modified' uses ix_document_user_id_modified_at)
+"""
+
+from sqlalchemy import text
+from app.migrations.helpers import create_index
+
+INDEXES = (
+    ("ix_document_user_id_created_at", ("user_id", "created_at")),
+    ("ix_document_user_id_title", ("user_id", "title")),
+)
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "UPDATE document SET created_at = COALESCE(modified_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL"
+    ))
+    conn.execute(text(
+        "UPDATE document SET modified_at = created_at WHERE modified_at IS NULL"
+    ))
+
+    for (name, columns) in INDEXES:
+        create_index(conn, "document", name, columns)
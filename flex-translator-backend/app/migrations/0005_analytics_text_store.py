@@ -0,0 +1,102 @@
+"""
+Deduplicated, compressed analytics texts:
+- analytics_text table (SHA-256 hash -> zlib-compressed text)
+- <field>_hash reference columns on analytics
+- Moves the texts of existing rows to the store in batches and clears the
+  inline columns
+
+MySQL does not return the freed space to the file system by itself; run
+OPTIMIZE TABLE analytics after this migration to shrink the table file.
+"""
+
+import hashlib
+import zlib
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, Integer, LargeBinary, MetaData, String, Table, bindparam, column, insert, or_, select, table,
+    update
+)
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from app.migrations.helpers import add_column
+
+TEXT_FIELDS = ("original_text", "user_final", "user_prompts", "user_dictionary")
+BATCH_SIZE = 500
+COMPRESSION_LEVEL = 6
+
+analytics_text = Table(
+    "analytics_text", MetaData(),
+    Column("hash", String(64), primary_key=True),
+    Column("content", LargeBinary().with_variant(MEDIUMBLOB, "mysql"), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("created_at", DateTime)
+)
+analytics = table(
+    "analytics", column("id"), column("updated_at"),
+    *(column(field) for field in TEXT_FIELDS), *(column(f"{field}_hash") for field in TEXT_FIELDS)
+)
+
+
+def store_texts(conn, texts) -> dict:
+    """
+    Stores the texts that are not stored yet, like text_store.store_texts() did
+    when this migration was written. Returns {text: hash} of the non-empty texts.
+    """
+    hashes = {text: hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts if text}
+    if not hashes:
+        return {}
+    existing = set()
+    wanted = sorted(set(hashes.values()))
+    for i in range(0, len(wanted), BATCH_SIZE):
+        existing.update(conn.execute(
+            select(analytics_text.c.hash).where(analytics_text.c.hash.in_(wanted[i:i + BATCH_SIZE]))
+        ).scalars())
+
+    now = datetime.now()
+    rows = [
+        {
+            "hash": digest,
+            "content": zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL),
+            "size": len(text.encode("utf-8")),
+            "created_at": now,
+        }
+        for (text, digest) in hashes.items() if digest not in existing
+    ]
+    if rows:
+        conn.execute(insert(analytics_text), rows)
+    return hashes
+
+
+def upgrade(conn):
+    analytics_text.create(conn, checkfirst=True)
+    for field in TEXT_FIELDS:
+        add_column(conn, "analytics", f"{field}_hash", "VARCHAR(64) DEFAULT NULL")
+
+    text_columns = [analytics.c[field] for field in TEXT_FIELDS]
+    # Clears the inline texts and sets the references, keeping updated_at
+    move_texts = (
+        update(analytics)
+        .where(analytics.c.id == bindparam("row_id"))
+        .values(
+            updated_at=analytics.c.updated_at,
+            **{field: None for field in TEXT_FIELDS},
+            **{f"{field}_hash": bindparam(f"{field}_ref") for field in TEXT_FIELDS}
+        )
+    )
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(analytics.c.id, *text_columns)
+            .where(analytics.c.id > last_id, or_(*(text_column.is_not(None) for text_column in text_columns)))
+            .order_by(analytics.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        hashes = store_texts(conn, (getattr(row, field) for row in rows for field in TEXT_FIELDS))
+        conn.execute(move_texts, [
+            {"row_id": row.id, **{f"{field}_ref": hashes.get(getattr(row, field)) for field in TEXT_FIELDS}}
+            for row in rows
+        ])
+        last_id = rows[-1].id
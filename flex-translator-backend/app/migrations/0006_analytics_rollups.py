@@ -0,0 +1,35 @@
+"""
+Analytics reporting rollups:
+- analytics_daily: totals per (user, day, translation mode, model)
+- rollup_state: watermark of the rollup job
+
+Existing analytics rows are aggregated by the first runs of the job.
+"""
+
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "analytics_daily", metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=False),
+    Column("day", Date, primary_key=True),
+    Column("translation_mode", String(16), primary_key=True),
+    Column("chosen_model", String(10), primary_key=True),
+    Column("entries", Integer, nullable=False),
+    Column("edited", Integer, nullable=False),
+    Column("chunks", Integer, nullable=False),
+    Column("time_spent_sec", Integer, nullable=False)
+)
+
+Table(
+    "rollup_state", metadata,
+    Column("name", String(32), primary_key=True),
+    Column("last_id", Integer, nullable=False),
+    Column("next_id", Integer, nullable=False),
+    Column("updated_at", DateTime)
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,24 @@
+"""
+Full-text search indexes (MySQL only, see search_service.py):
+- chunk (chunk_content, final_chunk_translation)
+- document (title)
+
+They are not declared in the models, since other databases have no FULLTEXT
+indexes; there the search falls back to LIKE. InnoDB updates them as rows change.
+"""
+
+from sqlalchemy import text
+from app.migrations.helpers import has_index
+
+INDEXES = (
+    ("chunk", "ft_chunk_text", "chunk_content, final_chunk_translation"),
+    ("document", "ft_document_title", "title"),
+)
+
+
+def upgrade(conn):
+    if conn.dialect.name != "mysql":
+        return
+    for (table, name, columns) in INDEXES:
+        if not has_index(conn, table, name):
+            conn.execute(text(f"CREATE FULLTEXT INDEX {name} ON {table} ({columns})"))
@@ -0,0 +1,29 @@
+"""
+Chunk translation history: chunk_revision holds each saved version of a
+chunk's final translation as a snapshot or a delta (see revision_service.py).
+
+Current translations get their first revision when they are next saved.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+
+metadata = MetaData()
+# Only the referenced key of chunk
+Table("chunk", metadata, Column("id", Integer, primary_key=True))
+chunk_revision = Table(
+    "chunk_revision", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("chunk_id", Integer, ForeignKey("chunk.id", ondelete="CASCADE"), nullable=False),
+    Column("revision", Integer, nullable=False),
+    Column("is_snapshot", Boolean, nullable=False),
+    Column("content", LargeBinary().with_variant(MEDIUMBLOB, "mysql"), nullable=False),
+    Column("text_hash", String(64), nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("created_at", DateTime),
+    Index("ux_chunk_revision_chunk_id_revision", "chunk_id", "revision", unique=True)
+)
+
+
+def upgrade(conn):
+    chunk_revision.create(conn, checkfirst=True)
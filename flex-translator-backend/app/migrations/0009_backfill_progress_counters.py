@@ -0,0 +1,59 @@
+"""
+Fills in the chunk progress counters of documents created before they existed
+(added as NULL by 0002), so reading progress never has to count chunks.
+Documents are updated in batches.
+"""
+
+from sqlalchemy import bindparam, case, column, func, or_, select, table, update
+
+BATCH_SIZE = 500
+
+document = table("document", column("id"), column("translated_chunks"), column("total_chunks"), column("modified_at"))
+chunk = table("chunk", column("document_id"), column("final_chunk_translation"))
+
+
+def upgrade(conn):
+    set_counters = (
+        update(document)
+        .where(document.c.id == bindparam("doc_id"))
+        .values(
+            translated_chunks=bindparam("translated"),
+            total_chunks=bindparam("total"),
+            modified_at=document.c.modified_at
+        )
+    )
+
+    last_id = 0
+    while True:
+        doc_ids = conn.execute(
+            select(document.c.id)
+            .where(
+                document.c.id > last_id,
+                or_(document.c.translated_chunks.is_(None), document.c.total_chunks.is_(None))
+            )
+            .order_by(document.c.id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not doc_ids:
+            break
+
+        counts = {
+            row.document_id: row for row in conn.execute(
+                select(
+                    chunk.c.document_id,
+                    func.count(case((chunk.c.final_chunk_translation != "", 1))).label("translated"),
+                    func.count().label("total")
+                )
+                .where(chunk.c.document_id.in_(doc_ids))
+                .group_by(chunk.c.document_id)
+            )
+        }
+        conn.execute(set_counters, [
+            {
+                "doc_id": doc_id,
+                "translated": counts[doc_id].translated if doc_id in counts else 0,
+                "total": counts[doc_id].total if doc_id in counts else 0,
+            }
+            for doc_id in doc_ids
+        ])
+        last_id = doc_ids[-1]
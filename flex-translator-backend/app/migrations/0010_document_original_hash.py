@@ -0,0 +1,40 @@
+"""
+Stores the SHA-256 of each document's original_text in document.original_hash,
+so the rendered file cache key does not rehash the (up to MBs) original on
+every download. Existing documents are hashed in batches.
+"""
+
+import hashlib
+from sqlalchemy import bindparam, column, select, table, update
+from app.migrations.helpers import add_column
+
+BATCH_SIZE = 50
+
+document = table("document", column("id"), column("original_text"), column("original_hash"), column("modified_at"))
+
+
+def upgrade(conn):
+    add_column(conn, "document", "original_hash", "VARCHAR(64) DEFAULT NULL")
+
+    set_hash = (
+        update(document)
+        .where(document.c.id == bindparam("doc_id"))
+        .values(original_hash=bindparam("digest"), modified_at=document.c.modified_at)
+    )
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(document.c.id, document.c.original_text)
+            .where(document.c.id > last_id, document.c.original_hash.is_(None))
+            .order_by(document.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        conn.execute(set_hash, [
+            {"doc_id": row.id, "digest": hashlib.sha256((row.original_text or "").encode("utf-8")).hexdigest()}
+            for row in rows
+        ])
+        last_id = rows[-1].id
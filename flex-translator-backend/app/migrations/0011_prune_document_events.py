@@ -0,0 +1,26 @@
+"""
+Deletes the progress events that piled up before events had a retention
+period: everything older than a day (the EVENT_RETENTION_HOURS default).
+From now on the analytics rollup job prunes them (EventService.prune).
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import column, delete, select, table
+
+BATCH_SIZE = 1000
+
+document_event = table("document_event", column("id"), column("created_at"))
+
+
+def upgrade(conn):
+    cutoff = datetime.now() - timedelta(days=1)
+    while True:
+        event_ids = conn.execute(
+            select(document_event.c.id)
+            .where(document_event.c.created_at < cutoff)
+            .order_by(document_event.c.id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not event_ids:
+            break
+        conn.execute(delete(document_event).where(document_event.c.id.in_(event_ids)))
@@ -0,0 +1,122 @@
+"""
+migrations
+
+Versioned database schema migrations.
+
+- Each migration is a module named NNNN_description.py in this package with
+  an `upgrade(conn)` function
+- Applied versions are recorded in the schema_version table
+- `upgrade()` runs the pending migrations in order, each in its own transaction
+- MySQL commits DDL statements implicitly, so migrations check the current
+  schema before changing it and can safely run again after a failure
+- Migrations never import the models: each one defines the tables and
+  columns it touches as they were at that step, so replaying them on an
+  empty database builds the same schema as on an upgraded one
+- The backend container runs `flask migrate` before starting gunicorn
+
+Usage (from the backend root):
+    flask --app run migrate          Apply pending migrations
+    flask --app run migrate-status   List applied and pending migrations
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select
+
+_MIGRATION_NAME = re.compile(r"^(\d{4})_\w+$")
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def discover():
+    """
+    Finds the migration modules of this package.
+
+    Returns:
+        list of (version, name, module) tuples sorted by version.
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MIGRATION_NAME.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append((int(match.group(1)), module_info.name, module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(engine) -> set:
+    """
+    Returns the versions recorded in schema_version (empty if the table does not exist).
+
+    Args:
+        engine: SQLAlchemy engine.
+    """
+    if not inspect(engine).has_table(schema_version.name):
+        return set()
+    with engine.connect() as conn:
+        return set(conn.scalars(select(schema_version.c.version)))
+
+
+def pending(engine):
+    """
+    Returns the migrations not applied yet.
+
+    Args:
+        engine: SQLAlchemy engine.
+
+    Returns:
+        list of (version, name, module) tuples in the order they will run.
+    """
+    done = applied_versions(engine)
+    return [migration for migration in discover() if migration[0] not in done]
+
+
+def upgrade(engine, log=print) -> list:
+    """
+    Applies all pending migrations in version order.
+
+    Args:
+        engine: SQLAlchemy engine.
+        log (Callable[[str], None]): Progress output.
+
+    Returns:
+        list[str]: Names of the applied migrations.
+    """
+    _metadata.create_all(engine)
+
+    applied = []
+    for (version, name, module) in pending(engine):
+        log(f"Applying migration {name}")
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(insert(schema_version).values(version=version, name=name, applied_at=datetime.now()))
+        applied.append(name)
+
+    if not applied:
+        log("Database schema is up to date.")
+    return applied
+
+
+def init_app(app):
+    """Registers the `flask migrate` and `flask migrate-status` commands."""
+    from app.extensions import db
+
+    @app.cli.command("migrate")
+    def migrate_command():
+        """Apply pending database migrations."""
+        upgrade(db.engine)
+
+    @app.cli.command("migrate-status")
+    def migrate_status_command():
+        """List applied and pending database migrations."""
+        done = applied_versions(db.engine)
+        for (version, name, _) in discover():
+            print(f"{'applied' if version in done else 'pending':<8} {name}")
@@ -0,0 +1,50 @@
+"""
+helpers.py
+
+Schema checks used by migrations so that every step can run more than once.
+"""
+
+from sqlalchemy import inspect, text
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    """Returns True if `table` has a column named `column`."""
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table: str, name: str) -> bool:
+    """Returns True if `table` has an index named `name`."""
+    return any(index["name"] == name for index in inspect(conn).get_indexes(table))
+
+
+def add_column(conn, table: str, column: str, ddl: str):
+    """
+    Adds a column unless it already exists.
+
+    Args:
+        conn: Connection of the running migration.
+        table (str): Table name.
+        column (str): Column name.
+        ddl (str): Column type and options, e.g. "INTEGER DEFAULT NULL".
+    """
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index(conn, table: str, name: str, columns: tuple, unique: bool = False):
+    """
+    Creates an index unless an index with the same name exists.
+
+    Args:
+        conn: Connection of the running migration.
+        table (str): Table name.
+        name (str): Index name.
+        columns (tuple[str]): Indexed columns, in order.
+        unique (bool): Create a unique index.
+    """
+    if not has_index(conn, table, name):
+        quote = conn.dialect.identifier_preparer.quote
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {quote(name)} ON {quote(table)} "
+            f"({', '.join(quote(column) for column in columns)})"
+        ))
@@ -1,5 +1,5 @@
 from app.extensions import db
-from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.dialects.mysql import MEDIUMBLOB, MEDIUMTEXT
 from datetime import datetime
 from app.utils.default_prompts import (
     INITIAL_PROMPT,
@@ -11,6 +11,7 @@ from app.utils.default_prompts import (
 class User(db.Model):
   """Represents an end user of the application."""
   __tablename__ = 'user'
+  __table_args__ = (db.Index('ix_user_email', 'email'),)
   id = db.Column(db.Integer, primary_key=True, autoincrement=True)
   email = db.Column(db.String(255), nullable=False)
   created_at = db.Column(db.DateTime, default=datetime.now)
@@ -19,16 +20,26 @@ class User(db.Model):
 
 
 class Document(db.Model):
-  """Represents a document belonging to a user, either uploaded or pasted."""
+  """Represents a document belonging to a user, either uploaded (PDF, DOCX, PPTX, LaTeX) or pasted."""
   __tablename__ = 'document'
+  __table_args__ = (
+    db.Index('ix_document_user_id_modified_at', 'user_id', 'modified_at'),
+    db.Index('ix_document_user_id_created_at', 'user_id', 'created_at'),
+    db.Index('ix_document_user_id_title', 'user_id', 'title'),
+  )
   id = db.Column(db.Integer, primary_key=True, autoincrement=True)
   user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
   title = db.Column(db.String(255), nullable=False)
-  original_text = db.Column(MEDIUMTEXT, nullable=False)
-  final_translation = db.Column(MEDIUMTEXT)
-  source_type = db.Column(db.Enum('pdf', 'paste'))
+  original_text = db.Column(db.Text().with_variant(MEDIUMTEXT, 'mysql'), nullable=False)
+  final_translation = db.Column(db.Text().with_variant(MEDIUMTEXT, 'mysql'))
+  source_type = db.Column(db.Enum('pdf', 'paste', 'latex', 'docx', 'pptx'))
   created_at = db.Column(db.DateTime, default=datetime.now)
   modified_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+  # SHA-256 of original_text, so rendered files are cached without rehashing it (see migration 0010)
+  original_hash = db.Column(db.String(64))
+  # Progress counters, kept in sync with the chunks (NULL = not counted yet)
+  total_chunks = db.Column(db.Integer)
+  translated_chunks = db.Column(db.Integer)
 
   chunks = db.relationship('Chunk', backref='document', cascade='all, delete-orphan', passive_deletes=True)
 
@@ -36,6 +47,7 @@ class Document(db.Model):
 class Chunk(db.Model):
   """Represents a single chunk of a document used in translation."""
   __tablename__ = 'chunk'
+  __table_args__ = (db.Index('ix_chunk_document_id_chunk_number', 'document_id', 'chunk_number'),)
   id = db.Column(db.Integer, primary_key=True, autoincrement=True)
   document_id = db.Column(db.Integer, db.ForeignKey('document.id', ondelete='CASCADE'), nullable=False)
   chunk_number = db.Column(db.Integer, nullable=False)
@@ -44,9 +56,35 @@ class Chunk(db.Model):
   final_chunk_translation = db.Column(db.Text)
 
 
+class ChunkRevision(db.Model):
+  """Saved version of a chunk's final translation: a full snapshot or a delta against the previous revision."""
+  __tablename__ = 'chunk_revision'
+  __table_args__ = (db.Index('ux_chunk_revision_chunk_id_revision', 'chunk_id', 'revision', unique=True),)
+  id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+  chunk_id = db.Column(db.Integer, db.ForeignKey('chunk.id', ondelete='CASCADE'), nullable=False)
+  revision = db.Column(db.Integer, nullable=False)
+  is_snapshot = db.Column(db.Boolean, nullable=False, default=False)
+  # zlib-compressed: the text of a snapshot, the JSON delta ops otherwise (see revision_service.py)
+  content = db.Column(db.LargeBinary().with_variant(MEDIUMBLOB, 'mysql'), nullable=False)
+  text_hash = db.Column(db.String(64), nullable=False)
+  size = db.Column(db.Integer, nullable=False)
+  created_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class DocumentEvent(db.Model):
+  """Progress event of a document (e.g. chunk completed, done), streamed to clients over SSE."""
+  __tablename__ = 'document_event'
+  id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+  document_id = db.Column(db.Integer, db.ForeignKey('document.id', ondelete='CASCADE'), nullable=False, index=True)
+  event_type = db.Column(db.String(32), nullable=False)
+  data = db.Column(db.Text)
+  created_at = db.Column(db.DateTime, default=datetime.now)
+
+
 class Group(db.Model):
   """Represents a user-defined group of documents."""
   __tablename__ = 'groups'
+  __table_args__ = (db.Index('ix_groups_user_id', 'user_id'),)
   id = db.Column(db.Integer, primary_key=True)
   name = db.Column(db.String(255), nullable=False)
   user_id = db.Column(db.Integer, nullable=False)
@@ -77,19 +115,63 @@ class UserSettings(db.Model):
 class Analytics(db.Model):
   """Stores analytics data on user translation behavior and tool usage."""
   __tablename__ = 'analytics'
+  __table_args__ = (
+    db.Index('ix_analytics_user_id_created_at', 'user_id', 'created_at'),
+    db.Index('ix_analytics_document_id', 'document_id'),
+  )
   id = db.Column(db.Integer, primary_key=True, autoincrement=True)
   user_id = db.Column(db.Integer, nullable=True)
   document_id = db.Column(db.Integer, nullable=True)
   chunk_id = db.Column(db.Integer, nullable=True)
 
-  source_type = db.Column(db.Enum('paste', 'pdf', 'docx'), nullable=True)
+  source_type = db.Column(db.Enum('paste', 'pdf', 'docx', 'latex', 'pptx'), nullable=True)
   translation_mode = db.Column(db.Enum('manual', 'auto', 'deeplAPIAuto'), nullable=True)
   chosen_model = db.Column(db.String(10), nullable=True)
+  # Texts are stored once in analytics_text and referenced by SHA-256 hash.
+  # The inline text columns are only set on rows written before migration 0005.
   original_text = db.Column(db.Text, nullable=True)
   user_final = db.Column(db.Text, nullable=True)
   edited = db.Column(db.Boolean, nullable=True)
   user_prompts = db.Column(db.Text, nullable=True)
   user_dictionary = db.Column(db.Text, nullable=True)
+  original_text_hash = db.Column(db.String(64), nullable=True)
+  user_final_hash = db.Column(db.String(64), nullable=True)
+  user_prompts_hash = db.Column(db.String(64), nullable=True)
+  user_dictionary_hash = db.Column(db.String(64), nullable=True)
   time_spent_sec = db.Column(db.Integer, nullable=True)
   created_at = db.Column(db.DateTime, default=datetime.now)
   updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class AnalyticsText(db.Model):
+  """Deduplicated, zlib-compressed text referenced by analytics rows (key: SHA-256 of the text)."""
+  __tablename__ = 'analytics_text'
+  hash = db.Column(db.String(64), primary_key=True)
+  content = db.Column(db.LargeBinary().with_variant(MEDIUMBLOB, 'mysql'), nullable=False)
+  size = db.Column(db.Integer, nullable=False)
+  created_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class AnalyticsDaily(db.Model):
+  """Daily analytics totals per user, translation mode and model, maintained from analytics by the rollup job."""
+  __tablename__ = 'analytics_daily'
+  # Missing values are stored as 0 / '' so that they can be part of the key
+  # Primary key order (user_id, day, ...) serves the per-user date range queries of the reports
+  user_id = db.Column(db.Integer, primary_key=True)
+  day = db.Column(db.Date, primary_key=True)
+  translation_mode = db.Column(db.String(16), primary_key=True)
+  chosen_model = db.Column(db.String(10), primary_key=True)
+  entries = db.Column(db.Integer, nullable=False, default=0)
+  edited = db.Column(db.Integer, nullable=False, default=0)
+  chunks = db.Column(db.Integer, nullable=False, default=0)
+  time_spent_sec = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupState(db.Model):
+  """Watermarks of the analytics rollup job: analytics IDs up to last_id are aggregated."""
+  __tablename__ = 'rollup_state'
+  name = db.Column(db.String(32), primary_key=True)
+  last_id = db.Column(db.Integer, nullable=False, default=0)
+  # Highest ID seen by the previous run; aggregated on the next run, when its transaction has surely committed
+  next_id = db.Column(db.Integer, nullable=False, default=0)
+  updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
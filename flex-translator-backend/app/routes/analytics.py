@@ -1,7 +1,8 @@
 """
 analytics.py
 
-Defines the /analytics endpoint for storing user interaction data during translation.
+Defines the /analytics endpoints for storing user interaction data during
+translation and for reading reports from the daily rollups.
 
 Blueprint:
     - Name: 'analytics'
@@ -10,13 +11,11 @@ Blueprint:
 Requires user authentication for all routes via @require_user_access.
 """
 
-from flask import jsonify, request, current_app
+from datetime import date
+from flask import jsonify, request, current_app, g
 from flask_smorest import Blueprint
-from app.extensions import db
-from app.models.db_models import Analytics
-from datetime import datetime
 from app.routes.wrappers import require_user_access
-from app.services.analytics_service import save_analytics_entry
+from app.utils.db_routing import read_only
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
@@ -43,17 +42,56 @@ def create_analytics_entry():
             "time_spent_sec": int or null
         }
 
+    The entry is queued and written in the background (see AnalyticsService).
+
     Returns:
-        201: Entry saved successfully.
-        500: Database save failed.
+        201: Entry queued.
+        400: Invalid entry.
+        503: Analytics queue full, entry dropped.
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     try:
-        save_analytics_entry(data)
-        return jsonify({"message": "Analytics entry created"}), 201
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"error": "Failed to create analytics entry"}), 500
+        queued = current_app.analytics_service.record(g.user_id, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not queued:
+        return jsonify({"error": "Analytics queue full"}), 503
+    return jsonify({"message": "Analytics entry created"}), 201
+
+
+@analytics_bp.route('/summary', methods=['GET'])
+@require_user_access
+@read_only
+def get_analytics_summary():
+    """
+    Get a user's analytics totals, read from the daily rollups (not the raw entries).
+
+    Query parameters:
+        - user_id: int (required)
+        - from, to: first and last day, YYYY-MM-DD (optional)
+        - group_by: comma-separated list of day, translation_mode, chosen_model (default: day)
+
+    The rollups are updated periodically; "as_of" tells when they were last updated.
+
+    Returns:
+        200: {"as_of": str or null, "rows": [{<group_by values>, "entries", "edited",
+              "edited_rate", "chunks", "time_spent_sec"}, ...]}
+        400: Invalid parameters.
+    """
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        group_by = [name for name in request.args.get('group_by', 'day').split(',') if name]
+        summary = current_app.analytics_rollup_service.summary(
+            g.user_id,
+            start=date.fromisoformat(start) if start else None,
+            end=date.fromisoformat(end) if end else None,
+            group_by=group_by
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(summary), 200
 
 
 
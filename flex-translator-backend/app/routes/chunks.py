@@ -8,22 +8,28 @@ Endpoints:
     - GET    /chunks/<chunk_id>        → Get single chunk by ID
     - GET    /chunks/<doc_id>/progress → Get translation progress for document chunks
     - POST   /chunks/<chunk_id>/translate → Translate a chunk using ChatGPT & DeepL
+    - GET    /chunks/<chunk_id>/suggestions → Similar earlier chunks and their translations
     - POST   /chunks/<chunk_id>/save   → Save final translation for a chunk
     - PATCH  /chunks/<chunk_id>        → Update chunk translation
+    - GET    /chunks/<chunk_id>/revisions → List earlier versions of the chunk translation
+    - GET    /chunks/<chunk_id>/revisions/<revision> → Get (or compare) a version
+    - POST   /chunks/<chunk_id>/revisions/<revision>/restore → Restore a version
 
 All mutations require that the chunk exists, and some require user authorization.
 
 """
 
-from flask import request, jsonify, current_app, session
+from flask import request, jsonify, current_app, session, g
 from flask_smorest import Blueprint
 from app.models.db_models import Chunk
-from app.routes.wrappers import require_user_access
+from app.routes.wrappers import require_user_access, load_owned
+from app.utils.db_routing import read_only
 from app.extensions import db
 
 chunks_bp = Blueprint('chunks', 'chunks', url_prefix='/chunks')
 
 @chunks_bp.route('', methods=['POST'])
+@read_only
 def get_chunks():
     """
     chunks.py
@@ -54,6 +60,7 @@ def get_chunks():
 
 
 @chunks_bp.route('/<int:chunk_id>', methods=['GET'])
+@read_only
 def get_chunk(chunk_id):
     """
     Returns metadata and content for a single chunk.
@@ -75,26 +82,57 @@ def get_chunk(chunk_id):
 
 
 @chunks_bp.route('/<int:doc_id>/progress', methods=['GET'])
+@read_only
 def get_translation_progress(doc_id):
     """
-    Calculates translation progress (translated vs. total) for a document's chunks.
+    Returns translation progress (translated vs. total) for a document's chunks.
+
+    Reads the progress counters of the document row, shared by all server workers.
 
     Returns:
         - 200 OK with count of translated and total chunks
         - 404 Not Found if no chunks are found
     """
-    chunks = current_app.chunk_service.get_chunks_by_document_id(doc_id)
-
-    translated = sum ([1 if chunk["final_chunk_translation"] else 0 for chunk in chunks])
-    total = len(chunks)
+    progress = current_app.progress_service.get_progress(doc_id)
 
-    if not chunks:
+    if not progress or not progress["total"]:
         return jsonify(error="Chunk not found"), 404
     
-    return jsonify({
-        "translated": translated,
-        "total": total
-    }), 200
+    return jsonify(progress), 200
+
+
+@chunks_bp.route('/<int:chunk_id>/suggestions', methods=['GET'])
+@require_user_access
+@read_only
+def get_translation_suggestions(chunk_id):
+    """
+    Returns translation memory suggestions for a chunk: the user's earlier translated
+    chunks with the most similar original text, so a translation can be reused
+    instead of calling ChatGPT or DeepL.
+
+    Query parameters:
+        - k: maximum number of suggestions, 1-20 (default 5)
+        - threshold: minimum similarity, 0-1 (default 0.6)
+
+    Returns:
+        - 200 OK with {"suggestions": [{"chunk_id", "document_id", "chunk_number", "score",
+          "chunk_content", "final_chunk_translation"}, ...]}, best first
+        - 400 Bad Request for invalid parameters
+        - 404 Not Found if chunk doesn't exist
+    """
+    k = request.args.get('k', 5, type=int)
+    threshold = request.args.get('threshold', 0.6, type=float)
+    if not 1 <= k <= 20 or not 0 <= threshold <= 1:
+        return jsonify(error="k must be between 1 and 20 and threshold between 0 and 1"), 400
+
+    chunk = load_owned(Chunk, chunk_id)
+    if not chunk:
+        return jsonify(error="Chunk not found"), 404
+
+    suggestions = current_app.translation_memory_service.suggest(
+        g.user_id, chunk.chunk_content, k=k, threshold=threshold, exclude_chunk_id=chunk.id
+    )
+    return jsonify(suggestions=suggestions), 200
 
 
 @chunks_bp.route('/<int:chunk_id>/translate', methods=['POST'])
@@ -122,7 +160,7 @@ def translate_chunk(chunk_id):
         user_prompts = data.get("user_prompts", [])
         current_translation = data.get("current_translation", "").strip()
 
-        chunk = Chunk.query.get(chunk_id)
+        chunk = load_owned(Chunk, chunk_id)
         if not chunk:
             return jsonify(error="Chunk not found"), 404
     
@@ -168,8 +206,7 @@ def save_chunk_translation(chunk_id):
     data = request.get_json()
     final_translation = data.get("final_translation")
 
-    chunk.final_chunk_translation = final_translation
-    db.session.commit()
+    current_app.chunk_service.set_chunk_translation(chunk, final_translation)
 
     return jsonify(message="Translation saved successfully"), 200
 
@@ -183,8 +220,69 @@ def update_chunk(chunk_id):
         return jsonify(error="Chunk not found"), 404
 
     data = request.get_json()
-    chunk.final_chunk_translation = data.get("final_chunk_translation", chunk.final_chunk_translation)
-
-    db.session.commit()
+    translation = data.get("final_chunk_translation", chunk.final_chunk_translation)
+    current_app.chunk_service.set_chunk_translation(chunk, translation)
 
     return jsonify(message="Chunk updated successfully"), 200
+
+
+@chunks_bp.route('/<int:chunk_id>/revisions', methods=['GET'])
+@require_user_access
+@read_only
+def list_chunk_revisions(chunk_id):
+    """
+    Lists the saved versions of a chunk's final translation, newest first.
+
+    Returns:
+        - 200 OK with {"revisions": [{"revision", "size", "created_at"}, ...]}
+    """
+    return jsonify(revisions=current_app.revision_service.list_revisions(chunk_id)), 200
+
+
+@chunks_bp.route('/<int:chunk_id>/revisions/<int:revision>', methods=['GET'])
+@require_user_access
+@read_only
+def get_chunk_revision(chunk_id, revision):
+    """
+    Returns the translation of a revision.
+
+    Query parameters:
+        - compare_to: another revision; adds a unified diff from it to this revision (optional)
+
+    Returns:
+        - 200 OK with {"revision", "final_chunk_translation"} (and "diff": [lines] with compare_to)
+        - 404 Not Found if a revision doesn't exist
+    """
+    revisions = current_app.revision_service
+    compare_to = request.args.get('compare_to', type=int)
+    try:
+        result = {"revision": revision, "final_chunk_translation": revisions.get_text(chunk_id, revision)}
+        if compare_to is not None:
+            result["diff"] = revisions.diff(chunk_id, compare_to, revision)
+    except ValueError as e:
+        return jsonify(error=str(e)), 404
+
+    return jsonify(result), 200
+
+
+@chunks_bp.route('/<int:chunk_id>/revisions/<int:revision>/restore', methods=['POST'])
+@require_user_access
+def restore_chunk_revision(chunk_id, revision):
+    """
+    Restores an earlier translation of a chunk. The restore is saved as a new revision.
+
+    Returns:
+        - 200 OK with the restored "final_chunk_translation"
+        - 404 Not Found if the chunk or revision doesn't exist
+    """
+    chunk = load_owned(Chunk, chunk_id)
+    if not chunk:
+        return jsonify(error="Chunk not found"), 404
+
+    try:
+        translation = current_app.revision_service.get_text(chunk_id, revision)
+    except ValueError as e:
+        return jsonify(error=str(e)), 404
+
+    current_app.chunk_service.set_chunk_translation(chunk, translation)
+    return jsonify(message="Revision restored", final_chunk_translation=translation), 200
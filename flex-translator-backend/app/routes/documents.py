@@ -4,48 +4,104 @@ documents.py
 Routes for managing documents and their translations.
 
 Includes:
-- Document creation from text or file
+- Document creation from text or file (PDF, DOCX, PPTX or LaTeX source)
 - Retrieval of documents and translation chunks
-- Automatic translation
-- DeepL file-based translation (preserves layout)
+- Full-text search over titles, original text and translations
+- Automatic translation, with progress events streamed over SSE
+- DeepL file-based translation jobs (preserves layout)
 - Finalization, update and deletion
 - PDF post-processing (with injected translations)
 
 """
 
-from flask import request, jsonify, current_app, send_file, session
+from flask import request, jsonify, current_app, send_file, session, g
 from flask_smorest import Blueprint
 from flask import Response, stream_with_context
 from app.models.db_models import Document, Chunk
 from app.extensions import db
-from app.routes.wrappers import require_user_access
+from app.routes.wrappers import require_user_access, load_owned
+from app.utils.db_routing import read_only
 import base64
+import uuid
 from PyPDF2 import PdfReader
 from io import BytesIO
-from app.services.pdf_service import extract_text_from_pdf, translate_text, translate_text2
-from app.services.pdf_service import guess_extension
-from app.services.analytics_service import save_analytics_entry
+from app.services.pdf_service import inject_translations
+from app.services.pdf_service import guess_extension, guess_docx_based_extension
+from app.services.documents_service import MissingChunksError
+from app.utils.tokens import parse_jwt_token
 
 documents_bp = Blueprint('documents', 'documents', url_prefix='/documents')
 
+# Download types of translated files by document source type
+DOWNLOAD_TYPES = {
+    "pdf": ("application/docx", "docx"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "docx"),
+    "pptx": ("application/vnd.openxmlformats-officedocument.presentationml.presentation", "pptx"),
+}
+
 @documents_bp.route('/user/<int:user_id>', methods=['GET'])
 @require_user_access
+@read_only
 def get_documents(user_id):
     """
-    Get all documents belonging to a specific user.
+    Get documents belonging to a specific user.
+
+    Query parameters (all optional):
+        - sort: 'date' (creation date, default), 'modified' or 'name'
+        - order: 'asc' or 'desc' (default)
+        - limit: page size; without it all documents are returned
+        - cursor: value of the X-Next-Cursor header of the previous page
+
+    Returns:
+        - 200 OK with list of documents (id, title and dates only).
+          If there are more documents, the X-Next-Cursor header holds the cursor of the next page.
+        - 400 Bad Request for invalid parameters
+    """
+    try:
+        (documents, next_cursor) = current_app.documents_service.list_documents(
+            user_id,
+            sort=request.args.get('sort', 'date'),
+            order=request.args.get('order', 'desc'),
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify(documents)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+
+@documents_bp.route('/search', methods=['GET'])
+@require_user_access
+@read_only
+def search_documents():
+    """
+    Searches the user's documents by title, original text and translation.
+
+    Query parameters:
+        - user_id: int (required)
+        - q: search text (required)
+        - page: page number, from 1 (default 1)
+        - limit: hits per page, 1-50 (default 20)
 
     Returns:
-        - 200 OK with list of documents
+        - 200 OK with {"query", "page", "limit", "total", "hits", "documents"}, where hits are
+          chunks ranked by relevance with snippets and documents are title matches (first page)
+        - 400 Bad Request for an empty query or invalid paging
     """
-    documents = [
-            {
-                "id": doc.id,
-                "title": doc.title,
-                "created_at": doc.created_at.isoformat(),
-                "modified_at": doc.modified_at.isoformat() if doc.modified_at else None
-            } for doc in Document.query.filter_by(user_id=user_id).all()
-        ]
-    return jsonify(documents), 200
+    try:
+        result = current_app.search_service.search(
+            g.user_id,
+            request.args.get('q', ''),
+            page=request.args.get('page', 1, type=int),
+            limit=request.args.get('limit', 20, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 200
 
 
 @documents_bp.route('/<int:doc_id>', methods=['GET'])
@@ -54,21 +110,19 @@ def get_document_and_chunks(doc_id):
     """
     Returns full document metadata and its associated chunks.
 
-    If the document contains a base64-encoded PDF, the text is extracted.
+    If the document contains a base64-encoded PDF, DOCX or PPTX, the text is extracted.
+    For LaTeX sources the text has its markup replaced by placeholders, like its chunks.
 
     Returns:
         - 200 OK with document and chunks
         - 404 if document not found
     """
-    doc = Document.query.get(doc_id)
+    doc = load_owned(Document, doc_id)
     if not doc:
         return jsonify(error="Document not found"), 404
     
     chunks = current_app.chunk_service.get_chunks_by_document_id(doc_id)
-    if doc.original_text[0:3] == "b64":
-        org_text = extract_text_from_pdf(doc.original_text)
-    else:
-        org_text = doc.original_text
+    org_text = current_app.documents_service.extract_original_text(doc)
         
     return jsonify({
         "id": doc.id,
@@ -83,7 +137,11 @@ def get_document_and_chunks(doc_id):
 
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in  ["pdf"]
+    return '.' in filename and file_extension(filename) in  ["pdf", "docx", "pptx", "tex"]
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower()
 
 
 # creates new document and chunks it by calling documents_service.create_document
@@ -91,12 +149,14 @@ def allowed_file(filename):
 @require_user_access
 def create_document():
     """
-    Creates a new document from text or uploaded file (.pdf).
+    Creates a new document from text or uploaded file (.pdf, .docx, .pptx or .tex).
+
+    DOCX and PPTX files are read directly; only PDFs are converted to DOCX first.
 
     Request (form-data):
         - title: str
         - userId: int
-        - upload_file (optional): PDF file
+        - upload_file (optional): PDF, DOCX or PPTX file or UTF-8 LaTeX source
         - content (optional): pasted text
 
     Returns:
@@ -107,9 +167,24 @@ def create_document():
     print("user id " + user_id)
     title = request.form.get("title")
     file = request.files.get("upload_file")
+    source_type = None
 
-    if file and allowed_file(file.filename):
+    if file and allowed_file(file.filename) and file_extension(file.filename) == "tex":
+        try:
+            content = file.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            return jsonify(error="LaTeX file must be UTF-8 encoded"), 400
+        source_type = "latex"
+    elif file and allowed_file(file.filename):
         binary = file.read()
+        extension = file_extension(file.filename)
+        if extension in ("docx", "pptx"):
+            try:
+                if guess_docx_based_extension(binary) != "." + extension:
+                    raise ValueError(f"File is not a valid .{extension} file")
+            except ValueError as e:
+                return jsonify(error=str(e)), 400
+            source_type = extension
         print(binary[:100])
         #set some file size limit here
         #you can also validate here that it really is a valid pdf
@@ -123,7 +198,8 @@ def create_document():
         doc = current_app.documents_service.create_document(
             user_id=user_id,
             title=title,
-            content=content
+            content=content,
+            source_type=source_type
         )
         return jsonify(document_id=doc.id, title=doc.title, created_at=doc.created_at.isoformat(), modified_at=doc.modified_at.isoformat()), 200
     except ValueError as e:
@@ -140,15 +216,21 @@ def auto_translate_document(doc_id):
     """
     Automatically translates all chunks of a document using DeepL.
 
+    Publishes chunk_completed and progress events after every chunk and a done
+    or error event at the end (see GET /documents/<doc_id>/events). The events
+    carry the run ID given in the request body ("run_id"), so a client can
+    subscribe to this run's events before starting it.
+
     Returns:
-        - 200 OK when translation complete
+        - 200 OK when translation complete; for LaTeX sources, "missing_placeholders"
+          lists chunks whose translation lost markup (also sent with the done event)
         - 404 if document not found
         - 500 on failure
     """
     user_id = session.get('user_id')
     if not user_id:
         return jsonify(error="User not logged in"), 401
-    document = Document.query.get(doc_id)
+    document = load_owned(Document, doc_id)
     if not document:
         return jsonify(error="Document not found"), 404
     
@@ -156,24 +238,28 @@ def auto_translate_document(doc_id):
         return jsonify(message="Translation already exists"), 200
     
     print(f"Starting auto-translation for document {doc_id}")
+    run_id = str((request.get_json(silent=True) or {}).get("run_id") or uuid.uuid4().hex)[:64]
 
     try:
         # Get or create chunks
         chunks = Chunk.query.filter_by(document_id=doc_id).order_by(Chunk.chunk_number).all()
         if not chunks:
-            full_text = document.original_text
-            chunks = current_app.chunk_service.split_and_store_chunks(doc_id, full_text)
-            if not chunks:
+            full_text = current_app.documents_service.extract_original_text(document)
+            if not current_app.chunk_service.split_and_store_chunks(doc_id, full_text):
                 return jsonify(error="Failed to split text into chunks"), 500
+            chunks = Chunk.query.filter_by(document_id=doc_id).order_by(Chunk.chunk_number).all()
+
+        # Events of earlier runs are not needed anymore
+        event_service = current_app.event_service
+        event_service.clear(doc_id)
+        db.session.commit()
 
         total_chunks = len(chunks)
-        translated_chunks = []
 
         # Translate chunks
         for idx, chunk_obj in enumerate(chunks):
             if chunk_obj.final_chunk_translation:
                 # Skip already translated chunks
-                translated_chunks.append(chunk_obj.final_chunk_translation)
                 continue
 
             print(f"Translating chunk {idx + 1}/{total_chunks}...")
@@ -195,45 +281,46 @@ def auto_translate_document(doc_id):
                 gpt_translation = "[Translation failed for this chunk]"
                 """
 
-            # Save translation
-            chunk_obj.final_chunk_translation = deepl_translation
-            db.session.add(chunk_obj)
-            # Commit after each chunk so progress updates
+            # Save translation and its events, committing after each chunk so progress updates
+            current_app.chunk_service.set_chunk_translation(chunk_obj, deepl_translation, commit=False)
+            event_service.publish(doc_id, "chunk_completed", {
+                "chunk_id": chunk_obj.id,
+                "chunk_number": chunk_obj.chunk_number
+            }, run_id=run_id)
+            event_service.publish(doc_id, "progress", _progress_event_data(doc_id), run_id=run_id)
             db.session.commit()
-            translated_chunks.append(deepl_translation)
 
             # ---------------- Save analytics data ----------------
-            try:
-                analytics_data = {
-                    "document_id": doc_id,
-                    "chunk_id": chunk_obj.id,
-                    "source_type": "paste",
-                    "translation_mode": "auto",
-                    "chosen_model": "deepl",
-                    "original_text": chunk_obj.chunk_content,
-                    "user_final": deepl_translation,
-                    "edited": False,
-                    "user_prompts": [],
-                    "user_dictionary": [],
-                    "time_spent_sec": 0,
-                }
-
-                save_analytics_entry(analytics_data)
-                print("Analytics saved for chunk", chunk_obj.id)
-
-            except Exception as e:
-                current_app.logger.error(f"Analytics error for chunk {chunk_obj.id}: {e}")
+            # Queued and written in batches by the analytics writer thread
+            current_app.analytics_service.record(g.user_id, {
+                "document_id": doc_id,
+                "chunk_id": chunk_obj.id,
+                "source_type": "paste",
+                "translation_mode": "auto",
+                "chosen_model": "deepl",
+                "original_text": chunk_obj.chunk_content,
+                "user_final": deepl_translation,
+                "edited": False,
+                "user_prompts": [],
+                "user_dictionary": [],
+                "time_spent_sec": 0,
+            })
     
             # -----------------------------------------------------
 
             print(f"Progress: {idx + 1}/{total_chunks}")
 
 
-        # Join all chunks
-        document.final_translation = "\n\n".join(translated_chunks)
-        document.is_finalized = True
-        db.session.add(document)
+        # Join all chunks (streamed from the database, in the same transaction as the done event)
+        current_app.documents_service.finalize_document_by_id(doc_id, commit=False)
+        # LaTeX markup the translation lost cannot be restored; the user fixes those chunks
+        missing_placeholders = current_app.documents_service.latex_placeholder_problems(doc_id)
+        event_service.publish(doc_id, "done", {
+            "document_id": doc_id,
+            "missing_placeholders": missing_placeholders
+        }, run_id=run_id)
         db.session.commit()
+        current_app.documents_service.invalidate_rendered_docx(doc_id)
 
         print(f"Translation complete for document {doc_id}")
 
@@ -242,13 +329,77 @@ def auto_translate_document(doc_id):
             title=document.title,
             created_at=document.created_at.isoformat(),
             modified_at=document.modified_at.isoformat(),
+            missing_placeholders=missing_placeholders,
             message="Auto-translation complete"
         ), 200
 
     except Exception as e:
         db.session.rollback()
+        try:
+            current_app.event_service.publish(doc_id, "error", {"message": str(e)}, run_id=run_id)
+            db.session.commit()
+        except Exception as event_error:
+            db.session.rollback()
+            current_app.logger.error(f"Could not publish error event for document {doc_id}: {event_error}")
         return jsonify(error="Auto-translation failed: " + str(e)), 500
 
+
+def _progress_event_data(doc_id):
+    """Returns the progress of a document as event data (translated, total, percent)."""
+    progress = current_app.progress_service.get_progress(doc_id) or {"translated": 0, "total": 0}
+    total = progress["total"]
+    percent = round(progress["translated"] * 100 / total) if total else 0
+    return {**progress, "percent": percent}
+
+
+@documents_bp.route('/<int:doc_id>/events', methods=['GET'])
+@require_user_access
+def stream_document_events(doc_id):
+    """
+    Streams progress events of a document as Server-Sent Events (text/event-stream).
+
+    Sends the current progress first, then chunk_completed, progress, error and
+    done events as they are committed. The stream ends after done or error, or
+    after a few minutes; clients reconnect and resume with the Last-Event-ID
+    header (or ?last_event_id=). With ?run_id=, only events of that
+    auto-translation run are sent.
+
+    Each stream holds a worker thread, so the number of open streams per
+    worker is limited (EVENT_MAX_STREAMS).
+
+    Returns:
+        - 200 OK with an event stream
+        - 400 if the last event ID is invalid
+        - 503 with Retry-After if this worker has too many open streams
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return jsonify(error="Invalid last event ID"), 400
+
+    event_service = current_app.event_service
+    if not event_service.acquire_stream():
+        return jsonify(error="Too many open event streams, try again shortly"), 503, {"Retry-After": "2"}
+
+    try:
+        initial_progress = _progress_event_data(doc_id)
+        # The stream reads the database itself; release this request's transaction first
+        db.session.rollback()
+        response = Response(
+            stream_with_context(event_service.stream(
+                doc_id, last_event_id, initial_progress, request.args.get("run_id")
+            )),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    except Exception:
+        event_service.release_stream()
+        raise
+    # Called by the server when the stream ends or the client disconnects
+    response.call_on_close(event_service.release_stream)
+    return response
+
     
 
 
@@ -256,7 +407,10 @@ def auto_translate_document(doc_id):
 @require_user_access
 def deepl_translate_file():
     """
-    Translates a document file (PDF or DOCX) using DeepL API and returns a downloadable .docx file.
+    Starts a DeepL translation job for a document file (PDF or DOCX).
+
+    The file is uploaded to DeepL and a job ID is returned right away. The job is
+    polled in the background; use the status and result endpoints below.
 
     Request (form-data):
         - title: str
@@ -264,55 +418,96 @@ def deepl_translate_file():
         - upload_file: file
 
     Returns:
-        - 200 OK with translated DOCX
+        - 202 Accepted with job ID and status
         - 400 or 500 on error
     """
     title = request.form.get("title")
     user_id = request.form.get("userId")
     file = request.files.get("upload_file")
-    filename = file.filename
 
     if not file or not title or not user_id:
         return jsonify(error="Missing required fields"), 400
 
     try:
+        token_user_id = parse_jwt_token(request.headers.get("Authorization"))
         file_bytes = file.read()
         extension = guess_extension(file_bytes)
         filename = title.replace(" ", "_") + extension
 
-        file_stream = file_bytes
-
-        # Translation
-        buffer = current_app.translation_service.deepl_translate_document(
-            file_stream=file_stream,
+        job = current_app.deepl_job_service.create_job(
+            user_id=token_user_id,
+            title=title,
+            file_bytes=file_bytes,
             filename=filename
         )
+        return jsonify(job_id=job["job_id"], status=job["status"]), 202
 
-        if not buffer:
-            return jsonify(error="Translation failed"), 500
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        current_app.logger.error(f"DeepL file translation error: {e}")
+        return jsonify(error="Translation failed: " + str(e)), 500
 
 
-        # Save analytics
-        try:
-            save_analytics_entry(filename=filename)
-            current_app.logger.info(f"PDF analytics saved: {filename}")
-        except Exception as e:
-            current_app.logger.error(f"Analytics error for PDF translation: {e}")
+def _get_owned_deepl_job(job_id):
+    """Returns the job if it exists and belongs to the token's user, else None."""
+    token_user_id = parse_jwt_token(request.headers.get("Authorization"))
+    try:
+        job = current_app.deepl_job_service.get_job(job_id)
+    except ValueError:
+        return None
+    if not job or job["user_id"] != int(token_user_id):
+        return None
+    return job
 
-        return send_file(
-            buffer,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
-            download_name=f"{title}.docx"
-        )
 
-    except Exception as e:
-        current_app.logger.error(f"DeepL PDF translation error: {e}")
-        return jsonify(error="Translation failed: " + str(e)), 500
-    
+@documents_bp.route('/deeplFileTranslate/<job_id>', methods=['GET'])
+@require_user_access
+def get_deepl_translation_job(job_id):
+    """
+    Returns the status of a DeepL translation job.
+
+    Returns:
+        - 200 OK with status ('queued', 'translating', 'done' or 'error'),
+          estimated seconds remaining and error message
+        - 404 if the job is not found
+    """
+    job = _get_owned_deepl_job(job_id)
+    if not job:
+        return jsonify(error="Job not found"), 404
 
+    return jsonify(
+        job_id=job["job_id"],
+        status=job["status"],
+        seconds_remaining=job["seconds_remaining"],
+        error=job["error"]
+    ), 200
 
 
+@documents_bp.route('/deeplFileTranslate/<job_id>/result', methods=['GET'])
+@require_user_access
+def get_deepl_translation_result(job_id):
+    """
+    Streams the translated .docx file of a finished DeepL job.
+
+    Returns:
+        - 200 OK with translated DOCX
+        - 404 if the job is not found
+        - 409 if the translation is not ready yet
+    """
+    job = _get_owned_deepl_job(job_id)
+    if not job:
+        return jsonify(error="Job not found"), 404
+    if job["status"] != "done":
+        return jsonify(error="Translation not ready", status=job["status"]), 409
+
+    return send_file(
+        current_app.deepl_job_service.result_path(job_id),
+        mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        as_attachment=True,
+        download_name=f"{job['title']}.docx"
+    )
+
 
 @documents_bp.route('/<int:doc_id>/finalize', methods=['POST'])
 @require_user_access
@@ -321,12 +516,20 @@ def finalize_document(doc_id):
     Finalizes a document by locking the translation.
 
     Returns:
-        - 200 OK with final translation
-        - 400 or 500 on error
+        - 200 OK with final translation and, for LaTeX sources, "missing_placeholders":
+          chunks whose translation lost markup ([{"chunk_number", "missing"}])
+        - 400 if some chunks are not translated ("missing_chunks" lists their numbers)
+        - 400 or 500 on other errors
     """
     try:
-        doc = current_app.documents_service.finalize_document_by_id(doc_id)
-        return jsonify(final_translation=doc.final_translation), 200
+        documents_service = current_app.documents_service
+        final_translation = documents_service.finalize_document_by_id(doc_id)
+        return jsonify(
+            final_translation=final_translation,
+            missing_placeholders=documents_service.latex_placeholder_problems(doc_id)
+        ), 200
+    except MissingChunksError as e:
+        return jsonify(error=str(e), missing_chunks=e.chunk_numbers), 400
     except ValueError as e:
         return jsonify(error=str(e)), 400
     except Exception as e:
@@ -346,7 +549,7 @@ def delete_document(doc_id):
         - 404 or 500 on error
     """
     try:
-        current_app.documents_service.delete_document_by_id(doc_id)
+        current_app.documents_service.delete_document_by_id(doc_id, g.user_id)
         return jsonify(message=f"Document (id: {doc_id}) deleted successfully"), 200
     except ValueError as e:
         return jsonify(error=str(e)), 404
@@ -360,7 +563,8 @@ def delete_document(doc_id):
 @require_user_access
 def delete_documents_batch():
     """
-    Deletes multiple documents by a list of IDs.
+    Deletes multiple documents of the current user by a list of IDs.
+    IDs of other users' documents are ignored.
 
     Request JSON:
         {
@@ -368,7 +572,7 @@ def delete_documents_batch():
         }
 
     Returns:
-        - 200 OK on success
+        - 200 OK on success, with the IDs actually deleted
         - 400, 404, or 500 on error
     """
     data = request.get_json()
@@ -377,7 +581,7 @@ def delete_documents_batch():
         return jsonify({"error": "No document IDs provided"}), 400
 
     try:
-        result = current_app.documents_service.delete_documents_by_ids(doc_ids)
+        result = current_app.documents_service.delete_documents_by_ids(doc_ids, g.user_id)
         return jsonify(result), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
@@ -403,7 +607,7 @@ def update_document(doc_id):
         - 200 OK
         - 404 or 500 on error
     """
-    document = Document.query.get(doc_id)
+    document = load_owned(Document, doc_id)
     if not document:
         return jsonify(error="Document not found"), 404
     
@@ -415,6 +619,8 @@ def update_document(doc_id):
     document.final_translation = data.get("final_translation", document.final_translation)
 
     db.session.commit()
+    if "final_translation" in data:
+        current_app.documents_service.invalidate_rendered_docx(doc_id)
     return jsonify(message="Document updated successfully"), 200
     
 
@@ -422,29 +628,63 @@ def update_document(doc_id):
 @require_user_access
 def get_pdf_translation(doc_id):
     """
-    Reconstructs the original PDF with translated text injected and returns it as .docx.
+    Reconstructs the original file with translated text injected and returns it.
+
+    PDFs and DOCX files are returned as .docx, PPTX files as .pptx and
+    LaTeX documents as the translated .tex source.
+
+    Rendered files are cached on disk by (original file, final translation), so repeat
+    downloads are sent straight from the cache. Supports conditional requests via ETag.
 
     Returns:
-        - 200 OK with docx file
+        - 200 OK with docx or pptx file
+        - 304 Not Modified if the client's ETag is still valid
+        - 400 if the document has no final translation
         - 404 if document not found
     """
-    document = Document.query.get(doc_id)
-    chunks = current_app.chunk_service.get_chunks_by_document_id(doc_id)
+    document = load_owned(Document, doc_id)
     if not document:
         return jsonify(error="Document not found"), 404
-    original = document.original_text
-    final = document.final_translation
-    text = [word.replace("<word>", "").strip() for word in  extract_text_from_pdf(original).split("\n")]
-    final = list(map(lambda x: x.replace("<word>", "").strip(), final.split("\n")))
-    buffer = translate_text(original, {translation[0]:translation[1] for translation in zip(text, final)})
+    if not document.final_translation:
+        return jsonify(error="Document has no final translation"), 400
+    if document.source_type == "latex":
+        return send_file(
+            BytesIO(document.final_translation.encode("utf-8")),
+            mimetype="application/x-tex",
+            as_attachment=True,
+            download_name="file.tex"
+        )
 
-    
+    documents_service = current_app.documents_service
+    cache_key = documents_service.rendered_docx_key(document)
+    rendered = None
+    path = current_app.artifact_cache.get_path(cache_key)
+    if path is not None:
+        try:
+            rendered = open(path, "rb")
+        except FileNotFoundError:
+            # Evicted by another worker in between
+            rendered = None
+
+    if rendered is None:
+        original = document.original_text
+        segments = documents_service.get_segment_positions(original, document.original_hash)
+        translations, mismatched = documents_service.map_segment_translations(document, segments)
+        if mismatched:
+            current_app.logger.warning(
+                f"Document {doc_id}: translated lines do not match the segments of chunks {mismatched}"
+            )
+        # Sent from the rendered file itself, so a concurrent eviction of the cache entry does not matter
+        rendered = inject_translations(original, translations)
+        current_app.artifact_cache.put(cache_key, rendered)
+        rendered.seek(0)
+
+    (mimetype, extension) = DOWNLOAD_TYPES.get(document.source_type, DOWNLOAD_TYPES["pdf"])
     return send_file(
-        buffer,
-        mimetype='application/docx', 
+        rendered,
+        mimetype=mimetype,
         as_attachment=True,
-        download_name="file.docx"
+        download_name=f"file.{extension}",
+        etag=cache_key.rsplit("-", 1)[1],
+        conditional=True
     )
-    
-
-
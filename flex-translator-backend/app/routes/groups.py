@@ -14,17 +14,20 @@ from flask import Blueprint, request, jsonify, current_app
 from app.models.db_models import Group, GroupDocument, Document
 from app import db
 from app.routes.wrappers import require_user_access
+from app.utils.db_routing import read_only
 
 groups_bp = Blueprint('groups', 'groups', url_prefix='/groups')
 
 @groups_bp.route('', methods=['GET'])
 @require_user_access
+@read_only
 def get_groups():
     """
     Get all groups belonging to a user.
 
     Query parameters:
         - user_id: int (required)
+        - details: 'true' to include document counts and titles (optional)
 
     Returns:
         - 200 OK with list of groups
@@ -36,7 +39,8 @@ def get_groups():
         if not user_id:
             return jsonify({'error': 'Missing user_id'}), 400
 
-        groups = current_app.groups_service.get_groups_by_user(user_id)
+        include_details = request.args.get('details', 'false').lower() == 'true'
+        groups = current_app.groups_service.get_groups_by_user(user_id, include_details=include_details)
 
         return jsonify(groups), 200
     
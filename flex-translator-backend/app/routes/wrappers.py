@@ -7,12 +7,15 @@ Authorization decorator to verify user access to routes containing:
 - chunk_id
 
 If token is missing, invalid, or access is forbidden, the request is aborted.
+
+Ownership is checked by selecting only the owner's user ID (cached briefly by
+OwnershipService). Handlers load the checked entity with load_owned(), which
+loads it at most once per request.
 """
 
 from functools import wraps
-from flask import abort, current_app, request
+from flask import abort, current_app, g, request
 from app.utils.tokens import parse_jwt_token
-from app.models.db_models import Document, Chunk
 from app.extensions import db
 import jwt
 
@@ -26,6 +29,9 @@ def require_user_access(func):
     - chunk (/chunks/<chunk_id>)
     - user-specific data (/user/<user_id> or ?user_id=...)
 
+    On success, g.user_id holds the token's user ID and, for chunk routes,
+    g.chunk_document_id holds the ID of the chunk's document.
+
     Aborts with:
         - 401: If token is missing or invalid
         - 403: If access is forbidden
@@ -35,7 +41,6 @@ def require_user_access(func):
     """
     @wraps(func)
     def wrapper( *args, **kwargs):
-        SECRET_KEY = current_app.config["SECRET_TOKEN_KEY"]
         auth_header = request.headers.get("Authorization")
         try:
             token_user_id = parse_jwt_token(auth_header)
@@ -45,27 +50,31 @@ def require_user_access(func):
 
         if token_user_id == None:
             abort(403, description="User ID not found in token")
+        g.user_id = int(token_user_id)
+
+        ownership = current_app.ownership_service
 
         # 1. Check access to document by ID (/documents/<doc_id>)
         doc_id = kwargs.get('doc_id')
         if doc_id:
-            document = db.session.query(Document).get(doc_id)
-            if not document or int(document.user_id) != int(token_user_id):
+            owner = ownership.document_owner(doc_id)
+            if owner is None or int(owner) != g.user_id:
                 abort(403, description="Forbidden: invalid document access")
             return func(*args, **kwargs)
         
         # 2. Check access to chunk by ID (/chunks/<chunk_id>)
         chunk_id = kwargs.get('chunk_id')
         if chunk_id:
-            chunk = db.session.query(Chunk).get(chunk_id)
-            if not chunk or chunk.document.user_id != int(token_user_id):
+            owner = ownership.chunk_owner(chunk_id)
+            if owner is None or int(owner[0]) != g.user_id:
                 abort(403, description="Forbidden: invalid chunk access")
+            g.chunk_document_id = owner[1]
             return func(*args, **kwargs)
 
         # 3. Check access to user by ID (/user/<user_id> or /?user_id=...)
         user_id = kwargs.get('user_id') or request.args.get('user_id')
         if user_id:
-            if int(user_id) != int(token_user_id):
+            if int(user_id) != g.user_id:
                 abort(403, description="Forbidden: user mismatch")
             return func(*args, **kwargs)
         
@@ -77,3 +86,23 @@ def require_user_access(func):
 
     return wrapper
 
+
+def load_owned(model, entity_id: int):
+    """
+    Loads an entity whose ownership require_user_access has checked.
+
+    Entities are kept in g for the rest of the request, so the handler and any
+    helper it calls share one load.
+
+    Args:
+        model: Model class, e.g. Document or Chunk.
+        entity_id (int): Primary key.
+
+    Returns:
+        The entity, or None if it no longer exists.
+    """
+    loaded = g.setdefault("owned_entities", {})
+    key = (model, entity_id)
+    if key not in loaded:
+        loaded[key] = db.session.get(model, entity_id)
+    return loaded[key]
@@ -0,0 +1,235 @@
+"""
+analytics_rollup_service.py
+
+Incremental daily rollups of the analytics table, for reporting.
+
+- analytics_daily holds totals per (user, day, translation mode, model):
+  entries, edited entries, chunks and time spent
+- The rollup job aggregates only analytics rows newer than its watermark
+  (rollup_state.last_id) and adds them to the totals in the same transaction
+  that moves the watermark, so every row is counted exactly once
+- Rows are aggregated one run after their ID is first seen, so rows whose
+  insert was still uncommitted at that time (IDs can commit out of order) are
+  not skipped
+- The job runs in a background thread every ANALYTICS_ROLLUP_INTERVAL seconds
+  in each worker (the state row is locked, so runs never overlap) or with
+  `flask --app run analytics-rollup`, e.g. from cron
+- The same job prunes progress events older than EVENT_RETENTION_HOURS
+  (see EventService.prune)
+- Reports read only analytics_daily, never the raw table
+"""
+
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy import String, case, func, insert, select, update
+from app.extensions import db
+from app.models.db_models import Analytics, AnalyticsDaily, RollupState
+
+STATE_NAME = "analytics_daily"
+
+# Dimensions reports can be grouped by
+GROUP_BY_COLUMNS = {
+    "day": AnalyticsDaily.day,
+    "translation_mode": AnalyticsDaily.translation_mode,
+    "chosen_model": AnalyticsDaily.chosen_model,
+}
+
+
+class AnalyticsRollupService:
+    def __init__(self, app, interval: float = 300.0):
+        """
+        Initializes the rollup service.
+
+        Args:
+            app (Flask): Application whose database the job thread uses.
+            interval (float): Seconds between background runs (0 disables the thread).
+        """
+        self.app = app
+        self.interval = interval
+        self._thread = None
+
+
+    def start(self):
+        """Starts the background job thread, unless disabled or already running."""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name="analytics-rollup", daemon=True)
+        self._thread.start()
+
+
+    def run_once(self) -> int:
+        """
+        Aggregates new analytics rows into analytics_daily and commits.
+
+        Returns:
+            int: Number of analytics rows aggregated.
+        """
+        try:
+            state = self._lock_state()
+            high = db.session.execute(select(func.max(Analytics.id))).scalar() or 0
+
+            aggregated = 0
+            if state.next_id > state.last_id:
+                aggregated = self._aggregate(state.last_id, state.next_id)
+                state.last_id = state.next_id
+            state.next_id = max(high, state.last_id)
+            state.updated_at = datetime.now()
+            db.session.commit()
+            return aggregated
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+    def summary(self, user_id: int, start: date = None, end: date = None, group_by=("day",)) -> dict:
+        """
+        Returns a user's analytics totals from the rollups.
+
+        Args:
+            user_id (int): User ID.
+            start (date): First day to include (optional).
+            end (date): Last day to include (optional).
+            group_by (Iterable[str]): Any of 'day', 'translation_mode', 'chosen_model'.
+
+        Returns:
+            dict: {"as_of": time of the last rollup run or None, "rows": [...]}, where each
+            row has the group_by values, entries, edited, edited_rate, chunks and time_spent_sec.
+
+        Raises:
+            ValueError: If a group_by value is unknown.
+        """
+        unknown = [name for name in group_by if name not in GROUP_BY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Invalid group_by: {', '.join(unknown)}")
+
+        dimensions = [GROUP_BY_COLUMNS[name].label(name) for name in group_by]
+        query = select(
+            *dimensions,
+            func.sum(AnalyticsDaily.entries).label("entries"),
+            func.sum(AnalyticsDaily.edited).label("edited"),
+            func.sum(AnalyticsDaily.chunks).label("chunks"),
+            func.sum(AnalyticsDaily.time_spent_sec).label("time_spent_sec")
+        ).where(AnalyticsDaily.user_id == user_id)
+        if start:
+            query = query.where(AnalyticsDaily.day >= start)
+        if end:
+            query = query.where(AnalyticsDaily.day <= end)
+        if dimensions:
+            query = query.group_by(*dimensions).order_by(*dimensions)
+
+        rows = []
+        for row in db.session.execute(query):
+            if not row.entries:
+                continue
+            values = {name: getattr(row, name) or None for name in group_by}
+            if values.get("day"):
+                values["day"] = values["day"].isoformat()
+            values.update(
+                entries=int(row.entries),
+                edited=int(row.edited),
+                edited_rate=round(int(row.edited) / int(row.entries), 4),
+                chunks=int(row.chunks),
+                time_spent_sec=int(row.time_spent_sec)
+            )
+            rows.append(values)
+
+        as_of = db.session.execute(
+            select(RollupState.updated_at).where(RollupState.name == STATE_NAME)
+        ).scalar()
+        return {"as_of": as_of.isoformat() if as_of else None, "rows": rows}
+
+
+    def _lock_state(self) -> RollupState:
+        """Returns the job's state row, locked until commit (created on the first run)."""
+        db.session.execute(
+            insert(RollupState)
+            .prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+            .values(name=STATE_NAME, last_id=0, next_id=0)
+        )
+        return db.session.execute(
+            select(RollupState).where(RollupState.name == STATE_NAME).with_for_update()
+        ).scalar_one()
+
+
+    def _aggregate(self, after_id: int, up_to_id: int) -> int:
+        """Adds the analytics rows with after_id < id <= up_to_id to analytics_daily. Does not commit."""
+        day = func.date(Analytics.created_at)
+        user_id = func.coalesce(Analytics.user_id, 0)
+        # String type, so '' is not read back through the Enum of translation_mode
+        mode = func.coalesce(Analytics.translation_mode, "", type_=String)
+        model = func.coalesce(Analytics.chosen_model, "", type_=String)
+        groups = db.session.execute(
+            select(
+                day.label("day"), user_id.label("user_id"), mode.label("mode"), model.label("model"),
+                func.count(Analytics.id).label("entries"),
+                func.sum(case((Analytics.edited.is_(True), 1), else_=0)).label("edited"),
+                func.count(Analytics.chunk_id).label("chunks"),
+                func.coalesce(func.sum(Analytics.time_spent_sec), 0).label("time_spent_sec")
+            )
+            .where(Analytics.id > after_id, Analytics.id <= up_to_id, Analytics.created_at.is_not(None))
+            .group_by(day, user_id, mode, model)
+        ).all()
+
+        for group in groups:
+            # SQLite returns DATE() as a string
+            group_day = date.fromisoformat(group.day) if isinstance(group.day, str) else group.day
+            key = (
+                AnalyticsDaily.user_id == group.user_id,
+                AnalyticsDaily.day == group_day,
+                AnalyticsDaily.translation_mode == group.mode,
+                AnalyticsDaily.chosen_model == group.model,
+            )
+            totals = {
+                "entries": int(group.entries),
+                "edited": int(group.edited or 0),
+                "chunks": int(group.chunks),
+                "time_spent_sec": int(group.time_spent_sec),
+            }
+            result = db.session.execute(
+                update(AnalyticsDaily).where(*key).values(
+                    {getattr(AnalyticsDaily, name): getattr(AnalyticsDaily, name) + value
+                     for (name, value) in totals.items()}
+                )
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(AnalyticsDaily).values(
+                    user_id=group.user_id, day=group_day,
+                    translation_mode=group.mode, chosen_model=group.model, **totals
+                ))
+
+        return sum(int(group.entries) for group in groups)
+
+
+    def _run(self):
+        """Job loop: runs the rollup every `interval` seconds."""
+        while True:
+            time.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    aggregated = self.run_once()
+                    if aggregated:
+                        self.app.logger.info(f"Analytics rollup: {aggregated} entries aggregated")
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f"Analytics rollup failed: {e}")
+                try:
+                    pruned = self.app.event_service.prune()
+                    if pruned:
+                        self.app.logger.info(f"Pruned {pruned} old document events")
+                except Exception as e:
+                    self.app.logger.error(f"Pruning document events failed: {e}")
+                finally:
+                    db.session.remove()
+
+
+def init_app(app):
+    """Creates the rollup service, starts its thread and registers `flask analytics-rollup`."""
+    app.analytics_rollup_service = AnalyticsRollupService(app, app.config['ANALYTICS_ROLLUP_INTERVAL'])
+    app.analytics_rollup_service.start()
+
+    @app.cli.command("analytics-rollup")
+    def analytics_rollup_command():
+        """Aggregate new analytics entries into the daily rollups and prune old document events."""
+        print(f"{app.analytics_rollup_service.run_once()} analytics entries aggregated.")
+        print(f"{app.event_service.prune()} old document events pruned.")
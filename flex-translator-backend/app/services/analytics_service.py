@@ -2,32 +2,97 @@
 analytics_service.py
 
 Handles storing user translation analytics into the database.
+
+Entries are not written on the request path:
+- record() puts the entry on an in-process queue and returns immediately
+- A background thread writes queued entries in batches (one multi-row INSERT
+  and one commit per batch) when `batch_size` entries are waiting or
+  `flush_interval` seconds have passed since the oldest one
+- The queue is flushed when the process exits
+- When the queue is full, new entries are dropped and counted; analytics
+  never blocks or fails a translation request
+- Texts (original, final, prompts, dictionary) go to the deduplicated,
+  compressed text store (text_store.py); rows only keep their hashes
 """
 
-from flask import request
+import atexit
+import queue
+import threading
+import time
 from datetime import datetime
+from sqlalchemy import insert
 from app.models.db_models import Analytics
-from app.utils.tokens import parse_jwt_token
 from app.extensions import db
+from app.services.text_store import store_texts
 
+# Queue item that wakes the writer thread to flush right away
+_FLUSH = object()
+
+# Text fields stored in the text store; the row keeps <field>_hash
+TEXT_FIELDS = ("original_text", "user_final", "user_prompts", "user_dictionary")
+
+# Allowed values of the enum columns and limits of the other columns of Analytics
+SOURCE_TYPES = ("paste", "pdf", "docx", "latex", "pptx")
+TRANSLATION_MODES = ("manual", "auto", "deeplAPIAuto")
+CHOSEN_MODEL_LENGTH = 10
+MAX_INT = 2 ** 31 - 1
+# Longest accepted text, in characters
+MAX_TEXT_LENGTH = 1_000_000
+
+
+def _optional_int(data: dict, key: str):
+    """Returns data[key] as a non-negative int, or None if missing."""
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{key} must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer")
+    if not 0 <= value <= MAX_INT:
+        raise ValueError(f"{key} is out of range")
+    return value
+
+
+def _optional_choice(data: dict, key: str, choices: tuple):
+    """Returns data[key] if it is one of `choices`, or None if missing."""
+    value = data.get(key)
+    if value is not None and value not in choices:
+        raise ValueError(f"{key} must be one of: {', '.join(choices)}")
+    return value
+
+
+def _optional_text(value, key: str):
+    """Checks that a text value is a string of acceptable length (or None)."""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    if len(value) > MAX_TEXT_LENGTH:
+        raise ValueError(f"{key} is too long")
+    return value
 
-def save_analytics_entry(data: dict):
-    """
-    Saves an analytics entry for a user translation interaction.
 
-    Extracts the user ID from JWT token in Authorization header and logs
-    information such as:
-      - Source type (pdf, docx, paste)
-      - Translation model (gpt, deepl)
-      - Whether the result was edited
-      - Original and final translations
-      - Used prompts and dictionaries
+def _text_list(data: dict, key: str, separator: str):
+    """Joins a list of strings (missing means empty)."""
+    values = data.get(key) or []
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"{key} must be a list of strings")
+    return _optional_text(separator.join(values), key)
+
+
+def build_analytics_row(user_id: int, data: dict) -> dict:
+    """
+    Builds an analytics row for a user translation interaction.
 
     Parameters:
+        user_id (int): User the entry belongs to (from the verified JWT).
         data (dict): Dictionary containing analytics fields. Expected keys:
             - document_id (int)
             - chunk_id (int)
-            - source_type (str): 'paste', 'pdf', or 'docx'
+            - source_type (str): 'paste', 'pdf', 'docx', 'pptx' or 'latex'
             - translation_mode (str): 'auto', 'manual' or 'deeplAPIAuto'
             - chosen_model (str): 'gpt' or 'deepl'
             - original_text (str)
@@ -37,43 +102,198 @@ def save_analytics_entry(data: dict):
             - edited (bool)
             - time_spent_sec (int) (!! currently not calculating anything, gives just 0)
 
+    Returns:
+        dict: Column values of an Analytics row.
+
     Raises:
-        Exception: If saving to database fails (will be handled by caller)
+        ValueError: If a field has a wrong type or a value the column cannot hold,
+            so a bad entry is rejected before it is queued.
     """
+    if not isinstance(data, dict):
+        raise ValueError("Analytics entry must be a JSON object")
+    chosen_model = _optional_text(data.get('chosen_model'), 'chosen_model')
+    if chosen_model is not None and len(chosen_model) > CHOSEN_MODEL_LENGTH:
+        raise ValueError(f"chosen_model must be at most {CHOSEN_MODEL_LENGTH} characters")
+
+    now = datetime.now()
+    return {
+        "user_id": user_id,
+        "document_id": _optional_int(data, 'document_id'),
+        "chunk_id": _optional_int(data, 'chunk_id'),
+        "source_type": _optional_choice(data, 'source_type', SOURCE_TYPES),
+        "translation_mode": _optional_choice(data, 'translation_mode', TRANSLATION_MODES),
+        "chosen_model": chosen_model,
+        "original_text": _optional_text(data.get('original_text'), 'original_text'),
+        "user_final": _optional_text(data.get('user_final'), 'user_final'),
+        "edited": bool(data.get('edited')),
+        "user_prompts": _text_list(data, 'user_prompts', '\n\n'),
+        "user_dictionary": _text_list(data, 'user_dictionary', '\n'),
+        "time_spent_sec": _optional_int(data, 'time_spent_sec'),
+        # Set here, since the row is inserted later
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class AnalyticsService:
+    def __init__(self, app, batch_size: int = 100, flush_interval: float = 2.0, max_queue: int = 10000):
+        """
+        Initializes the buffered analytics writer. The writer thread starts with the first entry.
+
+        Args:
+            app (Flask): Application whose database the writer thread uses.
+            batch_size (int): Entries written per INSERT; a full batch is written immediately.
+            flush_interval (float): Maximum seconds an entry waits in the queue.
+            max_queue (int): Queued entries above which new entries are dropped.
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        atexit.register(self.close)
+
+
+    def record(self, user_id: int, data: dict) -> bool:
+        """
+        Queues an analytics entry for writing.
+
+        Parameters:
+            user_id (int): User the entry belongs to.
+            data (dict): Analytics fields, see build_analytics_row().
+
+        Returns:
+            bool: False if the queue was full and the entry was dropped.
+
+        Raises:
+            ValueError: If the entry is invalid (see build_analytics_row()).
+        """
+        row = build_analytics_row(user_id, data)
+        with self._lock:
+            self._start()
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    self.app.logger.warning(f"Analytics queue full, {self.dropped} entries dropped")
+                return False
+            self._pending += 1
+        return True
+
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Writes all queued entries now and waits until they are written.
+
+        Returns:
+            bool: True if the queue was emptied within `timeout` seconds.
+        """
+        with self._lock:
+            if not self._pending:
+                return True
+        # Not under the lock: the writer needs it to report written batches.
+        # A full queue needs no wake-up, the writer is draining it anyway.
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+
+    def close(self):
+        """Flushes queued entries on shutdown."""
+        if self._thread is not None and self._thread.is_alive():
+            self.flush()
+
+
+    def stats(self) -> dict:
+        """Counters of this process: queued, written, failed and dropped entries."""
+        return {
+            "queued": self._pending,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+    def _start(self):
+        # Started lazily, so each gunicorn worker gets its own thread after forking
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+            self._thread.start()
+
+
+    def _run(self):
+        """Writer loop: collects a batch, then writes it."""
+        while True:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _FLUSH:
+                    if batch:
+                        break
+                    continue
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch:
+                self._write(batch)
+
+
+    def _write(self, rows: list):
+        """
+        Stores the texts of a batch and inserts its rows, with one commit.
+        If the batch fails, its rows are retried one by one, so only the
+        failing rows are logged and discarded.
+        """
+        with self.app.app_context():
+            try:
+                self._insert(rows)
+                self.written += len(rows)
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.warning(f"Analytics batch of {len(rows)} failed, retrying row by row: {e}")
+                for row in rows:
+                    try:
+                        self._insert([row])
+                        self.written += 1
+                    except Exception as e:
+                        db.session.rollback()
+                        self.failed += 1
+                        self.app.logger.error(f"Failed to write analytics entry: {e}")
+            finally:
+                db.session.remove()
+
+        with self._lock:
+            self._pending -= len(rows)
+            if not self._pending:
+                self._idle.notify_all()
+
+
+    def _insert(self, rows: list):
+        """Stores the texts of rows and inserts them in one transaction."""
+        hashes = store_texts(db.session, (row[field] for row in rows for field in TEXT_FIELDS))
+        db.session.execute(insert(Analytics), [_with_text_hashes(row, hashes) for row in rows])
+        db.session.commit()
 
-    auth_header = request.headers.get("Authorization")
-    user_id = parse_jwt_token(auth_header)
-    document_id = data.get('document_id')
-    chunk_id = data.get('chunk_id')
-    source_type = data.get('source_type')  # 'paste' or 'pdf' or 'docx'
-    translation_mode = data.get('translation_mode')
-    chosen_model = data.get('chosen_model')  # 'gpt' or 'deepl'
-    original_text = data.get('original_text')
-    user_final = data.get('user_final')
-    user_prompts = '\n\n'.join(data.get('user_prompts') or [])
-    user_dictionary = '\n'.join(data.get('user_dictionary') or [])
-    edited = bool(data.get('edited'))
-    time_spent_sec = data.get('time_spent_sec')
-
-
-
-    new_entry = Analytics(
-        user_id=user_id,
-        document_id=document_id,
-        chunk_id=chunk_id,
-        source_type=source_type,
-        translation_mode=translation_mode,
-        chosen_model=chosen_model,
-        original_text=original_text,
-        user_final=user_final,
-        edited=edited,
-        user_prompts=user_prompts,
-        user_dictionary=user_dictionary,
-        time_spent_sec=time_spent_sec,
-    )
-
-    db.session.add(new_entry)
-    db.session.commit()
-
-    print("Saved analytics for user:", user_id)
 
+def _with_text_hashes(row: dict, hashes: dict) -> dict:
+    """Replaces the text fields of a row with references to the text store."""
+    row = dict(row)
+    for field in TEXT_FIELDS:
+        row[f"{field}_hash"] = hashes.get(row.pop(field))
+    return row
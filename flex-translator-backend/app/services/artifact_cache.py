@@ -0,0 +1,235 @@
+"""
+artifact_cache.py
+
+Disk-backed cache for generated files, e.g.:
+- Rendered translated DOCX downloads
+- PDF -> DOCX conversions, extracted segments and DeepL document outputs,
+  keyed by content hash and shared across users
+
+- Entries are plain files in one directory, so every gunicorn worker shares them
+- Writes are atomic (temp file + rename)
+- Least recently used entries are evicted when the directory exceeds its byte budget
+- Hits and misses are counted per process for a hit-rate stat
+- `flask cache-stats` shows the disk usage (for operators; it covers every
+  user's files, so it is not exposed over HTTP)
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+class ArtifactCache:
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initializes the cache in `directory` with a total size budget of `max_bytes`.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+
+    def _path(self, key: str) -> Path:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid cache key: {key}")
+        return self.directory / key
+
+
+    def get_path(self, key: str):
+        """
+        Returns the path of a cached entry and marks it as recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Path or None: Path to the cached file, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            # mtime doubles as the LRU timestamp
+            os.utime(path)
+        except FileNotFoundError:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with self._stats_lock:
+            self.hits += 1
+        return path
+
+
+    def get_bytes(self, key: str):
+        """
+        Returns the content of a cached entry.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bytes or None: Cached content, or None on a miss.
+        """
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another worker in between
+            return None
+
+
+    @contextmanager
+    def writer(self, key: str):
+        """
+        Context manager yielding a binary file to write a new entry into.
+
+        The entry becomes visible under `key` only when the block exits
+        without an exception; on failure the partial file is removed.
+
+        Args:
+            key (str): Cache key.
+
+        Yields:
+            file: Writable binary file object.
+        """
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict(keep=path)
+
+
+    def put(self, key: str, stream):
+        """
+        Stores the contents of a file-like object under `key`.
+
+        Args:
+            key (str): Cache key.
+            stream: Readable binary file-like object, read from its current position.
+
+        Returns:
+            Path: Path to the cached file.
+        """
+        with self.writer(key) as f:
+            shutil.copyfileobj(stream, f)
+        return self._path(key)
+
+
+    def put_bytes(self, key: str, data: bytes):
+        """
+        Stores `data` under `key`.
+
+        Args:
+            key (str): Cache key.
+            data (bytes): Content to store.
+
+        Returns:
+            Path: Path to the cached file.
+        """
+        return self.put(key, BytesIO(data))
+
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters of this process and the current disk usage.
+
+        Returns:
+            dict: hits, misses, hit_rate, entries and bytes.
+        """
+        entries = 0
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                total += entry.stat().st_size
+                entries += 1
+            except FileNotFoundError:
+                pass
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+    def invalidate(self, prefix: str):
+        """
+        Removes every entry whose key starts with `prefix`.
+
+        Args:
+            prefix (str): Key prefix, e.g. "render-12-".
+        """
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+    def _evict(self, keep=None):
+        """
+        Deletes least recently used entries until the cache fits its byte budget.
+
+        The entry at path `keep` (the one just written) is never evicted.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for (_, size, path) in sorted(entries):
+            if path == str(keep):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def init_app(app):
+    """Creates the artifact cache and registers `flask cache-stats`."""
+    app.artifact_cache = ArtifactCache(app.config['ARTIFACT_CACHE_DIR'], app.config['ARTIFACT_CACHE_MAX_BYTES'])
+
+    @app.cli.command("cache-stats")
+    def cache_stats_command():
+        """Show the disk usage of the artifact cache (shared by all users and workers)."""
+        stats = app.artifact_cache.stats()
+        print(f"{stats['entries']} entries, {stats['bytes']} of {app.artifact_cache.max_bytes} bytes "
+              f"in {app.artifact_cache.directory}")
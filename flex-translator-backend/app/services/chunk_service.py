@@ -3,9 +3,14 @@ chunk_service.py
 
 Service for handling chunk operations:
 - Splitting documents into manageable chunks
-- Saving and retrieving chunk data
+- Saving chunks with one bulk insert and retrieving chunk data
+- Saving chunk translations together with the document's progress counters,
+  the chunk's revision history and the translation memory index
 """
 
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select
 from app.extensions import db
 from app.models.db_models import Chunk
 
@@ -42,28 +47,24 @@ class ChunkService:
         ]
     
 
-    def split_and_store_chunks(self, document_id: int, full_text: str, max_words: int = 300):
+    def split_text(self, full_text: str, max_words: int = 300):
         """
-        Splits the full document text into chunks and saves them to the database.
+        Splits the full document text into chunks of whole lines.
+
+        Code blocks (```) are never split.
 
         Parameters:
-            document_id (int): ID of the document to associate the chunks with
             full_text (str): The raw content of the document
             max_words (int): Maximum word count per chunk (default: 300)
 
         Returns:
             List of chunk strings
         """
-        # Remove existing chunks before inserting new ones
-        Chunk.query.filter_by(document_id=document_id).delete()
-        db.session.commit()
-
         lines = full_text.split("\n")
         chunks = []
         current_chunk = []
         word_count = 0
         in_code_block = False
-        chunk_index = 0
 
         for line in lines:
             line_word_count = len(line.split())
@@ -71,43 +72,99 @@ class ChunkService:
             if line.strip().startswith("```"):
                 in_code_block = not in_code_block
 
-            # If outside code block and limit exceeded, save current chunk
+            # If outside code block and limit exceeded, close the current chunk
             if not in_code_block and (word_count + line_word_count) > max_words:
-                chunk_str = "\n".join(current_chunk)
-                # print(chunk_str)
-                self._save_chunk(document_id, chunk_index, chunk_str)
-                chunks.append(chunk_str)
-                chunk_index += 1
-
+                chunks.append("\n".join(current_chunk))
                 current_chunk = [line]
                 word_count = line_word_count
             else:
-                # print(line) 
                 current_chunk.append(line)
                 word_count += line_word_count
-        
-        # Save final chunk
+
+        # Final chunk
         if current_chunk:
-            chunk_str = "\n".join(current_chunk)
-            self._save_chunk(document_id, chunk_index, chunk_str)
-            chunks.append(chunk_str)
+            chunks.append("\n".join(current_chunk))
+
+        return chunks
+
+
+    def split_and_store_chunks(self, document_id: int, full_text: str, max_words: int = 300, commit: bool = True):
+        """
+        Splits the full document text into chunks and saves them to the database.
+
+        Parameters:
+            document_id (int): ID of the document to associate the chunks with
+            full_text (str): The raw content of the document
+            max_words (int): Maximum word count per chunk (default: 300)
+            commit (bool): Commit the transaction (pass False to commit together
+                with other changes, e.g. a new document row)
 
+        Returns:
+            List of chunk strings
+        """
+        chunks = self.split_text(full_text, max_words)
+        self.store_chunks(document_id, chunks, commit=commit)
         return chunks
 
 
-    def _save_chunk(self, doc_id: int, idx: int, content: str):
+    def store_chunks(self, document_id: int, chunks: list, commit: bool = True):
+        """
+        Replaces the chunks of a document with one bulk insert.
+
+        The old chunks are deleted and all new rows are written in a single
+        executemany statement in the same transaction, which also resets the
+        document's progress counters.
+
+        Parameters:
+            document_id (int): Document ID
+            chunks (list[str]): Chunk contents in order
+            commit (bool): Commit the transaction when done
+
+        Returns:
+            List of the new chunk IDs in chunk order
+        """
+        Chunk.query.filter_by(document_id=document_id).delete()
+
+        if chunks:
+            now = datetime.now()
+            db.session.execute(insert(Chunk), [
+                {
+                    "document_id": document_id,
+                    "chunk_number": idx,
+                    "chunk_content": content,
+                    "created_at": now,
+                } for (idx, content) in enumerate(chunks)
+            ])
+
+        # MySQL has no INSERT ... RETURNING, so read the IDs back in one query
+        chunk_ids = db.session.scalars(
+            select(Chunk.id).where(Chunk.document_id == document_id).order_by(Chunk.chunk_number)
+        ).all()
+
+        current_app.progress_service.set_progress(document_id, 0, len(chunks))
+
+        if commit:
+            db.session.commit()
+        return chunk_ids
+
+
+    def set_chunk_translation(self, chunk: Chunk, translation: str, commit: bool = True):
         """
-        Internal helper to save a chunk to the database.
+        Sets the final translation of a chunk and updates the document's
+        translated chunk counter and the chunk's revision history in the same
+        transaction. The pair is also added to the translation memory index
+        (if loaded in this process) once the transaction commits.
 
         Parameters:
-            doc_id (int): Document ID
-            idx (int): Chunk index number
-            content (str): Chunk content
+            chunk (Chunk): The chunk to update
+            translation (str): New final translation (empty or None clears it)
+            commit (bool): Commit the transaction when done
         """
-        chunk = Chunk(
-            document_id=doc_id,
-            chunk_number=idx,
-            chunk_content=content
-        )
-        db.session.add(chunk)
-        db.session.commit()
+        delta = int(bool(translation)) - int(bool(chunk.final_chunk_translation))
+        current_app.revision_service.record(chunk, chunk.final_chunk_translation, translation)
+        chunk.final_chunk_translation = translation
+        current_app.progress_service.add_translated(chunk.document_id, delta)
+        current_app.translation_memory_service.record(chunk, translation)
+
+        if commit:
+            db.session.commit()
@@ -0,0 +1,301 @@
+"""
+deepl_job_service.py
+
+Runs DeepL document translations as background jobs:
+- Upload returns a job ID immediately
+- A background thread polls DeepL with exponential backoff
+- The translated file is downloaded to disk when ready
+- A job whose polling or download fails `max_failures` times in a row is
+  marked as failed
+
+Job state is stored as JSON files in a shared directory, so any gunicorn worker
+can answer status and download requests. If the worker polling a job dies,
+the next worker asked about it takes the job over.
+
+Translated files are also stored in the artifact cache by (file hash, languages),
+so re-uploads of the same file finish immediately without calling DeepL.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+import deepl
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+ACTIVE_STATUSES = ("queued", "translating")
+
+
+class DeeplJobService:
+    def __init__(
+        self,
+        translator: deepl.Translator,
+        job_dir: str,
+        cache,
+        logger,
+        min_poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        job_ttl: int = 24 * 3600,
+        max_failures: int = 5
+    ):
+        """
+        Initializes the job service.
+
+        Args:
+            translator (deepl.Translator): DeepL client used for upload, polling and download.
+            job_dir (str): Directory for job state and translated files.
+            cache (ArtifactCache): Cache for translated files, shared across users.
+            logger: Logger for background errors (no app context in the poller thread).
+            min_poll_interval (float): First polling delay in seconds.
+            max_poll_interval (float): Upper bound for the polling delay in seconds.
+            job_ttl (int): Seconds after which finished job files are removed.
+            max_failures (int): Consecutive polling errors after which a job fails.
+        """
+        self.translator = translator
+        self.job_dir = Path(job_dir)
+        self.cache = cache
+        self.logger = logger
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.job_ttl = job_ttl
+        self.max_failures = max_failures
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+
+        # Heap of (due time, job id, attempt) for the jobs this process polls
+        self._queue = []
+        self._scheduled = set()
+        self._condition = threading.Condition()
+        self._thread = None
+
+
+    def create_job(self, user_id: int, title: str, file_bytes: bytes, filename: str,
+                   source_lang: str = "FI", target_lang: str = "EN-US") -> dict:
+        """
+        Uploads a document to DeepL and starts polling it in the background.
+
+        Args:
+            user_id (int): Owner of the job.
+            title (str): Title used for the downloaded file name.
+            file_bytes (bytes): Original file content.
+            filename (str): File name with extension (DeepL uses it to detect the type).
+            source_lang (str): Source language code.
+            target_lang (str): Target language code.
+
+        Returns:
+            dict: The stored job.
+        """
+        self._remove_expired_jobs()
+
+        file_hash = hashlib.sha256(file_bytes).hexdigest()
+        cache_key = f"deepl-{file_hash}-{source_lang}-{target_lang}"
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "user_id": int(user_id),
+            "title": title,
+            "cache_key": cache_key,
+            "document_id": None,
+            "document_key": None,
+            "status": "queued",
+            "seconds_remaining": None,
+            "error": None,
+            "failures": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        cached_path = self.cache.get_path(cache_key)
+        if cached_path is not None:
+            try:
+                shutil.copyfile(cached_path, self.result_path(job["job_id"]))
+                job["status"] = "done"
+                job["seconds_remaining"] = 0
+                self._save(job)
+                return job
+            except FileNotFoundError:
+                # Evicted by another worker in between
+                pass
+
+        handle = self.translator.translate_document_upload(
+            file_bytes,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            filename=filename,
+            output_format="docx"
+        )
+        job["document_id"] = handle.document_id
+        job["document_key"] = handle.document_key
+        self._save(job)
+        self._schedule(job["job_id"], self.min_poll_interval, 0)
+        return job
+
+
+    def get_job(self, job_id: str):
+        """
+        Returns a job by ID, taking over its polling if its owner stopped updating it.
+
+        Args:
+            job_id (str): Job ID.
+
+        Returns:
+            dict or None: The stored job, or None if it does not exist.
+        """
+        job = self._load(job_id)
+        if job and job["status"] in ACTIVE_STATUSES:
+            stale_after = 3 * self.max_poll_interval
+            if time.time() - job["updated_at"] > stale_after:
+                self._schedule(job_id, 0, 0)
+        return job
+
+
+    def result_path(self, job_id: str) -> Path:
+        """Returns the path of the translated file of a job."""
+        return self.job_dir / f"{job_id}.docx"
+
+
+    def _job_path(self, job_id: str) -> Path:
+        if not _JOB_ID_PATTERN.match(job_id):
+            raise ValueError("Invalid job ID")
+        return self.job_dir / f"{job_id}.json"
+
+
+    def _load(self, job_id: str):
+        try:
+            with open(self._job_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+    def _save(self, job: dict):
+        job["updated_at"] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._job_path(job["job_id"]))
+
+
+    def _schedule(self, job_id: str, delay: float, attempt: int):
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="deepl-job-poller", daemon=True)
+                self._thread.start()
+            if attempt == 0 and job_id in self._scheduled:
+                return
+            self._scheduled.add(job_id)
+            heapq.heappush(self._queue, (time.time() + delay, job_id, attempt))
+            self._condition.notify()
+
+
+    def _run(self):
+        """Poller loop: waits for the next due job and polls it."""
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.time():
+                    timeout = self._queue[0][0] - time.time() if self._queue else None
+                    self._condition.wait(timeout)
+                (_, job_id, attempt) = heapq.heappop(self._queue)
+
+            try:
+                delay = self._poll(job_id)
+            except Exception as e:
+                self.logger.error(f"DeepL job {job_id} polling failed: {e}")
+                delay = self._record_failure(job_id, e)
+
+            with self._condition:
+                if delay is None:
+                    self._scheduled.discard(job_id)
+                else:
+                    # Exponential backoff, but never later than DeepL's own estimate
+                    backoff = min(self.max_poll_interval, self.min_poll_interval * 2 ** attempt)
+                    delay = min(backoff, delay) if delay else backoff
+                    heapq.heappush(self._queue, (time.time() + delay, job_id, attempt + 1))
+
+
+    def _record_failure(self, job_id: str, error: Exception):
+        """
+        Counts a failed poll in the job's state; after max_failures in a row the job is marked as failed.
+
+        Returns:
+            float or None: Delay before the next attempt, or None if the job was given up.
+        """
+        try:
+            job = self._load(job_id)
+            if not job or job["status"] not in ACTIVE_STATUSES:
+                return None
+            job["failures"] = job.get("failures", 0) + 1
+            if job["failures"] >= self.max_failures:
+                job["status"] = "error"
+                job["error"] = f"DeepL could not be reached: {error}"
+                self._save(job)
+                return None
+            self._save(job)
+        except Exception as e:
+            self.logger.error(f"DeepL job {job_id} state could not be updated: {e}")
+        return self.max_poll_interval
+
+
+    def _poll(self, job_id: str):
+        """
+        Checks a job's status once and downloads the result when it is done.
+
+        Returns:
+            float or None: DeepL's remaining-time estimate (0 if unknown) while the
+            job is active, or None when the job has finished.
+        """
+        job = self._load(job_id)
+        if not job or job["status"] not in ACTIVE_STATUSES:
+            return None
+
+        handle = deepl.DocumentHandle(job["document_id"], job["document_key"])
+        status = self.translator.translate_document_get_status(handle)
+
+        if status.done:
+            fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    self.translator.translate_document_download(handle, f, chunk_size=64 * 1024)
+                os.replace(tmp_path, self.result_path(job_id))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            job["status"] = "done"
+            job["seconds_remaining"] = 0
+            job["failures"] = 0
+            self._save(job)
+
+            with open(self.result_path(job_id), "rb") as f:
+                self.cache.put(job["cache_key"], f)
+            return None
+
+        if not status.ok:
+            job["status"] = "error"
+            job["error"] = status.error_message or "Translation failed"
+            self._save(job)
+            return None
+
+        job["status"] = status.status.value
+        job["seconds_remaining"] = status.seconds_remaining
+        job["failures"] = 0
+        self._save(job)
+        return status.seconds_remaining or 0
+
+
+    def _remove_expired_jobs(self):
+        """Deletes job files (state and result) older than the job TTL."""
+        cutoff = time.time() - self.job_ttl
+        for entry in os.scandir(self.job_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -2,28 +2,85 @@
 documents_service.py
 
 Service responsible for:
-- Creating documents (PDF or pasted text)
+- Creating documents (PDF, DOCX, PPTX, LaTeX source or pasted text)
 - Splitting and storing text into chunks
-- Finalizing documents by joining translated chunks
-- Deleting documents (individually or in batch)
+- Listing a user's documents (column-projected, keyset-paginated)
+- Finalizing documents by joining translated chunks, streamed from one
+  ordered query (restoring protected markup for LaTeX sources)
+- Deleting documents (individually or in batch) with one ownership-filtered
+  DELETE; the database cascades to chunks, events and group memberships
+- Cache keys for rendered translated DOCX files
+- Content-hash cached PDF -> DOCX conversion and segment extraction
+  (shared across users, since they depend only on the file bytes)
 """
 
+import base64
+import hashlib
+import json
+from io import StringIO
+from sqlalchemy import and_, delete, func, or_, select, update
 from app.extensions import db
-from app.models.db_models import Document
+from app.models.db_models import Chunk, Document
 from flask import current_app
 from datetime import datetime
-from .pdf_service import extract_text_from_pdf, pdf2docx_encode_b64
+from .pdf_service import iter_segment_positions, map_translation_to_segments, pdf2docx_encode_b64
+from app.utils.latex_tokenizer import missing_placeholders, protect_latex, restore_latex
+from app.services.text_store import text_hash
+
+# Sort keys of the document list: column and whether its values are datetimes
+LIST_SORT_COLUMNS = {
+  "date": (Document.created_at, True),
+  "modified": (Document.modified_at, True),
+  "name": (Document.title, False),
+}
+
+# Largest page size of the document list
+MAX_LIST_LIMIT = 500
+
+# Chunk translations fetched per round trip while finalizing
+FINALIZE_BATCH_SIZE = 200
+
+
+class MissingChunksError(ValueError):
+  """Raised when a document is finalized before all of its chunks are translated."""
+  def __init__(self, chunk_numbers: list):
+    super().__init__("Some chunks are not translated")
+    self.chunk_numbers = chunk_numbers
+
+
+def _encode_cursor(value, doc_id: int) -> str:
+  """Encodes the sort value and ID of the last listed document as an opaque cursor."""
+  if isinstance(value, datetime):
+    value = value.isoformat()
+  raw = json.dumps([value, doc_id]).encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, is_datetime: bool):
+  """Decodes a cursor made by _encode_cursor. Raises ValueError if it is malformed."""
+  try:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    (value, doc_id) = json.loads(raw)
+    if is_datetime:
+      value = datetime.fromisoformat(value)
+    return value, int(doc_id)
+  except (ValueError, TypeError) as e:
+    raise ValueError("Invalid cursor") from e
 
 
 class DocumentsService:
-  def create_document(self, user_id: int, title: str, content: str):
+  def create_document(self, user_id: int, title: str, content: str, source_type: str = None):
     """
         Creates a new document and splits its content into chunks.
 
+        The document row and all of its chunks are written in one transaction.
+
         Parameters:
             user_id (int): ID of the user creating the document
             title (str): Title of the document
-            content (str): Either base64-encoded PDF ('b64...') or pasted text
+            content (str): Either base64-encoded PDF, DOCX or PPTX ('b64...'), LaTeX source or pasted text
+            source_type (str): 'docx', 'pptx' or 'latex' for those sources,
+                otherwise detected from the content (PDF or pasted text)
 
         Returns:
             Document object
@@ -31,8 +88,11 @@ class DocumentsService:
     if not (user_id and title and content):
       raise ValueError("Missing required fields")
     
-    if content[0:3] == "b64":
-      content = pdf2docx_encode_b64(content)
+    if source_type in ('docx', 'pptx', 'latex'):
+      # Office files are read natively, without a PDF round trip
+      pass
+    elif content[0:3] == "b64":
+      content = self.convert_pdf_to_docx(content)
       source_type = 'pdf'
     else:
       source_type = 'paste'
@@ -41,109 +101,436 @@ class DocumentsService:
       user_id=user_id,
       title=title,
       original_text=content,
+      original_hash=text_hash(content),
       source_type=source_type
     )
     db.session.add(doc)
 
     try:
+      # Flush to get the document ID, then write the chunks in the same transaction
+      db.session.flush()
+
+      # Extract clean text for chunking
+      org_text = self.extract_original_text(doc)
+
+      # Split and store chunks
+      current_app.chunk_service.split_and_store_chunks(doc.id, org_text, commit=False)
       db.session.commit()
     except Exception as e:
       db.session.rollback()
       current_app.logger.error("Error adding document")
       raise 
 
-    # Extract clean text for chunking
-    org_text=doc.original_text
-    if content[0:3] == "b64":
-      org_text = extract_text_from_pdf(doc.original_text)
-
-    # Split and store chunks
-    current_app.chunk_service.split_and_store_chunks(doc.id, org_text)
-
     return doc
   
 
-  def finalize_document_by_id(self, doc_id: int):
+  def finalize_document_by_id(self, doc_id: int, commit: bool = True) -> str:
     """
         Joins all translated chunks into a final translation.
 
+        Missing translations are found with a query that reads only chunk numbers,
+        and the translations are then streamed in chunk order from one projected
+        query, so chunk contents and rows are never held in memory at once.
+
         Parameters:
             doc_id (int): ID of the document
+            commit (bool): Commit and invalidate the rendered file (False when the
+                caller commits, e.g. together with other changes)
 
         Returns:
-            Updated Document with final_translation populated
+            str: The final translation
+
+        Raises:
+            MissingChunksError: If some chunks are not translated (lists their numbers)
+            ValueError: If the document or its chunks do not exist
     """
     if not doc_id:
       raise ValueError("Missing required fields")
 
-    doc = Document.query.get(doc_id)
+    doc = db.session.execute(
+      select(Document.id, Document.source_type).where(Document.id == doc_id)
+    ).first()
     if not doc:
       raise ValueError("Document not found")
-    
-    chunks = current_app.chunk_service.get_chunks_by_document_id(doc_id)
-    if not chunks:
+
+    missing = self.missing_chunk_numbers(doc_id)
+    if missing:
+      raise MissingChunksError(missing)
+    if not db.session.execute(select(func.count(Chunk.id)).where(Chunk.document_id == doc_id)).scalar():
       raise ValueError("No chunks found for this document")
 
-    final_translation_chunks = []
-    for chunk in chunks:
-      if chunk["final_chunk_translation"]:
-        final_translation_chunks.append(chunk["final_chunk_translation"])
-      else:
-        raise ValueError("Some chunks are not translated")
-      
-    doc.final_translation = "\n\n".join(final_translation_chunks)
-    #print(doc.final_translation)
-    doc.modified_at = datetime.now()
-    db.session.commit()
+    placeholders = None
+    if doc.source_type == 'latex':
+      original_text = db.session.execute(
+        select(Document.original_text).where(Document.id == doc_id)
+      ).scalar_one()
+      (_, placeholders) = protect_latex(original_text)
+    final_translation = self.assemble_final_translation(doc_id, self.iter_chunk_translations(doc_id), placeholders)
 
-    return doc
+    db.session.execute(
+      update(Document)
+      .where(Document.id == doc_id)
+      .values(final_translation=final_translation, modified_at=datetime.now())
+    )
+    if commit:
+      db.session.commit()
+      self.invalidate_rendered_docx(doc_id)
+
+    return final_translation
+
+
+  def missing_chunk_numbers(self, doc_id: int) -> list:
+    """
+        Returns the numbers of a document's chunks that have no translation yet,
+        without reading chunk contents.
+
+        Parameters:
+            doc_id (int): ID of the document
+
+        Returns:
+            list[int]: Chunk numbers in order (empty when all are translated)
+    """
+    return db.session.execute(
+      select(Chunk.chunk_number)
+      .where(
+        Chunk.document_id == doc_id,
+        or_(Chunk.final_chunk_translation.is_(None), Chunk.final_chunk_translation == "")
+      )
+      .order_by(Chunk.chunk_number)
+    ).scalars().all()
+
+
+  def iter_chunk_translations(self, doc_id: int):
+    """
+        Yields the chunk translations of a document in chunk order, fetched in
+        batches of FINALIZE_BATCH_SIZE from one ordered query.
+
+        Parameters:
+            doc_id (int): ID of the document
+    """
+    yield from db.session.execute(
+      select(Chunk.final_chunk_translation)
+      .where(Chunk.document_id == doc_id)
+      .order_by(Chunk.chunk_number)
+      .execution_options(yield_per=FINALIZE_BATCH_SIZE)
+    ).scalars()
   
 
-  def delete_document_by_id(self, doc_id: int):
+  def latex_placeholder_problems(self, doc_id: int) -> list:
+    """
+        Finds the chunks of a LaTeX document whose translation lost placeholders,
+        i.e. markup that cannot be restored in the final .tex.
+
+        Parameters:
+            doc_id (int): ID of the document
+
+        Returns:
+            list[dict]: [{"chunk_number", "missing": [placeholder numbers]}], empty for other documents
+    """
+    source_type = db.session.execute(
+      select(Document.source_type).where(Document.id == doc_id)
+    ).scalar_one_or_none()
+    if source_type != 'latex':
+      return []
+
+    problems = []
+    for row in db.session.execute(
+      select(Chunk.chunk_number, Chunk.chunk_content, Chunk.final_chunk_translation)
+      .where(Chunk.document_id == doc_id)
+      .order_by(Chunk.chunk_number)
+      .execution_options(yield_per=FINALIZE_BATCH_SIZE)
+    ):
+      missing = missing_placeholders(row.chunk_content, row.final_chunk_translation)
+      if missing:
+        problems.append({"chunk_number": row.chunk_number, "missing": missing})
+    return problems
+
+
+  def list_documents(self, user_id: int, sort: str = "date", order: str = "desc",
+                     limit: int = None, cursor: str = None):
+    """
+        Lists a user's documents without loading their text columns.
+
+        Only id, title and dates are selected, so the cost does not depend on
+        document size. Pages are keyset-paginated on (sort column, id), which
+        the (user_id, ...) indexes of the document table serve directly.
+
+        Parameters:
+            user_id (int): Owner of the documents
+            sort (str): 'date' (creation date), 'modified' or 'name'
+            order (str): 'asc' or 'desc'
+            limit (int): Page size (at most MAX_LIST_LIMIT), or None for all documents
+            cursor (str): Cursor returned with the previous page, or None for the first page
+
+        Returns:
+            (list of dicts, next cursor or None)
+    """
+    if sort not in LIST_SORT_COLUMNS:
+      raise ValueError(f"Invalid sort: {sort}")
+    if order not in ("asc", "desc"):
+      raise ValueError(f"Invalid order: {order}")
+    if limit is not None and not 1 <= limit <= MAX_LIST_LIMIT:
+      raise ValueError(f"limit must be between 1 and {MAX_LIST_LIMIT}")
+
+    (column, is_datetime) = LIST_SORT_COLUMNS[sort]
+    descending = order == "desc"
+
+    query = select(Document.id, Document.title, Document.created_at, Document.modified_at).where(
+      Document.user_id == user_id
+    )
+    if cursor:
+      (last_value, last_id) = _decode_cursor(cursor, is_datetime)
+      if descending:
+        query = query.where(or_(column < last_value, and_(column == last_value, Document.id < last_id)))
+      else:
+        query = query.where(or_(column > last_value, and_(column == last_value, Document.id > last_id)))
+
+    if descending:
+      query = query.order_by(column.desc(), Document.id.desc())
+    else:
+      query = query.order_by(column.asc(), Document.id.asc())
+    if limit is not None:
+      query = query.limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+      rows = rows[:limit]
+      last = rows[-1]
+      next_cursor = _encode_cursor(getattr(last, column.key), last.id)
+
+    documents = [
+      {
+        "id": row.id,
+        "title": row.title,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "modified_at": row.modified_at.isoformat() if row.modified_at else None
+      } for row in rows
+    ]
+    return documents, next_cursor
+
+
+  def delete_document_by_id(self, doc_id: int, user_id: int):
     """
         Deletes a document by its ID.
 
         Parameters:
             doc_id (int): ID of the document
+            user_id (int): Owner of the document
 
         Returns:
             True on success
     """
-    doc = Document.query.get(doc_id)
-    if not doc:
+    try:
+      self.delete_documents_by_ids([doc_id], user_id)
+    except ValueError:
       raise ValueError("Document not found")
-
-    db.session.delete(doc)
-    db.session.commit()
     return True
   
 
-  def delete_documents_by_ids(self, doc_ids: list[int]) -> dict:
+  def delete_documents_by_ids(self, doc_ids: list[int], user_id: int) -> dict:
     """
-    Deletes multiple documents in a batch.
+    Deletes multiple documents of a user in a batch.
+
+    Documents are never loaded: their IDs are selected (and locked) with one
+    query and removed with one DELETE filtered by owner. Chunks, events and
+    group memberships are removed by the ON DELETE CASCADE foreign keys.
 
     Parameters:
         doc_ids (list[int]): List of document IDs
+        user_id (int): Owner; documents of other users are not deleted
 
     Returns:
         dict with success flag and deleted IDs
     """
     if not doc_ids:
         raise ValueError("No document IDs provided.")
+    owned = (Document.id.in_({int(doc_id) for doc_id in doc_ids}), Document.user_id == user_id)
 
     try:
-        docs_to_delete = Document.query.filter(Document.id.in_(doc_ids)).all()
-        if not docs_to_delete:
+        deleted_ids = db.session.execute(
+            select(Document.id).where(*owned).order_by(Document.id).with_for_update()
+        ).scalars().all()
+        if not deleted_ids:
+            db.session.rollback()
             raise ValueError("No matching documents found.")
 
-        for doc in docs_to_delete:
-            db.session.delete(doc)
-
+        db.session.execute(
+            delete(Document).where(*owned).execution_options(synchronize_session=False)
+        )
         db.session.commit()
-        return {"success": True, "deleted_ids": doc_ids}
-    
+
+    except ValueError:
+        raise
     except Exception as e:
         db.session.rollback()
         raise RuntimeError(f"Error deleting documents: {str(e)}")
 
+    for doc_id in deleted_ids:
+        self.invalidate_rendered_docx(doc_id)
+    current_app.ownership_service.invalidate_documents(deleted_ids)
+    current_app.translation_memory_service.invalidate_user(user_id)
+    return {"success": True, "deleted_ids": deleted_ids}
+
+
+  def rendered_docx_key(self, doc: Document) -> str:
+    """
+        Builds the cache key (and ETag) of a document's rendered translated DOCX.
+
+        The key changes whenever the original file or the final translation changes.
+        The original is not hashed again: its digest is stored with the document.
+
+        Parameters:
+            doc (Document): Document with a base64 original and a final translation
+
+        Returns:
+            str: Cache key of the form "render-<doc_id>-<digest>"
+    """
+    original_hash = doc.original_hash or text_hash(doc.original_text)
+    final_hash = text_hash(doc.final_translation)
+    digest = hashlib.sha256((original_hash + final_hash).encode("ascii")).hexdigest()
+    return f"render-{doc.id}-{digest}"
+
+
+  def invalidate_rendered_docx(self, doc_id: int):
+    """
+        Drops every cached rendered DOCX of a document.
+
+        Parameters:
+            doc_id (int): ID of the document
+    """
+    current_app.artifact_cache.invalidate(f"render-{doc_id}-")
+
+
+  def convert_pdf_to_docx(self, content: str) -> str:
+    """
+        Converts a base64-encoded PDF to a base64-encoded DOCX, reusing earlier conversions.
+
+        Parameters:
+            content (str): Base64-encoded PDF with "b64" prefix
+
+        Returns:
+            str: Base64-encoded DOCX with "b64" prefix
+    """
+    key = f"pdf2docx-{hashlib.sha256(content.encode('ascii')).hexdigest()}"
+    cached = current_app.artifact_cache.get_bytes(key)
+    if cached is not None:
+      return cached.decode("ascii")
+
+    docx = pdf2docx_encode_b64(content)
+    current_app.artifact_cache.put_bytes(key, docx.encode("ascii"))
+    return docx
+
+
+  def get_segment_positions(self, original_text: str, original_hash: str = None) -> list:
+    """
+        Returns the translatable segments of a base64-encoded DOCX or PPTX with their positions.
+
+        Results are cached by the hash of the file.
+
+        Parameters:
+            original_text (str): Base64-encoded DOCX or PPTX with "b64" prefix
+            original_hash (str): Stored SHA-256 of original_text (Document.original_hash), if known
+
+        Returns:
+            list of ((part name, element index), segment text)
+    """
+    key = f"segments-{original_hash or text_hash(original_text)}"
+    cached = current_app.artifact_cache.get_bytes(key)
+    if cached is not None:
+      return [((part, index), text) for (part, index, text) in json.loads(cached)]
+
+    segments = list(iter_segment_positions(original_text))
+    data = [[part, index, text] for ((part, index), text) in segments]
+    current_app.artifact_cache.put_bytes(key, json.dumps(data).encode("utf-8"))
+    return segments
+
+
+  def map_segment_translations(self, doc: Document, segments: list) -> tuple:
+    """
+        Pairs the segments of a DOCX or PPTX document with its final translation, chunk by chunk.
+
+        A chunk covers one segment per line of its content. The chunks' own translations
+        are used while they still make up the final translation; if it was edited after
+        finalizing, it is split back into chunks at the blank lines between them. If
+        neither matches, the whole translation is paired as one chunk.
+
+        Parameters:
+            doc (Document): Document with a base64 original and a final translation
+            segments (list): Segments of the original, see get_segment_positions
+
+        Returns:
+            tuple: (dict of (part name, element index) -> translated text,
+            list of chunk numbers whose lines did not match their segments)
+    """
+    rows = db.session.execute(
+      select(Chunk.chunk_content, Chunk.final_chunk_translation)
+      .where(Chunk.document_id == doc.id)
+      .order_by(Chunk.chunk_number)
+    ).all()
+    counts = [row.chunk_content.count("\n") + 1 for row in rows]
+    translations = None
+    if rows and sum(counts) == len(segments):
+      translations = [row.final_chunk_translation or "" for row in rows]
+      if "\n\n".join(translations) != doc.final_translation:
+        blocks = doc.final_translation.split("\n\n")
+        translations = blocks if len(blocks) == len(rows) else None
+
+    if translations is None:
+      return map_translation_to_segments(segments, [(len(segments), doc.final_translation)])
+    return map_translation_to_segments(segments, zip(counts, translations))
+
+
+  def extract_original_text(self, doc: Document) -> str:
+    """
+        Returns the text shown to the user and chunked for translation.
+
+        Parameters:
+            doc (Document): Document with a base64 DOCX or PPTX, a LaTeX source or pasted text
+
+        Returns:
+            str: One "<word>"-tagged segment per line, the LaTeX source with markup
+            replaced by placeholders, or the pasted text as-is
+    """
+    if doc.source_type == 'latex':
+      return protect_latex(doc.original_text)[0]
+    if doc.original_text[0:3] != "b64":
+      return doc.original_text
+    return "\n".join("<word>" + text + "<word>" for (_, text) in self.get_segment_positions(doc.original_text))
+
+
+  def assemble_final_translation(self, doc_id: int, chunk_translations, placeholders: list = None) -> str:
+    """
+        Joins translated chunks into the final translation of a document.
+
+        The translations are written to the result one at a time, so they can be
+        streamed from the database (see iter_chunk_translations).
+
+        LaTeX chunks were split on line breaks of the placeholder text, so they are
+        joined line by line and the protected markup is put back.
+
+        Parameters:
+            doc_id (int): ID of the document (for log messages)
+            chunk_translations (Iterable[str]): Chunk translations in chunk order
+            placeholders (list): For LaTeX documents, the protected markup of the
+                original from protect_latex(); None for other documents
+
+        Returns:
+            str: The final translation
+    """
+    separator = "\n" if placeholders is not None else "\n\n"
+    joined = StringIO()
+    for (i, translation) in enumerate(chunk_translations):
+      if i:
+        joined.write(separator)
+      joined.write(translation)
+
+    if placeholders is None:
+      return joined.getvalue()
 
+    (final_translation, missing) = restore_latex(joined.getvalue(), placeholders)
+    if missing:
+      current_app.logger.warning(
+        f"Document {doc_id}: {len(missing)} LaTeX placeholders missing from the translation"
+      )
+    return final_translation
@@ -0,0 +1,278 @@
+"""
+event_service.py
+
+Progress events of documents, pushed to the browser as Server-Sent Events:
+- chunk_completed, progress, error and done events are stored in the
+  document_event table, in the same transaction as the change they describe
+- Any gunicorn worker can stream them, since the table is shared
+- Event IDs are the row IDs, so a client resumes with Last-Event-ID
+- Streams do not poll: a commit that published events wakes the streams of
+  its documents in the same process, which then read the new rows. Events
+  committed by another worker are picked up by a slow fallback check every
+  `poll_interval` seconds
+- Each stream holds a worker thread, so at most `max_streams` are open per
+  process; further subscribers get 503 and retry
+- Events are kept for `retention_hours`; prune() deletes older ones. It runs
+  with the analytics rollup job (every worker's rollup thread and
+  `flask analytics-rollup`)
+- Events of a translation run carry its run ID; a client that subscribes
+  before starting a run passes the ID, so events of earlier runs (e.g. the
+  error of a failed attempt) are never replayed to it
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.db_models import DocumentEvent
+
+# Events after which a stream is closed
+FINAL_EVENTS = ("done", "error")
+
+# Session.info key of the documents that have events in the current transaction
+_PUBLISHED_KEY = "published_event_documents"
+
+# Events deleted per statement while pruning
+_PRUNE_BATCH = 1000
+
+
+def format_event(event_type: str, data: str, event_id: int = None) -> str:
+    """
+    Formats one Server-Sent Event.
+
+    Args:
+        event_type (str): Event name.
+        data (str): JSON data (one line).
+        event_id (int): Event ID for resuming, or None for events that are not stored.
+
+    Returns:
+        str: The event in text/event-stream format.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventService:
+    def __init__(self, poll_interval: float = 2.0, max_streams: int = 4, retention_hours: float = 24.0,
+                 heartbeat_interval: float = 15.0, max_stream_seconds: float = 300.0, batch_size: int = 100):
+        """
+        Initializes the event service and starts listening for commits.
+
+        Args:
+            poll_interval (float): Seconds between checks for events committed by other processes.
+            max_streams (int): Streams open at once in this process.
+            retention_hours (float): Age after which prune() deletes an event.
+            heartbeat_interval (float): Seconds of silence after which a keep-alive comment is sent.
+            max_stream_seconds (float): A stream is closed after this long; the browser
+                reconnects with Last-Event-ID, which frees the worker thread.
+            batch_size (int): Maximum number of events read per query.
+        """
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self.heartbeat_interval = heartbeat_interval
+        self.max_stream_seconds = max_stream_seconds
+        self.batch_size = batch_size
+        self._slots = threading.BoundedSemaphore(max(1, max_streams))
+        # Documents with open streams: doc_id -> number of streams, doc_id -> commits seen
+        self._condition = threading.Condition()
+        self._watchers = {}
+        self._versions = {}
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_soft_rollback", self._on_rollback)
+
+
+    def publish(self, doc_id: int, event_type: str, data: dict = None, run_id: str = None):
+        """
+        Adds an event to the current transaction. Does not commit.
+
+        Args:
+            doc_id (int): Document ID.
+            event_type (str): 'chunk_completed', 'progress', 'error' or 'done'.
+            data (dict): JSON-serializable event data.
+            run_id (str): ID of the translation run the event belongs to (sent as data.run_id).
+        """
+        data = dict(data or {})
+        if run_id is not None:
+            data["run_id"] = run_id
+        db.session.add(DocumentEvent(
+            document_id=doc_id,
+            event_type=event_type,
+            data=json.dumps(data)
+        ))
+        db.session.info.setdefault(_PUBLISHED_KEY, set()).add(doc_id)
+
+
+    def clear(self, doc_id: int):
+        """
+        Deletes all stored events of a document (e.g. before a new translation run). Does not commit.
+
+        Args:
+            doc_id (int): Document ID.
+        """
+        db.session.execute(delete(DocumentEvent).where(DocumentEvent.document_id == doc_id))
+
+
+    def prune(self) -> int:
+        """
+        Deletes events older than `retention_hours`, in batches. Commits.
+
+        Finished runs' events are only needed by clients that reconnect shortly
+        after, and documents that are never translated again would keep theirs
+        forever otherwise.
+
+        Returns:
+            int: Number of deleted events.
+        """
+        cutoff = datetime.now() - timedelta(hours=self.retention_hours)
+        deleted = 0
+        while True:
+            # Events are inserted in time order, so the oldest are at the start of the ID range
+            event_ids = db.session.execute(
+                select(DocumentEvent.id)
+                .where(DocumentEvent.created_at < cutoff)
+                .order_by(DocumentEvent.id)
+                .limit(_PRUNE_BATCH)
+            ).scalars().all()
+            if not event_ids:
+                return deleted
+            db.session.execute(
+                delete(DocumentEvent)
+                .where(DocumentEvent.id.in_(event_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            deleted += len(event_ids)
+
+
+    def get_events(self, doc_id: int, after_id: int = 0):
+        """
+        Returns the events of a document newer than `after_id`, oldest first.
+
+        Args:
+            doc_id (int): Document ID.
+            after_id (int): Last event ID the client has seen.
+
+        Returns:
+            list of (id, event_type, data) tuples, at most `batch_size` of them.
+        """
+        return db.session.execute(
+            select(DocumentEvent.id, DocumentEvent.event_type, DocumentEvent.data)
+            .where(DocumentEvent.document_id == doc_id, DocumentEvent.id > after_id)
+            .order_by(DocumentEvent.id)
+            .limit(self.batch_size)
+        ).all()
+
+
+    def acquire_stream(self) -> bool:
+        """Reserves one of the stream slots of this process. Returns False if all are in use."""
+        return self._slots.acquire(blocking=False)
+
+
+    def release_stream(self):
+        """Frees a slot reserved with acquire_stream()."""
+        self._slots.release()
+
+
+    def stream(self, doc_id: int, last_event_id: int = 0, initial_progress: dict = None, run_id: str = None):
+        """
+        Generator of text/event-stream data for a document.
+
+        Sends the current progress first (not stored, so it has no ID), then every
+        stored event after `last_event_id` as it is committed. Ends after a done or
+        error event, or after `max_stream_seconds`. The caller reserves a slot with
+        acquire_stream() and releases it when the response is closed.
+
+        Args:
+            doc_id (int): Document ID.
+            last_event_id (int): ID of the last event the client received (0 for all).
+            initial_progress (dict): Progress snapshot to send first, if any.
+            run_id (str): Only send events of this translation run (all events if None).
+
+        Yields:
+            str: Formatted events and keep-alive comments.
+        """
+        yield "retry: 2000\n\n"
+        if initial_progress:
+            yield format_event("progress", json.dumps(initial_progress))
+
+        deadline = time.monotonic() + self.max_stream_seconds
+        last_sent = time.monotonic()
+        version = self._watch(doc_id)
+        try:
+            while True:
+                events = self.get_events(doc_id, last_event_id)
+                # End the read transaction so the next query sees newly committed events
+                db.session.rollback()
+
+                for (event_id, event_type, data) in events:
+                    last_event_id = event_id
+                    if run_id is not None and json.loads(data or "{}").get("run_id") != run_id:
+                        continue
+                    yield format_event(event_type, data, event_id)
+                    if event_type in FINAL_EVENTS:
+                        return
+
+                now = time.monotonic()
+                if events:
+                    last_sent = now
+                    if len(events) == self.batch_size:
+                        continue
+                elif now - last_sent >= self.heartbeat_interval:
+                    yield ": keep-alive\n\n"
+                    last_sent = now
+
+                if now >= deadline:
+                    return
+                timeout = min(self.poll_interval, deadline - now, last_sent + self.heartbeat_interval - now)
+                version = self._wait(doc_id, version, max(timeout, 0))
+        finally:
+            self._unwatch(doc_id)
+
+
+    def _watch(self, doc_id: int) -> int:
+        """Registers an open stream of a document and returns the document's commit counter."""
+        with self._condition:
+            self._watchers[doc_id] = self._watchers.get(doc_id, 0) + 1
+            return self._versions.setdefault(doc_id, 0)
+
+
+    def _unwatch(self, doc_id: int):
+        """Unregisters a stream; the counter is dropped with the document's last stream."""
+        with self._condition:
+            self._watchers[doc_id] -= 1
+            if not self._watchers[doc_id]:
+                del self._watchers[doc_id]
+                del self._versions[doc_id]
+
+
+    def _wait(self, doc_id: int, version: int, timeout: float) -> int:
+        """Waits until events of a document are committed or the timeout passes. Returns the new counter."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._versions[doc_id] != version, timeout)
+            return self._versions[doc_id]
+
+
+    def _on_commit(self, session):
+        """Wakes the streams of the documents whose events were just committed."""
+        doc_ids = session.info.pop(_PUBLISHED_KEY, None)
+        if not doc_ids:
+            return
+        with self._condition:
+            watched = [doc_id for doc_id in doc_ids if doc_id in self._watchers]
+            for doc_id in watched:
+                self._versions[doc_id] += 1
+            if watched:
+                self._condition.notify_all()
+
+
+    def _on_rollback(self, session, previous_transaction):
+        """Forgets the events of a rolled back transaction."""
+        if previous_transaction.parent is None:
+            session.info.pop(_PUBLISHED_KEY, None)
@@ -5,34 +5,70 @@ Service class for managing document groups.
 
 Responsibilities:
 - Creating groups and assigning documents
-- Fetching user’s groups
+- Fetching user’s groups (two queries, member IDs read from the join table only)
 - Adding/removing documents in groups
 - Deleting groups
 """
 
+from collections import defaultdict
+from sqlalchemy import select
 from app.extensions import db
-from app.models.db_models import Group, GroupDocument
+from app.models.db_models import Document, Group, GroupDocument
 
 class GroupsService:
-    def get_groups_by_user(self, user_id: int):
+    def get_groups_by_user(self, user_id: int, include_details: bool = False):
         """
         Returns all groups for a given user.
 
+        Uses two queries regardless of the number of groups: one for the groups
+        and one for the memberships of all of them through group_documents.
+        Document rows are not loaded; with include_details only their titles are joined.
+
         Parameters:
             user_id (int): ID of the user
+            include_details (bool): Also return document counts and titles
 
         Returns:
             List of group dicts with IDs, names, and associated document IDs.
+            With include_details, each dict also has 'document_count' and
+            'document_details' (list of {'id', 'title'}).
         """
-        groups = Group.query.filter_by(user_id=user_id).all()
-        return [
-            {
-                'id': g.id,
-                'name': g.name,
-                'documents': [d.id for d in g.documents]
+        groups = db.session.execute(
+            select(Group.id, Group.name).where(Group.user_id == user_id).order_by(Group.id)
+        ).all()
+
+        columns = [GroupDocument.groups_id, GroupDocument.document_id]
+        if include_details:
+            columns.append(Document.title)
+        query = (
+            select(*columns)
+            .join(Group, Group.id == GroupDocument.groups_id)
+            .where(Group.user_id == user_id)
+            .order_by(GroupDocument.groups_id, GroupDocument.document_id)
+        )
+        if include_details:
+            query = query.join(Document, Document.id == GroupDocument.document_id)
+
+        # Groups and memberships added between the two queries are ignored
+        members = defaultdict(list)
+        for row in db.session.execute(query):
+            members[row.groups_id].append(row)
+
+        result = []
+        for group in groups:
+            rows = members.get(group.id, [])
+            entry = {
+                'id': group.id,
+                'name': group.name,
+                'documents': [row.document_id for row in rows]
             }
-            for g in groups
-        ]
+            if include_details:
+                entry['document_count'] = len(rows)
+                entry['document_details'] = [
+                    {'id': row.document_id, 'title': row.title} for row in rows
+                ]
+            result.append(entry)
+        return result
 
 
     def create_group(self, name: str, user_id: int, document_ids: list[int]):
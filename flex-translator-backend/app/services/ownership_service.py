@@ -0,0 +1,120 @@
+"""
+ownership_service.py
+
+Owner lookups for the authorization checks in routes/wrappers.py.
+
+- Only the owner's user ID is selected (for chunks, joined from the document),
+  never the large text columns
+- Positive results are cached per process for a short time; documents never
+  change owner, so an entry can only go stale when its row is deleted, and
+  deletions invalidate it
+- Misses are not cached, so a new document is visible immediately
+"""
+
+import threading
+import time
+from sqlalchemy import select
+from app.extensions import db
+from app.models.db_models import Chunk, Document
+
+
+class OwnershipService:
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        """
+        Initializes the ownership cache.
+
+        Args:
+            ttl (float): Seconds a cached owner is trusted (0 disables the cache).
+            max_entries (int): Maximum number of cached documents and chunks.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = {}
+        self._lock = threading.Lock()
+
+
+    def document_owner(self, doc_id: int):
+        """
+        Returns the user ID owning a document, or None if it does not exist.
+
+        Args:
+            doc_id (int): Document ID.
+        """
+        cached = self._get(("document", doc_id))
+        if cached is not None:
+            return cached
+
+        owner = db.session.execute(
+            select(Document.user_id).where(Document.id == doc_id)
+        ).scalar_one_or_none()
+        if owner is not None:
+            self._put(("document", doc_id), owner)
+        return owner
+
+
+    def chunk_owner(self, chunk_id: int):
+        """
+        Returns the owner and document of a chunk with one joined query.
+
+        Args:
+            chunk_id (int): Chunk ID.
+
+        Returns:
+            (user_id, document_id), or None if the chunk does not exist.
+        """
+        cached = self._get(("chunk", chunk_id))
+        if cached is not None:
+            return cached
+
+        row = db.session.execute(
+            select(Document.user_id, Chunk.document_id)
+            .join(Document, Document.id == Chunk.document_id)
+            .where(Chunk.id == chunk_id)
+        ).first()
+        if row is None:
+            return None
+
+        owner = (row.user_id, row.document_id)
+        self._put(("chunk", chunk_id), owner)
+        return owner
+
+
+    def invalidate_documents(self, doc_ids):
+        """
+        Drops cached owners of deleted documents and of their chunks.
+
+        Args:
+            doc_ids (Iterable[int]): IDs of the deleted documents.
+        """
+        doc_ids = set(doc_ids)
+        with self._lock:
+            for key in [key for (key, (owner, _)) in self._cache.items()
+                        if (key[0] == "document" and key[1] in doc_ids)
+                        or (key[0] == "chunk" and owner[1] in doc_ids)]:
+                del self._cache[key]
+
+
+    def _get(self, key):
+        """Returns a cached owner that has not expired, or None."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            (owner, expires) = entry
+            if expires < time.monotonic():
+                del self._cache[key]
+                return None
+            return owner
+
+
+    def _put(self, key, owner):
+        """Caches an owner, dropping expired entries (or all) when the cache is full."""
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache = {k: v for (k, v) in self._cache.items() if v[1] >= now}
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+            self._cache[key] = (owner, now + self.ttl)
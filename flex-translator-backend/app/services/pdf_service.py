@@ -1,14 +1,15 @@
 """
 pdf_service.py
 
-Utility functions for working with PDF and DOCX files, including:
+Utility functions for working with PDF, DOCX and PPTX files, including:
 - Converting PDFs to DOCX
-- Extracting text from DOCX
-- Applying translations to DOCX content
+- Extracting text from DOCX and PPTX
+- Applying translations to DOCX and PPTX content (by position or by string matching)
 - Inferring file types from binary data
 """
 
 import base64
+import re
 from io import BytesIO
 from pdf2docx import Converter
 from docx import Document
@@ -16,92 +17,335 @@ import zipfile
 import os
 from lxml import etree
 import tempfile
-import zipfile
+from app.utils.zip_rewriter import rewrite_zip
+
+# Rendered files larger than this are spooled to disk instead of memory
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_TEXT = f"{{{W_NAMESPACE}}}t"
+W_PARAGRAPH = f"{{{W_NAMESPACE}}}p"
+DOCUMENT_PART = "word/document.xml"
+
+A_NAMESPACE = "http://schemas.openxmlformats.org/drawingml/2006/main"
+A_TEXT = f"{{{A_NAMESPACE}}}t"
+A_PARAGRAPH = f"{{{A_NAMESPACE}}}p"
+_PRESENTATION_NAMESPACE = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+PRESENTATION_PART = "ppt/presentation.xml"
+PRESENTATION_RELS = "ppt/_rels/presentation.xml.rels"
+_SLIDE_PART = re.compile(r"^ppt/slides/slide(\d+)\.xml$")
+
+# A segment is kept only if it contains at least one letter
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+
+
+def _iter_text_elements(file, text_tag: str, paragraph_tag: str):
+    """
+    Lazily yields (index, text) for every text element of an XML part.
+
+    `index` counts all text elements of the part in document order (empty ones
+    included), so it identifies the element again when translations are injected.
+    Each paragraph is cleared once it has been read, so memory stays bounded.
+    """
+    index = 0
+    try:
+        for (_, elem) in etree.iterparse(file, events=("end",), tag=(text_tag, paragraph_tag)):
+            if elem.tag == text_tag:
+                yield index, (elem.text or "").strip()
+                index += 1
+                continue
+
+            # Drop the finished paragraph and the already processed siblings before it
+            elem.clear(keep_tail=True)
+            parent = elem.getparent()
+            while elem.getprevious() is not None:
+                del parent[0]
+    except etree.XMLSyntaxError:
+        print("Problem with parsing the text.")
+
+
+def _text_tags(part: str):
+    """Returns the (text, paragraph) element tags of a DOCX or PPTX XML part."""
+    if part.startswith("ppt/"):
+        return A_TEXT, A_PARAGRAPH
+    return W_TEXT, W_PARAGRAPH
+
+
+def _slide_parts(package: zipfile.ZipFile):
+    """
+    Returns the slide part names of a PPTX in presentation order.
+
+    The order comes from the slide list in `ppt/presentation.xml`; if it
+    cannot be read, slides are sorted by the number in their file name.
+    """
+    names = set(package.namelist())
+    try:
+        rels = etree.fromstring(package.read(PRESENTATION_RELS))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels}
+        presentation = etree.fromstring(package.read(PRESENTATION_PART))
+        parts = []
+        for slide_id in presentation.iter(f"{{{_PRESENTATION_NAMESPACE}}}sldId"):
+            target = targets.get(slide_id.get(R_ID), "")
+            part = os.path.normpath(os.path.join("ppt", target)).replace(os.sep, "/")
+            if part in names:
+                parts.append(part)
+        if parts:
+            return parts
+    except (KeyError, etree.XMLSyntaxError):
+        pass
+
+    slides = []
+    for name in names:
+        match = _SLIDE_PART.match(name)
+        if match:
+            slides.append((int(match.group(1)), name))
+    return [name for (_, name) in sorted(slides)]
+
+
+def text_parts(package: zipfile.ZipFile):
+    """
+    Returns the XML parts holding the translatable text of a DOCX or PPTX.
+
+    Args:
+        package (zipfile.ZipFile): The opened DOCX or PPTX.
+
+    Returns:
+        list[str]: `word/document.xml` for DOCX, the slide parts in order for PPTX.
+    """
+    if DOCUMENT_PART in package.namelist():
+        return [DOCUMENT_PART]
+    return _slide_parts(package)
+
+
+def iter_text_positions(stream: BytesIO):
+    """
+    Lazily yields the position and text of every text element (`w:t` in DOCX,
+    `a:t` in PPTX slides) in the file stream.
+
+    Args:
+        stream (BytesIO): A file-like object of the DOCX or PPTX file.
+
+    Yields:
+        tuple: ((part name, element index), stripped non-empty text) in document order.
+    """
+    with zipfile.ZipFile(stream) as package:
+        for part in text_parts(package):
+            (text_tag, paragraph_tag) = _text_tags(part)
+            with package.open(part) as file:
+                for (index, text) in _iter_text_elements(file, text_tag, paragraph_tag):
+                    if text:
+                        yield (part, index), text
+
+
+def iter_text(stream: BytesIO):
+    """
+    Lazily yields the text of every text element in the DOCX or PPTX stream.
+
+    Args:
+        stream (BytesIO): A file-like object of the DOCX or PPTX file.
+
+    Yields:
+        str: Stripped, non-empty text of each text element in document order.
+    """
+    for (_, text) in iter_text_positions(stream):
+        yield text
+
 
 def extract_text(stream: BytesIO):
     """
-    Extracts all text content from the DOCX (XML) stream.
+    Extracts all text content from the DOCX or PPTX (XML) stream.
 
     Args:
-        stream (BytesIO): A file-like object of the DOCX file.
+        stream (BytesIO): A file-like object of the DOCX or PPTX file.
 
     Returns:
         str: All text from the document.
     """
-    text = []
-    with zipfile.ZipFile(stream) as docx:
-        for file_name in docx.namelist():
-            if file_name == "word/document.xml":#file_name.endswith(".xml"):
-                with docx.open(file_name) as file:
-                    tree = etree.parse(file)
-                    try:
-                        for elem in tree.iter():
-                            if elem.text and elem.text.strip():
-                                text.append(elem.text.strip())
-                            #if elem.tail and elem.tail.strip():
-                            #    text.append(elem.tail.strip())
-                    except Exception:
-                        print("Problem with parsing the text.")
-    return  "\n".join(text)
+    return "\n".join(iter_text(stream))
+
+
+def _radix_pattern(keys: list, depth: int) -> str:
+    """
+    Builds a regex body for sorted `keys` that all share the prefix `keys[0][:depth]`.
+
+    Keys are grouped by their next character and each group's common prefix is
+    emitted as one literal, so the result is a compressed trie (radix tree).
+    Terminal keys become a greedy optional group, which makes the regex prefer
+    the longest key at every position.
+    """
+    terminal = False
+    branches = []
+    i = 0
+    while i < len(keys):
+        key = keys[i]
+        if len(key) == depth:
+            terminal = True
+            i += 1
+            continue
+
+        # Sorted keys starting with the same next character are contiguous
+        j = i + 1
+        while j < len(keys) and keys[j][depth] == key[depth]:
+            j += 1
+        prefix = os.path.commonprefix([key, keys[j - 1]])
+        branches.append(re.escape(prefix[depth:]) + _radix_pattern(keys[i:j], len(prefix)))
+        i = j
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if terminal else body
+
+
+def compile_replacements(translations: dict, prefix_length: int = 8):
+    """
+    Compiles a mapping of original -> translated terms into a single-pass replacer.
+
+    The first `prefix_length` characters of every term are merged into one
+    trie-shaped lookahead regex that finds candidate positions in a single scan.
+    At each candidate only the term lengths present under that prefix are looked
+    up, longest first, so the longest matching term wins and replaced text is
+    never scanned again.
 
+    Args:
+        translations (dict): Mapping of original -> translated terms.
+        prefix_length (int): Length of the indexed term prefixes.
 
-def translate_text(docx_stream: str, translations: dict):
+    Returns:
+        Callable[[str], str]: Function that applies the replacements to a string.
     """
-    Applies translations to DOCX by modifying `docx.Document` paragraphs and headers.
+    mapping = {old: new for (old, new) in translations.items() if old}
+    if not mapping:
+        return lambda text: text
+
+    # Prefix -> distinct term lengths under that prefix, longest first
+    lengths = {}
+    for old in mapping:
+        lengths.setdefault(old[:prefix_length], set()).add(len(old))
+    lengths = {prefix: sorted(sizes, reverse=True) for (prefix, sizes) in lengths.items()}
+    pattern = re.compile("(?=(" + _radix_pattern(sorted(lengths), 0) + "))")
+
+    def replace(text: str) -> str:
+        parts = []
+        last = pos = 0
+        while True:
+            match = pattern.search(text, pos)
+            if not match:
+                break
+            start = match.start()
+            found = None
+            remaining = len(text) - start
+            for prefix_end in range(len(match.group(1)), 0, -1):
+                for size in lengths.get(text[start:start + prefix_end], ()):
+                    if size <= remaining and text[start:start + size] in mapping:
+                        found = text[start:start + size]
+                        break
+                if found:
+                    break
+
+            if found is None:
+                pos = start + 1
+                continue
+            parts.append(text[last:start])
+            parts.append(mapping[found])
+            last = pos = start + len(found)
+
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+    return replace
+
+
+def translate_text(docx_stream: str, translations: dict, output=None):
+    """
+    Applies translations to DOCX by directly editing `word/document.xml`.
+
+    Only `word/document.xml` is re-encoded; every other ZIP member (images etc.)
+    is copied through as its original compressed bytes.
 
     Args:
         docx_stream_b64 (str): Base64-encoded DOCX document.
         translations (dict): Mapping of original -> translated terms.
+        output (optional): Binary file-like object to write the DOCX into.
+            Defaults to a spooled temporary file.
 
     Returns:
-        BytesIO: Modified DOCX stream.
+        File-like object: The output stream, rewound if it is seekable.
     """
     docx_stream = BytesIO(base64.b64decode(docx_stream[3:]))
-    output_stream = BytesIO()
-    translation_array = [(old, new) for (old,new) in translations.items()]
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    replace = compile_replacements(translations)
 
-    def sorting_key(x):
-        return len(x[0])
-    translation_array = sorted(translation_array, key=sorting_key, reverse=True)
+    replacements = {}
     with zipfile.ZipFile(docx_stream) as zip_ref:
-        in_memory_files = {}
-
-        for item in zip_ref.infolist():
-            data = zip_ref.read(item.filename)
-
-            if item.filename == "word/document.xml" :#item.filename.endswith(".xml"):
-                try:
-                    xml_tree = etree.fromstring(data)
-                    for node in xml_tree.iter():
-                        if node.text:
-                            for (old, new) in translation_array:
-                                if old in node.text:
-                                    node.text = node.text.replace(old, new)
-                                    """
-                        if node.tail:
-                            for old, new in translations.items():
-                                if old in node.tail:
-                                    node.tail = node.tail.replace(old, new) 
-                                    """
-                    new_data = etree.tostring(xml_tree, xml_declaration=True, encoding="UTF-8")
-
-                    in_memory_files[item.filename] = new_data
-                except Exception:
-                    in_memory_files[item.filename] = data
-            else:
-                in_memory_files[item.filename] = data
+        try:
+            xml_tree = etree.fromstring(zip_ref.read("word/document.xml"))
+            for node in xml_tree.iter():
+                if node.text:
+                    node.text = replace(node.text)
+            replacements["word/document.xml"] = etree.tostring(xml_tree, xml_declaration=True, encoding="UTF-8")
+        except Exception:
+            print("Problem with translating the text.")
+
+    rewrite_zip(docx_stream, replacements, output)
+    if output.seekable():
+        output.seek(0)
+    return output
+
+
+def inject_translations(docx_stream: str, translations: dict, output=None):
+    """
+    Writes translations directly into the text elements (DOCX or PPTX) at the given positions.
 
-    with zipfile.ZipFile(output_stream, "w", zipfile.ZIP_DEFLATED) as out:
-        for name, data in in_memory_files.items():
-            out.writestr(name, data)
+    Each modified XML part is walked once and only the recorded elements are
+    changed, so repeated or overlapping segments cannot be mixed up.
+    Leading and trailing whitespace of the original element text is kept.
 
-    output_stream.seek(0)
-    return output_stream
+    Args:
+        docx_stream_b64 (str): Base64-encoded DOCX or PPTX document.
+        translations (dict): Mapping of (part name, element index) -> translated text,
+            as produced by `map_translation_to_segments`.
+        output (optional): Binary file-like object to write the DOCX into.
+            Defaults to a spooled temporary file.
+
+    Returns:
+        File-like object: The output stream, rewound if it is seekable.
+    """
+    docx_stream = BytesIO(base64.b64decode(docx_stream[3:]))
+    if output is None:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+    by_part = {}
+    for ((part, index), translation) in translations.items():
+        by_part.setdefault(part, {})[index] = translation
+
+    replacements = {}
+    with zipfile.ZipFile(docx_stream) as zip_ref:
+        for (part, positions) in by_part.items():
+            xml_tree = etree.fromstring(zip_ref.read(part))
+            (text_tag, _) = _text_tags(part)
+            for (index, node) in enumerate(xml_tree.iter(text_tag)):
+                if index in positions:
+                    original = node.text or ""
+                    leading = original[:len(original) - len(original.lstrip())]
+                    trailing = original[len(original.rstrip()):]
+                    node.text = leading + positions[index] + trailing
+            replacements[part] = etree.tostring(xml_tree, xml_declaration=True, encoding="UTF-8")
+
+    rewrite_zip(docx_stream, replacements, output)
+    if output.seekable():
+        output.seek(0)
+    return output
 
 
 def translate_text2(docx_stream: str, translations: dict):
     """
-    Applies word replacements inside a base64-encoded DOCX document (by directly editing XML).
+    Applies word replacements inside a base64-encoded DOCX document (via `docx.Document` runs).
 
     Args:
         docx_stream_b64 (str): Base64-encoded DOCX document, prefixed with "b64".
@@ -112,28 +356,20 @@ def translate_text2(docx_stream: str, translations: dict):
     """
     docx_stream = BytesIO(base64.b64decode(docx_stream[3:]))
     output_stream = BytesIO()
-    translation_array = [(old, new) for (old,new) in translations.items()]
+    replace = compile_replacements(translations)
     doc = Document(docx_stream)
 
-    def sorting_key(x):
-        return len(x[0])
-    translation_array = sorted(translation_array, key=sorting_key, reverse=True)
-    
-    for para in doc.paragraphs:
-        for run in para.runs:
-            for (old, new) in translation_array:
-                if old in run.text:
-                    print(run.text)
-                    run.text = run.text.replace(old, new)
-
+    paragraphs = list(doc.paragraphs)
     for section in doc.sections:
         for header in [section.header, section.footer]:
-            for para in header.paragraphs:
-                for run in para.runs:
-                    for (old, new) in translation_array:
-                        if old in run.text:
-                            run.text = run.text.replace(old, new)
+            paragraphs.extend(header.paragraphs)
 
+    for para in paragraphs:
+        for run in para.runs:
+            if run.text:
+                new_text = replace(run.text)
+                if new_text != run.text:
+                    run.text = new_text
 
     doc.save(output_stream)
     output_stream.seek(0)
@@ -171,6 +407,75 @@ def pdf2docx_encode_b64(file: str):
     return docx_bytes
 
 
+def iter_segment_positions(text: str):
+    """
+    Lazily yields the translatable segments of a base64-encoded DOCX or PPTX with their positions.
+
+    Segments without any letters (numbers, bullets, punctuation) are skipped.
+
+    Args:
+        text (str): Base64-encoded DOCX or PPTX with "b64" prefix.
+
+    Yields:
+        tuple: ((part name, element index), segment text).
+    """
+    stream = BytesIO(base64.b64decode(text[3:]))
+    for (position, segment) in iter_text_positions(stream):
+        if _HAS_LETTER.search(segment):
+            yield position, segment
+
+
+def iter_segments(text: str):
+    """
+    Lazily yields the translatable segments of a base64-encoded DOCX.
+
+    Args:
+        text (str): Base64-encoded DOCX with "b64" prefix.
+
+    Yields:
+        str: Text segment.
+    """
+    for (_, segment) in iter_segment_positions(text):
+        yield segment
+
+
+def map_translation_to_segments(segments, chunk_translations):
+    """
+    Pairs the segment positions of a DOCX or PPTX with the lines of its translated chunks.
+
+    Segments are extracted one per line and chunks hold whole lines, so each
+    chunk covers a known run of segments and lines are paired only within their
+    chunk: a missing, merged or split line cannot shift the segments of later
+    chunks. When a chunk has one line per segment, lines are paired by index and
+    an empty line leaves its segment untranslated. Otherwise its non-empty lines
+    are paired in order (only the common prefix if the counts still differ) and
+    the chunk is reported.
+
+    Args:
+        segments: List of (position, segment) as yielded by `iter_segment_positions`.
+        chunk_translations: Iterable of (segment count, translation) per chunk, in order.
+
+    Returns:
+        tuple: (dict of position -> translated text, list of indexes of chunks whose
+        line count did not match their segments)
+    """
+    translations = {}
+    mismatched = []
+    start = 0
+    for (i, (count, translation)) in enumerate(chunk_translations):
+        positions = [position for (position, _) in segments[start:start + count]]
+        start += count
+        lines = [line.replace("<word>", "").strip() for line in (translation or "").split("\n")]
+        if len(lines) != len(positions):
+            lines = [line for line in lines if line]
+            if len(lines) != len(positions):
+                mismatched.append(i)
+        for (position, line) in zip(positions, lines):
+            if line:
+                translations[position] = line
+    return translations, mismatched
+
+
 def extract_text_from_pdf(text: str):
     """
     Extracts readable text from a base64-encoded PDF or returns plain text as-is.
@@ -183,20 +488,8 @@ def extract_text_from_pdf(text: str):
     """
     if text[0:3] != "b64":
         return text
-    
-    pdf_bytes = base64.b64decode(text[3:])
-    pdf_stream = BytesIO(pdf_bytes)
-    output_text = extract_text(pdf_stream)
-    output_text = output_text.split("\n")
-    new_output = []
-    for j in range(len(output_text)):
-        # Remove all special characters from the end and beginning
-        if sum([0 if not letter.isalpha() else 1 for letter in output_text[j]])==0:
-               continue
-        new_output.append(output_text[j])
-    output_text = "\n".join(["<word>"+i+"<word>" for i in new_output])
-
-    return output_text
+
+    return "\n".join("<word>" + segment + "<word>" for segment in iter_segments(text))
 
 
 
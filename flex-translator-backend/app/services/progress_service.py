@@ -1,51 +1,88 @@
 """
 progress_service.py
 
-This service tracks document translation progress in memory.
+This service tracks document translation progress.
 Used to monitor the status of ongoing chunk translation processes.
+
+Progress is stored as counters on the document row (translated_chunks,
+total_chunks), so every gunicorn worker sees the same values and a progress
+poll is a single primary-key read. The counters are changed in the same
+transaction as the chunks themselves and do not touch modified_at.
 """
 
-# Global in-memory store for document progress
-progress_store = {}  
+from sqlalchemy import case, func, select, update
+from app.extensions import db
+from app.models.db_models import Chunk, Document
+
 
 class ProgressService:
-    def set_progress(self, doc_id: int, currentChunk: int, totalChunks: int):
+    def set_progress(self, doc_id: int, translated: int, total: int):
         """
-        Save progress for a given document.
+        Save progress for a given document. Does not commit.
 
         Args:
             doc_id (int): Document ID.
-            current_chunk (int): Current translated chunk index.
-            total_chunks (int): Total number of chunks in the document.
+            translated (int): Number of translated chunks.
+            total (int): Total number of chunks in the document.
         """
-        progress_store[doc_id] = {"currentChunk": currentChunk, "totalChunks": totalChunks}
-        print(f"[DEBUG] set_progress: {progress_store}")
+        db.session.execute(
+            update(Document)
+            .where(Document.id == doc_id)
+            .values(translated_chunks=translated, total_chunks=total, modified_at=Document.modified_at)
+        )
 
 
-    def get_progress(self, doc_id: int):
+    def add_translated(self, doc_id: int, delta: int):
         """
-        Get progress for a specific document.
+        Atomically adds `delta` to the translated chunk counter of a document.
+        Does not commit.
 
         Args:
             doc_id (int): Document ID.
-
-        Returns:
-            dict or None: Progress dictionary or None if not found.
+            delta (int): Change in the number of translated chunks (+1 or -1).
         """
-        result = progress_store.get(doc_id)
-        print(f"[DEBUG] get_progress({doc_id}): {result}")
-        return result
+        if not delta:
+            return
+        db.session.execute(
+            update(Document)
+            .where(Document.id == doc_id, Document.translated_chunks.is_not(None))
+            .values(translated_chunks=Document.translated_chunks + delta, modified_at=Document.modified_at)
+        )
 
 
-    def clear_progress(self, doc_id: int):
+    def get_progress(self, doc_id: int):
         """
-        Clear progress tracking for a document.
+        Get progress for a specific document.
+
+        Counters are filled in by set_progress() and migration 0009. If they are
+        still missing, the chunks are counted but nothing is written, so this
+        is safe on read-only (replica) sessions.
 
         Args:
             doc_id (int): Document ID.
+
+        Returns:
+            dict or None: {"translated": int, "total": int}, or None if the document does not exist.
         """
-        progress_store.pop(doc_id, None)
-        
+        row = db.session.execute(
+            select(Document.translated_chunks, Document.total_chunks).where(Document.id == doc_id)
+        ).first()
+        if row is None:
+            return None
+
+        (translated, total) = row
+        if translated is None or total is None:
+            (translated, total) = self._count_chunks(doc_id)
+
+        return {"translated": translated, "total": total}
+
 
-# Create a global instance for use in the app
-progress_service = ProgressService()
\ No newline at end of file
+    def _count_chunks(self, doc_id: int):
+        """Counts translated and total chunks of a document with one aggregate query."""
+        (translated, total) = db.session.execute(
+            select(
+                func.count(case((Chunk.final_chunk_translation != "", 1))),
+                func.count(Chunk.id)
+            ).where(Chunk.document_id == doc_id)
+        ).one()
+        return translated, total
@@ -0,0 +1,234 @@
+"""
+revision_service.py
+
+History of chunk translations, so earlier versions can be compared and
+restored without translating again.
+
+- Every change of a chunk's final translation is saved as a revision
+  (numbered 1, 2, ... per chunk) by ChunkService.set_chunk_translation()
+- Most revisions are deltas against the previous revision: word-level
+  difflib opcodes, where unchanged runs are (start, end) token ranges and
+  only new text is stored. Every `snapshot_interval`-th revision (and any
+  revision whose delta would not be smaller) is a full snapshot, so a
+  revision is rebuilt from at most `snapshot_interval` rows
+- Content is zlib-compressed
+- Each chunk keeps at least its `max_revisions` latest revisions; older ones
+  are pruned a snapshot group at a time when a new snapshot is written
+- A translation saved before its chunk had any history (or changed without
+  going through set_chunk_translation) is saved as a snapshot first
+"""
+
+import difflib
+import json
+import re
+import zlib
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from app.extensions import db
+from app.models.db_models import Chunk, ChunkRevision
+from app.services.text_store import text_hash
+
+COMPRESSION_LEVEL = 6
+
+_TOKEN_PATTERN = re.compile(r"\s+|\S+")
+
+
+def _tokens(text: str) -> list:
+    """Splits a text into words and whitespace runs; joining them gives the text back."""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def make_delta(old: str, new: str) -> list:
+    """
+    Returns the ops that turn `old` into `new`: [start, end] copies tokens of
+    `old`, a string is inserted as is.
+    """
+    old_tokens = _tokens(old)
+    new_tokens = _tokens(new)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for (tag, i1, i2, j1, j2) in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_tokens[j1:j2]))
+    return ops
+
+
+def apply_delta(old: str, ops: list) -> str:
+    """Rebuilds a text from the previous text and the ops of make_delta()."""
+    old_tokens = _tokens(old)
+    return "".join(op if isinstance(op, str) else "".join(old_tokens[op[0]:op[1]]) for op in ops)
+
+
+class RevisionService:
+    def __init__(self, snapshot_interval: int = 10, max_revisions: int = 50):
+        """
+        Initializes the revision store.
+
+        Args:
+            snapshot_interval (int): Maximum rows read to rebuild a revision (a snapshot and its deltas).
+            max_revisions (int): Revisions kept per chunk (at least).
+        """
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.max_revisions = max(1, max_revisions)
+
+
+    def record(self, chunk: Chunk, old_text: str, new_text: str):
+        """
+        Saves a new revision when a chunk's translation changes. Does not commit.
+
+        Parameters:
+            chunk (Chunk): The chunk being updated.
+            old_text (str): Translation before the change.
+            new_text (str): Translation after the change (None or empty clears it).
+
+        Returns:
+            int: The new revision number, or None if the text did not change.
+        """
+        old_text = old_text or ""
+        new_text = new_text or ""
+        if old_text == new_text:
+            return None
+
+        # Serializes saves of the same chunk, so revision numbers do not collide
+        db.session.execute(select(Chunk.id).where(Chunk.id == chunk.id).with_for_update())
+        recent = db.session.execute(
+            select(ChunkRevision.revision, ChunkRevision.is_snapshot, ChunkRevision.text_hash)
+            .where(ChunkRevision.chunk_id == chunk.id)
+            .order_by(ChunkRevision.revision.desc())
+            .limit(self.snapshot_interval)
+        ).all()
+
+        latest = recent[0].revision if recent else 0
+        latest_hash = recent[0].text_hash if recent else text_hash("")
+        since_snapshot = next((i for (i, row) in enumerate(recent) if row.is_snapshot), None)
+
+        if latest_hash != text_hash(old_text):
+            latest += 1
+            self._insert(chunk.id, latest, old_text, snapshot=True)
+            since_snapshot = 0
+
+        delta = None
+        if since_snapshot is not None and since_snapshot + 1 < self.snapshot_interval:
+            delta = make_delta(old_text, new_text)
+        self._insert(chunk.id, latest + 1, new_text, delta=delta)
+        return latest + 1
+
+
+    def list_revisions(self, chunk_id: int) -> list:
+        """
+        Lists a chunk's revisions, newest first, without rebuilding their texts.
+
+        Returns:
+            list[dict]: [{"revision", "size", "created_at"}, ...]
+        """
+        rows = db.session.execute(
+            select(ChunkRevision.revision, ChunkRevision.size, ChunkRevision.created_at)
+            .where(ChunkRevision.chunk_id == chunk_id)
+            .order_by(ChunkRevision.revision.desc())
+        )
+        return [
+            {
+                "revision": row.revision,
+                "size": row.size,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in rows
+        ]
+
+
+    def get_text(self, chunk_id: int, revision: int) -> str:
+        """
+        Rebuilds the translation of a revision from the nearest earlier snapshot.
+
+        Raises:
+            ValueError: If the revision does not exist (or was pruned).
+        """
+        snapshot = db.session.execute(
+            select(func.max(ChunkRevision.revision)).where(
+                ChunkRevision.chunk_id == chunk_id,
+                ChunkRevision.revision <= revision,
+                ChunkRevision.is_snapshot.is_(True)
+            )
+        ).scalar()
+        rows = []
+        if snapshot is not None:
+            rows = db.session.execute(
+                select(ChunkRevision.revision, ChunkRevision.is_snapshot, ChunkRevision.content)
+                .where(
+                    ChunkRevision.chunk_id == chunk_id,
+                    ChunkRevision.revision >= snapshot,
+                    ChunkRevision.revision <= revision
+                )
+                .order_by(ChunkRevision.revision)
+            ).all()
+        if not rows or rows[-1].revision != revision:
+            raise ValueError(f"Revision {revision} not found")
+
+        text = ""
+        for row in rows:
+            content = zlib.decompress(row.content).decode("utf-8")
+            text = content if row.is_snapshot else apply_delta(text, json.loads(content))
+        return text
+
+
+    def diff(self, chunk_id: int, from_revision: int, to_revision: int) -> list:
+        """
+        Compares two revisions line by line.
+
+        Returns:
+            list[str]: Unified diff lines (empty if the texts are equal).
+
+        Raises:
+            ValueError: If either revision does not exist.
+        """
+        old = self.get_text(chunk_id, from_revision)
+        new = self.get_text(chunk_id, to_revision)
+        return list(difflib.unified_diff(
+            old.splitlines(), new.splitlines(),
+            fromfile=f"revision {from_revision}", tofile=f"revision {to_revision}", lineterm=""
+        ))
+
+
+    def _insert(self, chunk_id: int, revision: int, text: str, delta: list = None, snapshot: bool = False):
+        """Inserts a revision as a delta, or as a snapshot if requested or smaller. Prunes after snapshots."""
+        content = zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+        if delta is not None and not snapshot:
+            packed = zlib.compress(json.dumps(delta, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                                   COMPRESSION_LEVEL)
+            if len(packed) < len(content):
+                content = packed
+            else:
+                snapshot = True
+        else:
+            snapshot = True
+
+        db.session.execute(insert(ChunkRevision).values(
+            chunk_id=chunk_id,
+            revision=revision,
+            is_snapshot=snapshot,
+            content=content,
+            text_hash=text_hash(text),
+            size=len(text),
+            created_at=datetime.now()
+        ))
+        if snapshot:
+            self._prune(chunk_id, revision)
+
+
+    def _prune(self, chunk_id: int, latest: int):
+        """Deletes revisions older than the last snapshot that keeps `max_revisions` revisions."""
+        keep_from = db.session.execute(
+            select(func.max(ChunkRevision.revision)).where(
+                ChunkRevision.chunk_id == chunk_id,
+                ChunkRevision.is_snapshot.is_(True),
+                ChunkRevision.revision <= latest - self.max_revisions + 1
+            )
+        ).scalar()
+        if keep_from:
+            db.session.execute(
+                delete(ChunkRevision)
+                .where(ChunkRevision.chunk_id == chunk_id, ChunkRevision.revision < keep_from)
+                .execution_options(synchronize_session=False)
+            )
@@ -0,0 +1,202 @@
+"""
+search_service.py
+
+Full-text search over a user's documents: titles, original chunk text and
+chunk translations.
+
+- On MySQL, the FULLTEXT indexes of migration 0007 are used (MATCH ... AGAINST
+  in natural language mode). InnoDB keeps them up to date as chunks are
+  saved, so there is no separate index to maintain
+- Elsewhere (e.g. SQLite in development), chunks containing every search term
+  are found with LIKE and ranked by term counts in Python, over at most
+  FALLBACK_CANDIDATES of the newest matching chunks
+- Hits are chunks, ranked by relevance, with short snippets of the original
+  and the translation around the first matching term
+"""
+
+import re
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.mysql import match
+from app.extensions import db
+from app.models.db_models import Chunk, Document
+
+MAX_LIMIT = 50
+MAX_TERMS = 8
+FALLBACK_CANDIDATES = 1000
+SNIPPET_LENGTH = 160
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def search_terms(query: str) -> list:
+    """Splits a search query into lowercase terms (at most MAX_TERMS, 2+ characters each)."""
+    terms = []
+    for term in _TERM_PATTERN.findall(query.lower()):
+        if len(term) > 1 and term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def make_snippet(text: str, terms: list, length: int = SNIPPET_LENGTH) -> str:
+    """Returns about `length` characters of `text` around the first occurrence of a term."""
+    if not text:
+        return ""
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(positions) - length // 3) if positions else 0
+    end = min(len(text), start + length)
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class SearchService:
+    def search(self, user_id: int, query: str, page: int = 1, limit: int = 20) -> dict:
+        """
+        Searches a user's documents.
+
+        Args:
+            user_id (int): Owner of the documents.
+            query (str): Search text.
+            page (int): Page number, starting from 1.
+            limit (int): Hits per page (at most MAX_LIMIT).
+
+        Returns:
+            dict: {
+                "query", "page", "limit",
+                "total": number of matching chunks (at most FALLBACK_CANDIDATES without FULLTEXT),
+                "hits": [{"document_id", "title", "chunk_id", "chunk_number", "score",
+                          "original_snippet", "translation_snippet"}, ...],
+                "documents": documents whose title matches [{"document_id", "title"}] (first page only)
+            }
+
+        Raises:
+            ValueError: If the query has no searchable terms or paging is invalid.
+        """
+        terms = search_terms(query or "")
+        if not terms:
+            raise ValueError("Search query is empty")
+        if page < 1 or not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"page must be at least 1 and limit between 1 and {MAX_LIMIT}")
+
+        if db.session.get_bind().dialect.name == "mysql":
+            (total, ranked, documents) = self._search_fulltext(user_id, query, terms, page, limit)
+        else:
+            (total, ranked, documents) = self._search_like(user_id, terms, page, limit)
+
+        texts = {}
+        if ranked:
+            texts = {
+                row.id: row for row in db.session.execute(
+                    select(Chunk.id, Chunk.chunk_content, Chunk.final_chunk_translation)
+                    .where(Chunk.id.in_([hit["chunk_id"] for hit in ranked]))
+                )
+            }
+        for hit in ranked:
+            row = texts.get(hit["chunk_id"])
+            hit["original_snippet"] = make_snippet(row.chunk_content if row else "", terms)
+            hit["translation_snippet"] = make_snippet(row.final_chunk_translation if row else "", terms)
+
+        return {
+            "query": query,
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "hits": ranked,
+            "documents": documents if page == 1 else [],
+        }
+
+
+    def _search_fulltext(self, user_id: int, query: str, terms: list, page: int, limit: int):
+        """Ranks chunks and titles with the MySQL FULLTEXT indexes."""
+        score = match(Chunk.chunk_content, Chunk.final_chunk_translation, against=query).in_natural_language_mode()
+        matching = and_(Document.user_id == user_id, score > 0)
+
+        total = db.session.execute(
+            select(func.count(Chunk.id)).join(Document, Document.id == Chunk.document_id).where(matching)
+        ).scalar()
+        rows = db.session.execute(
+            select(Chunk.id, Chunk.chunk_number, Chunk.document_id, Document.title, score.label("score"))
+            .join(Document, Document.id == Chunk.document_id)
+            .where(matching)
+            .order_by(score.desc(), Chunk.id)
+            .limit(limit)
+            .offset((page - 1) * limit)
+        ).all()
+
+        documents = []
+        if page == 1:
+            title_score = match(Document.title, against=query).in_natural_language_mode()
+            documents = [
+                {"document_id": row.id, "title": row.title}
+                for row in db.session.execute(
+                    select(Document.id, Document.title)
+                    .where(Document.user_id == user_id, title_score > 0)
+                    .order_by(title_score.desc(), Document.id)
+                    .limit(limit)
+                )
+            ]
+
+        ranked = [
+            {
+                "document_id": row.document_id,
+                "title": row.title,
+                "chunk_id": row.id,
+                "chunk_number": row.chunk_number,
+                "score": round(float(row.score), 4),
+            }
+            for row in rows
+        ]
+        return total, ranked, documents
+
+
+    def _search_like(self, user_id: int, terms: list, page: int, limit: int):
+        """Fallback without FULLTEXT: LIKE filtering and term-count ranking."""
+        def contains(column, term):
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return column.ilike(f"%{escaped}%", escape="\\")
+
+        candidates = db.session.execute(
+            select(
+                Chunk.id, Chunk.chunk_number, Chunk.document_id, Document.title,
+                Chunk.chunk_content, Chunk.final_chunk_translation
+            )
+            .join(Document, Document.id == Chunk.document_id)
+            .where(
+                Document.user_id == user_id,
+                *(or_(contains(Chunk.chunk_content, term), contains(Chunk.final_chunk_translation, term))
+                  for term in terms)
+            )
+            .order_by(Chunk.id.desc())
+            .limit(FALLBACK_CANDIDATES)
+        ).all()
+
+        scored = []
+        for row in candidates:
+            text = f"{row.chunk_content}\n{row.final_chunk_translation or ''}".lower()
+            scored.append((sum(text.count(term) for term in terms), row))
+        scored.sort(key=lambda item: (-item[0], item[1].id))
+
+        start = (page - 1) * limit
+        ranked = [
+            {
+                "document_id": row.document_id,
+                "title": row.title,
+                "chunk_id": row.id,
+                "chunk_number": row.chunk_number,
+                "score": float(score),
+            }
+            for (score, row) in scored[start:start + limit]
+        ]
+
+        documents = []
+        if page == 1:
+            documents = [
+                {"document_id": row.id, "title": row.title}
+                for row in db.session.execute(
+                    select(Document.id, Document.title)
+                    .where(Document.user_id == user_id, *(contains(Document.title, term) for term in terms))
+                    .order_by(Document.id.desc())
+                    .limit(limit)
+                )
+            ]
+        return len(candidates), ranked, documents
@@ -0,0 +1,94 @@
+"""
+text_store.py
+
+Content-addressed storage for analytics texts.
+
+- Each distinct text is stored once in analytics_text, keyed by the SHA-256
+  hex digest of its UTF-8 bytes, and zlib-compressed
+- Prompts, dictionaries and chunk texts repeated across analytics rows
+  cost one 64-character reference each instead of a full copy
+- Empty texts are not stored (their reference is NULL)
+
+The functions take a session or a connection. Migration 0005 has its own
+copy of store_texts(), so changes here do not change the migration.
+"""
+
+import hashlib
+import zlib
+from datetime import datetime
+from sqlalchemy import insert, select
+from app.models.db_models import AnalyticsText
+
+COMPRESSION_LEVEL = 6
+
+# Hashes per IN (...) query
+_LOOKUP_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest used as a text's reference."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def store_texts(executor, texts) -> dict:
+    """
+    Stores texts that are not stored yet. Does not commit.
+
+    Args:
+        executor: SQLAlchemy session or connection.
+        texts (Iterable[str]): Texts to store; None and empty strings are skipped.
+
+    Returns:
+        dict: {text: hash} for every non-empty text.
+    """
+    hashes = {text: text_hash(text) for text in texts if text}
+    if not hashes:
+        return {}
+
+    wanted = set(hashes.values())
+    existing = set()
+    ordered = sorted(wanted)
+    for i in range(0, len(ordered), _LOOKUP_BATCH):
+        existing.update(executor.execute(
+            select(AnalyticsText.hash).where(AnalyticsText.hash.in_(ordered[i:i + _LOOKUP_BATCH]))
+        ).scalars())
+
+    now = datetime.now()
+    rows = [
+        {
+            "hash": digest,
+            "content": zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL),
+            "size": len(text.encode("utf-8")),
+            "created_at": now,
+        }
+        for (text, digest) in hashes.items() if digest not in existing
+    ]
+    if rows:
+        # Another worker may store the same text at the same time; the duplicate is ignored
+        executor.execute(
+            insert(AnalyticsText).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            rows
+        )
+    return hashes
+
+
+def load_texts(executor, hashes) -> dict:
+    """
+    Loads and decompresses stored texts.
+
+    Args:
+        executor: SQLAlchemy session or connection.
+        hashes (Iterable[str]): References; None values are skipped.
+
+    Returns:
+        dict: {hash: text} for the references found.
+    """
+    ordered = sorted({digest for digest in hashes if digest})
+    texts = {}
+    for i in range(0, len(ordered), _LOOKUP_BATCH):
+        for (digest, content) in executor.execute(
+            select(AnalyticsText.hash, AnalyticsText.content)
+            .where(AnalyticsText.hash.in_(ordered[i:i + _LOOKUP_BATCH]))
+        ):
+            texts[digest] = zlib.decompress(content).decode("utf-8")
+    return texts
@@ -0,0 +1,283 @@
+"""
+translation_memory_service.py
+
+Fuzzy translation memory: suggests final translations of a user's earlier
+chunks whose original text is similar to a new chunk.
+
+- Each chunk text is a vector of hashed character trigrams (scikit-learn's
+  HashingVectorizer, L2-normalized), so similarity is a cosine computed for all
+  of a user's translated chunks with one sparse matrix product
+- The vectorizer is stateless, so new and changed pairs are added to an index
+  without refitting: set_chunk_translation() calls record() and, once the
+  transaction commits, the pair is appended (its old row, if any, is masked
+  out). Changes of a rolled back transaction never reach the index
+- Indexes are built per user on the first query (vectorizing takes about a
+  second per 5000 chunks; later queries take milliseconds), kept for `ttl`
+  seconds and per process; another worker's saves show up when the index expires
+- Suggested chunks are re-read from the database, so deleted chunks and
+  cleared translations are never suggested and translations are current
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse as sp
+from flask import current_app
+from sklearn.feature_extraction.text import HashingVectorizer
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.db_models import Chunk, Document
+
+# Rows vectorized per batch while building an index
+_BUILD_BATCH = 1000
+
+# Session.info key of the index updates waiting for the transaction to commit
+_PENDING_KEY = "pending_translation_memory"
+
+_vectorizer = HashingVectorizer(
+    analyzer="char_wb",
+    ngram_range=(3, 3),
+    n_features=2 ** 18,
+    alternate_sign=False,
+    norm="l2",
+    lowercase=True,
+)
+
+
+def vectorize(texts: list):
+    """Returns the L2-normalized character n-gram vectors of texts as a CSR matrix."""
+    return _vectorizer.transform(texts).tocsr()
+
+
+class _UserIndex:
+    """Vectors of one user's translated chunks. Access is guarded by `lock`."""
+
+    def __init__(self, chunk_ids: list, matrix, expires: float):
+        self.lock = threading.Lock()
+        self.expires = expires
+        self.chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        self.matrix = matrix
+        self.alive = np.ones(len(chunk_ids), dtype=bool)
+        self.rows = {chunk_id: row for (row, chunk_id) in enumerate(chunk_ids)}
+        self.pending = []
+
+
+    def update(self, chunk_id: int, vector):
+        """Masks out a chunk's current row and queues its new vector (None removes the chunk)."""
+        row = self.rows.pop(chunk_id, None)
+        if row is not None:
+            self.alive[row] = False
+        self.pending = [(pending_id, pending) for (pending_id, pending) in self.pending if pending_id != chunk_id]
+        if vector is not None:
+            self.pending.append((chunk_id, vector))
+
+
+    def scores(self, vector):
+        """Returns (chunk_ids, cosine scores) of the live rows."""
+        self._apply_pending()
+        if not self.alive.any():
+            return self.chunk_ids[:0], np.zeros(0)
+        scores = (self.matrix @ vector.T).toarray().ravel()
+        return self.chunk_ids[self.alive], scores[self.alive]
+
+
+    def _apply_pending(self):
+        """Appends queued vectors to the matrix, dropping masked rows when they are the majority."""
+        if self.pending:
+            start = len(self.chunk_ids)
+            self.matrix = sp.vstack([self.matrix] + [vector for (_, vector) in self.pending], format="csr")
+            self.chunk_ids = np.concatenate([self.chunk_ids, [chunk_id for (chunk_id, _) in self.pending]])
+            self.alive = np.concatenate([self.alive, np.ones(len(self.pending), dtype=bool)])
+            for (offset, (chunk_id, _)) in enumerate(self.pending):
+                self.rows[chunk_id] = start + offset
+            self.pending = []
+
+        if (~self.alive).sum() > len(self.alive) // 2:
+            self.matrix = self.matrix[self.alive]
+            self.chunk_ids = self.chunk_ids[self.alive]
+            self.alive = np.ones(len(self.chunk_ids), dtype=bool)
+            self.rows = {int(chunk_id): row for (row, chunk_id) in enumerate(self.chunk_ids)}
+
+
+class TranslationMemoryService:
+    def __init__(self, ttl: float = 600.0, max_users: int = 50):
+        """
+        Initializes the translation memory.
+
+        Args:
+            ttl (float): Seconds a user's index is kept before it is rebuilt.
+            max_users (int): Indexes kept per process; the least recently used is dropped.
+        """
+        self.ttl = ttl
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_soft_rollback", self._on_rollback)
+
+
+    def suggest(self, user_id: int, text: str, k: int = 5, threshold: float = 0.6,
+                exclude_chunk_id: int = None) -> list:
+        """
+        Finds the user's translated chunks most similar to a text.
+
+        Args:
+            user_id (int): Owner of the translation memory.
+            text (str): Original text to match.
+            k (int): Maximum number of suggestions.
+            threshold (float): Minimum cosine similarity (0-1).
+            exclude_chunk_id (int): Chunk left out of the results, e.g. the one being translated.
+
+        Returns:
+            list[dict]: Suggestions, best first: [{"chunk_id", "document_id", "chunk_number",
+            "score", "chunk_content", "final_chunk_translation"}, ...]
+        """
+        if not text or not text.strip():
+            return []
+
+        index = self._index(user_id)
+        with index.lock:
+            (chunk_ids, scores) = index.scores(vectorize([text]))
+
+        keep = scores >= threshold
+        if exclude_chunk_id is not None:
+            keep &= chunk_ids != exclude_chunk_id
+        (chunk_ids, scores) = (chunk_ids[keep], scores[keep])
+        # A few extra candidates, in case some were deleted meanwhile
+        count = min(len(scores), k * 2)
+        if count == 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        rows = {
+            row.id: row for row in db.session.execute(
+                select(
+                    Chunk.id, Chunk.document_id, Chunk.chunk_number,
+                    Chunk.chunk_content, Chunk.final_chunk_translation
+                )
+                .join(Document, Document.id == Chunk.document_id)
+                .where(Chunk.id.in_([int(chunk_ids[i]) for i in top]), Document.user_id == user_id)
+            )
+        }
+
+        suggestions = []
+        for i in top:
+            row = rows.get(int(chunk_ids[i]))
+            if row is None or not row.final_chunk_translation:
+                continue
+            suggestions.append({
+                "chunk_id": row.id,
+                "document_id": row.document_id,
+                "chunk_number": row.chunk_number,
+                "score": round(float(scores[i]), 4),
+                "chunk_content": row.chunk_content,
+                "final_chunk_translation": row.final_chunk_translation,
+            })
+            if len(suggestions) == k:
+                break
+        return suggestions
+
+
+    def record(self, chunk: Chunk, translation: str):
+        """
+        Adds, updates or (with an empty translation) removes a chunk in its owner's index
+        when the current transaction commits. Does nothing unless the owner's index is
+        loaded in this process.
+
+        Args:
+            chunk (Chunk): The chunk whose translation was saved.
+            translation (str): Final translation of the chunk.
+        """
+        if not self._indexes:
+            return
+        # Looked up now: no SQL can be run once the transaction has committed
+        owner = current_app.ownership_service.chunk_owner(chunk.id)
+        if owner is None:
+            return
+        content = chunk.chunk_content if translation else None
+        db.session.info.setdefault(_PENDING_KEY, {})[chunk.id] = (owner[0], content)
+
+
+    def _on_commit(self, session):
+        """Applies the index updates of the transaction that just committed."""
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+        for (chunk_id, (user_id, content)) in pending.items():
+            with self._lock:
+                index = self._indexes.get(user_id)
+            if index is None:
+                continue
+            vector = vectorize([content]) if content else None
+            with index.lock:
+                index.update(chunk_id, vector)
+
+
+    def _on_rollback(self, session, previous_transaction):
+        """Forgets the index updates of a rolled back transaction."""
+        if previous_transaction.parent is None:
+            session.info.pop(_PENDING_KEY, None)
+
+
+    def invalidate_user(self, user_id: int):
+        """Drops a user's index, e.g. after their documents were deleted."""
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+    def _index(self, user_id: int) -> _UserIndex:
+        """Returns the user's index, building it if missing or expired."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.expires >= time.monotonic():
+                self._indexes.move_to_end(user_id)
+                return index
+
+        # Built without the lock; if two requests race, the last one is kept
+        index = self._build(user_id)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+
+    def _build(self, user_id: int) -> _UserIndex:
+        """Vectorizes all translated chunks of a user, reading the original texts in batches."""
+        chunk_ids = []
+        matrices = []
+        batch_ids = []
+        batch_texts = []
+
+        def flush():
+            chunk_ids.extend(batch_ids)
+            matrices.append(vectorize(batch_texts))
+            batch_ids.clear()
+            batch_texts.clear()
+
+        result = db.session.execute(
+            select(Chunk.id, Chunk.chunk_content)
+            .join(Document, Document.id == Chunk.document_id)
+            .where(
+                Document.user_id == user_id,
+                Chunk.final_chunk_translation.is_not(None),
+                Chunk.final_chunk_translation != ""
+            )
+            .order_by(Chunk.id)
+            .execution_options(yield_per=_BUILD_BATCH)
+        )
+        for (chunk_id, content) in result:
+            if content:
+                batch_ids.append(chunk_id)
+                batch_texts.append(content)
+            if len(batch_ids) >= _BUILD_BATCH:
+                flush()
+        if batch_ids:
+            flush()
+
+        matrix = sp.vstack(matrices, format="csr") if matrices else sp.csr_matrix((0, _vectorizer.n_features))
+        return _UserIndex(chunk_ids, matrix, time.monotonic() + self.ttl)
@@ -2,22 +2,27 @@
 translation_service.py
 
 Provides translation functionality using OpenAI GPT and DeepL.
-Supports both plain text and document translation, with user-specific prompt customization.
+Supports plain text translation with user-specific prompt customization.
+Document translation runs as background jobs in deepl_job_service.py.
 """
 
 from openai import OpenAI
 import deepl
 from flask import current_app
-from io import BytesIO
-import os
-from pathlib import Path
 from app.models.db_models import UserSettings
 from app.utils.default_prompts import (
     GPT_MODEL,
     INITIAL_PROMPT,
     CONVERSATION_HISTORY_PROMPT,
     USER_PROMPT_INSTRUCTIONS,
-    DICTIONARY_INSTRUCTIONS
+    DICTIONARY_INSTRUCTIONS,
+    PLACEHOLDER_INSTRUCTIONS
+)
+from app.utils.latex_tokenizer import (
+    XML_PLACEHOLDER_TAG,
+    has_placeholders,
+    placeholders_from_xml,
+    placeholders_to_xml
 )
 
 
@@ -103,6 +108,9 @@ class TranslationService:
       # Fallback to normal translation
       messages.append({"role": "user", "content": prompt})
 
+    if prompt and has_placeholders(prompt):
+      messages.append({"role": "system", "content": PLACEHOLDER_INSTRUCTIONS})
+
 
     # Extract dictionaries and custom prompts
     dictionary = (user_prompts or {}).get("dictionary") or []
@@ -145,6 +153,8 @@ class TranslationService:
     """
     Translate a plain text string using DeepL.
 
+    LaTeX placeholders ({{n}}) are sent as ignored XML tags, so DeepL keeps them.
+
     Args:
         text (str): Text to translate.
 
@@ -152,78 +162,16 @@ class TranslationService:
         str: Translated text.
     """
     try:
+      if has_placeholders(text):
+        result = self.deepl_translator.translate_text(
+          placeholders_to_xml(text),
+          target_lang="EN-GB",
+          tag_handling="xml",
+          ignore_tags=[XML_PLACEHOLDER_TAG]
+        )
+        return placeholders_from_xml(result.text)
       result = self.deepl_translator.translate_text(text, target_lang="EN-GB")
       return result.text
     except Exception as e:
       current_app.logger.error(f"DeepL translation error: {e}")
       raise
-
-
-  def handle_temp_file(self, byte_stream: bytes, filename):
-    """
-    Saves a byte stream to a temporary file and returns the path.
-
-    Args:
-        byte_stream (bytes): File content.
-        filename (str): Desired filename.
-
-    Returns:
-        str: Path to temporary file.
-    """
-    # Resolve relative path to /app/temp from current file location
-    base_path = Path(__file__).resolve().parent  # current file's directory
-    folder_path = base_path / "temp"             # relative to that
-
-    # Ensure folder exists
-    folder_path.mkdir(parents=True, exist_ok=True)
-
-    file_path = folder_path / filename
-   
-    # Write the file
-    with open(file_path, "wb") as f:
-        f.write(byte_stream)
-    print(f"Temp file written: {file_path}")
-    return file_path  
-  
- 
-  def deepl_translate_document(self, file_stream: bytes, filename: str):
-    """
-    Uses DeepL to translate an uploaded document file.
-
-    Args:
-        file_stream (bytes): Original file content.
-        filename (str): Name of the uploaded file.
-
-    Returns:
-        BytesIO or None: Translated file as byte stream or None on failure.
-    """
-
-    try:
-      # Uploads and translates the document
-      path = self.handle_temp_file(file_stream, filename)
-      output_path = filename +"_translated.docx"
-
-      self.deepl_translator.translate_document(
-        input_document = open(path, "rb"), 
-        output_document = open(output_path, "wb"), 
-        filename=filename,             
-        target_lang="EN-US",
-        source_lang="FI",
-        output_format="docx"
-      )
-
-      with open(output_path, "rb") as f:
-        buffer = BytesIO(f.read())
-
-      # Removes temporary files
-      os.remove(path)
-      os.remove(output_path)
-      return buffer
-    
-    except Exception as e:
-        current_app.logger.error(f"DeepL document translation failed: {e}")
-        return None
-    
-    
-    
-    
\ No newline at end of file
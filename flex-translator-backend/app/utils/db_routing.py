@@ -0,0 +1,123 @@
+"""
+db_routing.py
+
+Read/write splitting between the primary database and an optional read replica.
+
+- The replica is the "replica" bind in SQLALCHEMY_BINDS (see Config.DB_REPLICA_URI);
+  without it everything uses the primary
+- Only SELECTs made inside routes decorated with @read_only go to the replica.
+  Writes, SELECT ... FOR UPDATE and every read after a write in the same
+  request use the primary
+- Read-your-writes: a request that writes sets a short-lived cookie, and reads
+  from the same browser stay on the primary until it expires, so users do not
+  see replica lag on their own changes
+- If the replica fails, it is skipped for REPLICA_RETRY_SECONDS and the
+  failing read is retried on the primary
+"""
+
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+STICKY_COOKIE = "db_primary_until"
+
+# time.monotonic() until which the replica is skipped after a failure
+_replica_down_until = 0.0
+
+
+class RoutingSession(Session):
+    """Session that sends the SELECTs of read-only requests to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if isinstance(clause, UpdateBase) or self._flushing:
+                g.db_wrote = True
+            elif (isinstance(clause, Select) and clause._for_update_arg is None
+                  and g.get("db_read_only") and not g.get("db_wrote")):
+                engine = self._db.engines.get(REPLICA_BIND)
+                if engine is not None and _replica_up():
+                    g.db_used_replica = True
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_up() -> bool:
+    return time.monotonic() >= _replica_down_until
+
+
+def _mark_replica_down():
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + current_app.config["REPLICA_RETRY_SECONDS"]
+
+
+def _sticky_to_primary() -> bool:
+    """True if this browser wrote recently and must read from the primary."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_only(func):
+    """
+    Decorator for routes that only read: their SELECTs use the read replica
+    when one is configured and reachable, and the user has not written recently.
+
+    If a replica query fails, the route is run again on the primary.
+    Place it below @require_user_access, so ownership is checked on the primary.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        db = current_app.extensions["sqlalchemy"]
+        if REPLICA_BIND not in db.engines or not _replica_up() or _sticky_to_primary():
+            return func(*args, **kwargs)
+
+        g.db_read_only = True
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as e:
+            if not g.get("db_used_replica"):
+                raise
+            current_app.logger.warning(f"Read replica failed, using the primary: {e}")
+            _mark_replica_down()
+            db.session.rollback()
+            g.db_read_only = False
+            return func(*args, **kwargs)
+        finally:
+            g.db_read_only = False
+
+    return wrapper
+
+
+def init_app(app, db):
+    """
+    Sets the read-your-writes cookie after writing requests and watches the
+    replica for failures. Call after db.init_app(app).
+    """
+    with app.app_context():
+        replica = db.engines.get(REPLICA_BIND)
+    if replica is None:
+        return
+
+    @event.listens_for(replica, "handle_error")
+    def _replica_error(context):
+        # Route handlers may swallow the exception, so mark the replica down here too
+        if isinstance(context.sqlalchemy_exception, OperationalError):
+            global _replica_down_until
+            _replica_down_until = time.monotonic() + app.config["REPLICA_RETRY_SECONDS"]
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get("db_wrote"):
+            seconds = app.config["REPLICA_STICKY_SECONDS"]
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite="Lax"
+            )
+        return response
@@ -25,3 +25,9 @@ USER_PROMPT_INSTRUCTIONS = (
 DICTIONARY_INSTRUCTIONS = (
     "Here are words that I want you to use over these:"
 )
+
+# Added for chunks of LaTeX sources, where markup is replaced by placeholders like {{3}}
+PLACEHOLDER_INSTRUCTIONS = (
+    "The text contains placeholders like {{3}}. Keep every placeholder exactly as it is, "
+    "in the same position relative to the words around it, and do not add new ones."
+)
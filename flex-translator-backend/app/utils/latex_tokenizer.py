@@ -0,0 +1,227 @@
+"""
+latex_tokenizer.py
+
+Splits LaTeX sources into translatable text and protected markup in a single pass.
+
+- The tokenizer walks the source once with one combined regex, so ingestion is
+  linear in the size of the file
+- Preamble, comments, math, code and tabular environments, commands and braces
+  are protected and replaced with numbered placeholders like {{3}}
+- Adjacent markup on the same line shares one placeholder, so translators see
+  prose with as few placeholders as possible
+- After translation the placeholders are restored from the original source
+- For DeepL, placeholders are sent as ignored XML tags (<ph>3</ph>), which
+  DeepL keeps as they are
+"""
+
+import re
+from xml.sax.saxutils import escape, unescape
+
+# Environments kept as-is, including their body
+PROTECTED_ENVIRONMENTS = (
+    "verbatim", "Verbatim", "lstlisting", "minted", "comment",
+    "tabular", "tabularx", "longtable", "tikzpicture",
+    "equation", "align", "alignat", "gather", "multline", "flalign",
+    "eqnarray", "displaymath", "math"
+)
+
+# Commands whose first N brace arguments are not prose (None = all of them)
+ARGUMENT_COMMANDS = {
+    "begin": None, "end": 1,
+    "label": 1, "ref": 1, "eqref": 1, "pageref": 1, "autoref": 1, "cref": 1, "Cref": 1,
+    "cite": 1, "citep": 1, "citet": 1, "nocite": 1,
+    "url": 1, "href": 1, "includegraphics": 1,
+    "input": 1, "include": 1, "usepackage": 1, "documentclass": 1,
+    "bibliography": 1, "bibliographystyle": 1,
+    "hspace": 1, "vspace": 1, "setlength": 2, "setcounter": 2, "addtocounter": 2,
+    "newcommand": None, "renewcommand": None, "providecommand": None,
+    "newenvironment": None, "renewenvironment": None, "definecolor": 3, "textcolor": 1,
+    "color": 1, "pagestyle": 1, "thispagestyle": 1, "graphicspath": 1
+}
+
+# Paragraph breaks (blank lines) are not allowed inside math, so math
+# tokens never extend past one; an unclosed "$" only scans one paragraph
+_MATH_BODY = r"(?:[^\n]|\n(?![ \t]*\n))*?"
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<preamble>\A[\s\S]*?\\begin\{document\})"
+    r"|(?P<postamble>\\end\{document\}[\s\S]*)"
+    r"|(?P<comment>%[^\n]*)"
+    r"|(?P<environment>\\begin\{(?P<env>" + "|".join(PROTECTED_ENVIRONMENTS) + r")(?P<star>\*?)\}"
+    r"[\s\S]*?\\end\{(?P=env)(?P=star)\})"
+    r"|(?P<display_math>\$\$" + _MATH_BODY + r"\$\$|\\\[" + _MATH_BODY + r"\\\])"
+    r"|(?P<inline_math>\\\(" + _MATH_BODY + r"\\\)|\$(?:\\.|[^$\\\n]|\n(?![ \t]*\n))+\$)"
+    r"|(?P<verb>\\verb\*?(?P<delimiter>[^a-zA-Z\s*])[^\n]*?(?P=delimiter))"
+    r"|(?P<command>\\(?:(?P<name>[a-zA-Z@]+)\*?(?:[ \t]*\[[^\]\n]*\])*|[\s\S]))"
+    r"|(?P<markup>[{}~])"
+    r"|(?P<text>[^\\%${}~]+)"
+    r"|(?P<other>[\s\S])"
+)
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{(\d+)\}\}")
+_XML_PLACEHOLDER_PATTERN = re.compile(r"<ph>\s*(\d+)\s*</ph>")
+
+# Tag of placeholders sent to DeepL with tag_handling="xml" and ignore_tags
+XML_PLACEHOLDER_TAG = "ph"
+
+TEXT_KINDS = ("text", "other")
+
+
+def _skip_arguments(source: str, pos: int, count) -> int:
+    """
+    Returns the position after the next `count` brace arguments starting at `pos`
+    (all consecutive ones if `count` is None). Whitespace between them is skipped.
+    """
+    length = len(source)
+    while count is None or count > 0:
+        start = pos
+        while start < length and source[start] in " \t":
+            start += 1
+        if start < length and source[start] == "[":
+            close = source.find("]", start)
+            if close == -1:
+                break
+            pos = close + 1
+            continue
+        if start >= length or source[start] != "{":
+            break
+
+        depth = 0
+        end = start
+        while end < length:
+            char = source[end]
+            if char == "\\":
+                end += 2
+                continue
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            end += 1
+        if depth != 0:
+            break
+        pos = end + 1
+        if count is not None:
+            count -= 1
+    return pos
+
+
+def tokenize_latex(source: str):
+    """
+    Splits a LaTeX source into tokens in one left-to-right pass.
+
+    Args:
+        source (str): LaTeX source.
+
+    Yields:
+        (kind, token): Token kind (e.g. "text", "comment", "inline_math", "command")
+        and its exact source text. Joining the tokens gives back the source.
+    """
+    pos = 0
+    length = len(source)
+    while pos < length:
+        match = _TOKEN_PATTERN.match(source, pos)
+        # The outer group of the matching alternative closes last, so it names the kind
+        kind = match.lastgroup
+        end = match.end()
+        if kind == "command" and match.group("name") in ARGUMENT_COMMANDS:
+            end = _skip_arguments(source, end, ARGUMENT_COMMANDS[match.group("name")])
+
+        yield kind, source[pos:end]
+        pos = end
+
+
+def protect_latex(source: str):
+    """
+    Replaces every non-translatable part of a LaTeX source with a placeholder.
+
+    Markup tokens separated only by spaces or tabs are merged into one placeholder.
+    Line breaks in translatable text are kept, so the result can be chunked by lines.
+
+    Args:
+        source (str): LaTeX source.
+
+    Returns:
+        tuple: (text with "{{n}}" placeholders, list of protected source strings
+        where index n belongs to placeholder {{n}})
+    """
+    parts = []
+    placeholders = []
+    pending = []
+
+    def flush():
+        trailing = []
+        while pending and not pending[-1][0]:
+            trailing.append(pending.pop()[1])
+        if pending:
+            parts.append("{{%d}}" % len(placeholders))
+            placeholders.append("".join(token for (_, token) in pending))
+            pending.clear()
+        parts.extend(reversed(trailing))
+
+    for kind, token in tokenize_latex(source):
+        if kind not in TEXT_KINDS:
+            pending.append((True, token))
+        elif pending and not token.strip(" \t"):
+            # Whitespace between markup tokens, merged if more markup follows
+            pending.append((False, token))
+        else:
+            flush()
+            parts.append(token)
+    flush()
+
+    return "".join(parts), placeholders
+
+
+def restore_latex(text: str, placeholders: list):
+    """
+    Puts the protected LaTeX back in place of the placeholders of a translated text.
+
+    Args:
+        text (str): Translated text with "{{n}}" placeholders.
+        placeholders (list): Protected source strings from `protect_latex`.
+
+    Returns:
+        tuple: (restored LaTeX, list of placeholder numbers missing from the text)
+    """
+    used = set()
+
+    def substitute(match):
+        index = int(match.group(1))
+        if index >= len(placeholders):
+            return match.group(0)
+        used.add(index)
+        return placeholders[index]
+
+    restored = _PLACEHOLDER_PATTERN.sub(substitute, text)
+    missing = [index for index in range(len(placeholders)) if index not in used]
+    return restored, missing
+
+
+def has_placeholders(text: str) -> bool:
+    """Returns True if the text contains LaTeX placeholders."""
+    return _PLACEHOLDER_PATTERN.search(text) is not None
+
+
+def placeholders_to_xml(text: str) -> str:
+    """Escapes a text for DeepL's XML tag handling and turns its placeholders into <ph>n</ph> tags."""
+    return _PLACEHOLDER_PATTERN.sub(r"<ph>\1</ph>", escape(text))
+
+
+def placeholders_from_xml(text: str) -> str:
+    """Reverses placeholders_to_xml() on a translated text."""
+    return unescape(_XML_PLACEHOLDER_PATTERN.sub(r"{{\1}}", text))
+
+
+def missing_placeholders(source: str, translation: str) -> list:
+    """
+    Returns the placeholder numbers of a source text that its translation lacks.
+
+    Args:
+        source (str): Text with "{{n}}" placeholders (e.g. a chunk).
+        translation (str): Its translation.
+    """
+    kept = {int(number) for number in _PLACEHOLDER_PATTERN.findall(translation or "")}
+    return sorted({int(number) for number in _PLACEHOLDER_PATTERN.findall(source or "")} - kept)
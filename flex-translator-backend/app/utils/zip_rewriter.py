@@ -0,0 +1,164 @@
+"""
+zip_rewriter.py
+
+Rewrites ZIP archives (DOCX, PPTX) while re-encoding only the modified members.
+
+Unchanged members are copied as their original compressed bytes, so images and
+other large parts are never inflated or deflated again. The output only needs a
+`write` method, so it can be a response stream, a spooled temp file or a cache file.
+"""
+
+import struct
+import zipfile
+import zlib
+
+# Struct layouts from the ZIP specification (same as in the zipfile module)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_OF_CENTRAL_DIR = struct.Struct("<4s4H2LH")
+
+_DATA_DESCRIPTOR_FLAG = 0x08
+_UTF8_FLAG = 0x800
+_ZIP64_LIMIT = 0xFFFFFFFF
+_COPY_BUFFER_SIZE = 64 * 1024
+
+
+def rewrite_zip(source, replacements: dict, output):
+    """
+    Copies the ZIP archive `source` into `output`, replacing the given members.
+
+    Args:
+        source: Seekable binary file-like object of the original archive.
+        replacements (dict): Mapping of member name -> new uncompressed bytes.
+        output: Binary file-like object with a `write` method.
+
+    Returns:
+        The `output` object.
+    """
+    with zipfile.ZipFile(source) as zin:
+        infos = zin.infolist()
+        if len(infos) >= 0xFFFF or any(_needs_zip64(info) for info in infos):
+            # Rare for office documents; let zipfile handle the ZIP64 records
+            return _rewrite_with_zipfile(zin, replacements, output)
+
+        writer = _RawZipWriter(output)
+        for info in infos:
+            if info.filename in replacements:
+                writer.write_deflated(info, replacements[info.filename])
+            else:
+                writer.copy_raw(source, info)
+        writer.finish(zin.comment)
+
+    return output
+
+
+def _needs_zip64(info: zipfile.ZipInfo) -> bool:
+    return (
+        info.file_size >= _ZIP64_LIMIT
+        or info.compress_size >= _ZIP64_LIMIT
+        or info.header_offset >= _ZIP64_LIMIT
+    )
+
+
+def _rewrite_with_zipfile(zin: zipfile.ZipFile, replacements: dict, output):
+    """Fallback that re-encodes every member with the zipfile module."""
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as out:
+        for info in zin.infolist():
+            data = replacements.get(info.filename)
+            if data is None:
+                data = zin.read(info.filename)
+            out.writestr(info, data, compress_type=info.compress_type)
+    return output
+
+
+def _dos_datetime(date_time: tuple):
+    (year, month, day, hour, minute, second) = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | (second // 2)
+    return dos_time, dos_date
+
+
+def _encode_filename(info: zipfile.ZipInfo):
+    try:
+        return info.filename.encode("ascii"), info.flag_bits & ~_UTF8_FLAG
+    except UnicodeEncodeError:
+        return info.filename.encode("utf-8"), info.flag_bits | _UTF8_FLAG
+
+
+class _RawZipWriter:
+    """Minimal ZIP writer that takes already-compressed member data."""
+
+    def __init__(self, output):
+        self.output = output
+        self.offset = 0
+        self.central_directory = []
+
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.offset += len(data)
+
+
+    def _write_local_header(self, info: zipfile.ZipInfo, method: int, crc: int,
+                            compress_size: int, file_size: int):
+        name, flags = _encode_filename(info)
+        # Sizes are known up front, so no trailing data descriptor is written
+        flags &= ~_DATA_DESCRIPTOR_FLAG
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        version = max(info.extract_version, 20)
+        header_offset = self.offset
+
+        self._write(_LOCAL_HEADER.pack(
+            b"PK\x03\x04", version, 0, flags, method, dos_time, dos_date,
+            crc, compress_size, file_size, len(name), 0
+        ))
+        self._write(name)
+
+        self.central_directory.append(_CENTRAL_HEADER.pack(
+            b"PK\x01\x02", info.create_version, info.create_system, version, 0,
+            flags, method, dos_time, dos_date, crc, compress_size, file_size,
+            len(name), 0, 0, 0, info.internal_attr, info.external_attr, header_offset
+        ) + name)
+
+
+    def copy_raw(self, source, info: zipfile.ZipInfo):
+        """Copies a member's compressed bytes from `source` without decoding them."""
+        source.seek(info.header_offset)
+        header = _LOCAL_HEADER.unpack(source.read(_LOCAL_HEADER.size))
+        if header[0] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+        (name_length, extra_length) = header[10], header[11]
+        source.seek(name_length + extra_length, 1)
+
+        self._write_local_header(info, info.compress_type, info.CRC, info.compress_size, info.file_size)
+
+        remaining = info.compress_size
+        while remaining > 0:
+            block = source.read(min(_COPY_BUFFER_SIZE, remaining))
+            if not block:
+                raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+            self._write(block)
+            remaining -= len(block)
+
+
+    def write_deflated(self, info: zipfile.ZipInfo, data: bytes):
+        """Deflates `data` and writes it as the new content of member `info`."""
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        self._write_local_header(info, zipfile.ZIP_DEFLATED, zlib.crc32(data), len(compressed), len(data))
+        self._write(compressed)
+
+
+    def finish(self, comment: bytes = b""):
+        """Writes the central directory and the end-of-central-directory record."""
+        central_offset = self.offset
+        for entry in self.central_directory:
+            self._write(entry)
+        central_size = self.offset - central_offset
+        count = len(self.central_directory)
+
+        comment = comment[:0xFFFF]
+        self._write(_END_OF_CENTRAL_DIR.pack(
+            b"PK\x05\x06", 0, 0, count, count, central_size, central_offset, len(comment)
+        ))
+        self._write(comment)
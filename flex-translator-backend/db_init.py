@@ -3,15 +3,15 @@ from sqlalchemy import text
 from app import create_app
 from app.extensions import db
 from app.models.db_models import User
+from app import migrations
 
 def db_init():
     """Initializes the database and inserts a test user."""
     app = create_app()
 
     with app.app_context():
-        # Create tables based on SQLAlchemy models
-        db.create_all()
-        print("Tables created (or already existed).")
+        # Create missing tables and apply pending schema migrations
+        migrations.upgrade(db.engine)
 
         # Insert a test user if not already present
         if not User.query.filter_by(email="testi@utu.fi").first():
@@ -0,0 +1,105 @@
+"""
+benchmark_docx_replacement.py
+
+Compares the old per-node loop over every (old, new) pair against the
+single-pass replacer used by `pdf_service.translate_text` and the
+positional injection used by `pdf_service.inject_translations`.
+
+Builds a synthetic DOCX with roughly 200 pages of text, translates every
+extracted segment and times both approaches on `word/document.xml`.
+
+Run from the backend root: `python -m scripts.benchmark_docx_replacement`
+"""
+
+import base64
+import time
+import zipfile
+from io import BytesIO
+from lxml import etree
+from app.services.pdf_service import (
+    compile_replacements,
+    extract_text_from_pdf,
+    inject_translations,
+    iter_segment_positions,
+    map_translation_to_segments,
+    translate_text
+)
+
+PAGES = 200
+PARAGRAPHS_PER_PAGE = 30
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def build_docx(pages: int):
+    """Builds a minimal DOCX with `pages` * PARAGRAPHS_PER_PAGE unique paragraphs."""
+    paragraphs = []
+    for i in range(pages * PARAGRAPHS_PER_PAGE):
+        text = f"Tehtävä {i}: lue kappale {i % 97} ja vastaa kysymykseen numero {i}."
+        paragraphs.append(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>")
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{W_NS}"><w:body>{"".join(paragraphs)}</w:body></w:document>'
+    )
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", "<Types/>")
+        docx.writestr("word/document.xml", xml)
+    return "b64" + base64.b64encode(buffer.getvalue()).decode("ascii"), xml.encode("utf-8")
+
+
+def legacy_replace(xml: bytes, translations: dict):
+    """The previous implementation: every node is checked against every pair."""
+    translation_array = sorted(translations.items(), key=lambda x: len(x[0]), reverse=True)
+    xml_tree = etree.fromstring(xml)
+    for node in xml_tree.iter():
+        if node.text:
+            for (old, new) in translation_array:
+                if old in node.text:
+                    node.text = node.text.replace(old, new)
+    return etree.tostring(xml_tree)
+
+
+def single_pass_replace(xml: bytes, translations: dict):
+    replace = compile_replacements(translations)
+    xml_tree = etree.fromstring(xml)
+    for node in xml_tree.iter():
+        if node.text:
+            node.text = replace(node.text)
+    return etree.tostring(xml_tree)
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:8.3f} s")
+    return result, elapsed
+
+
+def main():
+    b64_docx, xml = build_docx(PAGES)
+    segments = [line.replace("<word>", "") for line in extract_text_from_pdf(b64_docx).split("\n")]
+    translations = {segment: segment.upper() for segment in segments}
+    print(f"{PAGES} pages, {len(segments)} segments")
+
+    legacy, legacy_time = timed("legacy (nodes x segments)", legacy_replace, xml, translations)
+    single, single_time = timed("single-pass replacer", single_pass_replace, xml, translations)
+    timed("translate_text (full DOCX)", translate_text, b64_docx, translations)
+
+    final_translation = "\n".join(segment.upper() for segment in segments)
+    segment_positions = list(iter_segment_positions(b64_docx))
+    (positions, mismatched), _ = timed(
+        "segment map", map_translation_to_segments,
+        segment_positions, [(len(segment_positions), final_translation)]
+    )
+    timed("inject_translations", inject_translations, b64_docx, positions)
+
+    assert not mismatched, "Translated lines do not match the segments"
+
+    assert legacy == single, "Replacement results differ"
+    print(f"speedup: {legacy_time / single_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+check_query_plans.py
+
+Checks that the hot queries use the composite indexes added in migrations
+0003_hot_path_indexes and 0004_document_list_indexes. It runs EXPLAIN
+(MySQL) or EXPLAIN QUERY PLAN (SQLite) for each query and compares the
+chosen index with the expected one.
+
+The database must be migrated first. On nearly empty tables the planner
+may prefer a full scan, so run this against a database with real data.
+The script exits with status 1 if any query does not use its index.
+
+Run from the backend root: `python -m scripts.check_query_plans`
+"""
+
+import sys
+from sqlalchemy import select, text
+from app import create_app
+from app.extensions import db
+from app.models.db_models import Analytics, Chunk, Document, Group, User
+
+# (description, query, expected index)
+HOT_QUERIES = (
+    (
+        "chunks of a document in order",
+        select(Chunk.id).where(Chunk.document_id == 1).order_by(Chunk.chunk_number),
+        "ix_chunk_document_id_chunk_number",
+    ),
+    (
+        "documents of a user by modification date",
+        select(Document.id, Document.title).where(Document.user_id == 1).order_by(Document.modified_at.desc()),
+        "ix_document_user_id_modified_at",
+    ),
+    (
+        "documents of a user by creation date",
+        select(Document.id, Document.title).where(Document.user_id == 1).order_by(Document.created_at.desc()),
+        "ix_document_user_id_created_at",
+    ),
+    (
+        "documents of a user by name",
+        select(Document.id, Document.title).where(Document.user_id == 1).order_by(Document.title),
+        "ix_document_user_id_title",
+    ),
+    (
+        "analytics of a user by time",
+        select(Analytics.id).where(Analytics.user_id == 1).order_by(Analytics.created_at),
+        "ix_analytics_user_id_created_at",
+    ),
+    (
+        "analytics of a document",
+        select(Analytics.id).where(Analytics.document_id == 1),
+        "ix_analytics_document_id",
+    ),
+    (
+        "groups of a user",
+        select(Group.id).where(Group.user_id == 1),
+        "ix_groups_user_id",
+    ),
+    (
+        "user by email",
+        select(User.id).where(User.email == "testi@utu.fi"),
+        "ix_user_email",
+    ),
+)
+
+
+def explain(conn, query) -> str:
+    """Returns the query plan of `query` as text."""
+    sql = str(query.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+        return " | ".join(row[-1] for row in rows)
+    rows = conn.execute(text("EXPLAIN " + sql)).mappings().all()
+    return " | ".join(f"{row['table']}: key={row['key']} ({row['type']})" for row in rows)
+
+
+def main() -> int:
+    app = create_app()
+    failures = 0
+    with app.app_context(), db.engine.connect() as conn:
+        for (description, query, index) in HOT_QUERIES:
+            plan = explain(conn, query)
+            ok = index in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description}: {plan}")
+
+    print(f"{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} queries use their index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,28 @@ import { DocumentMinimal, Document } from '../types/types';
 
 export class DocumentNotFoundError extends Error {}
 
-/** GET /documents/user/:userId */
-export async function fetchDocumentsByUserId(userId: number): Promise<DocumentMinimal[]> {
+const DOCUMENTS_PAGE_SIZE = 200;
+
+/**
+ * GET /documents/user/:userId
+ * Fetches all documents page by page, following the X-Next-Cursor header.
+ */
+export async function fetchDocumentsByUserId(
+  userId: number,
+  sort: 'date' | 'modified' | 'name' = 'date',
+  order: 'asc' | 'desc' = 'desc'
+): Promise<DocumentMinimal[]> {
   try {
-    const response = await apiClient.get(`/documents/user/${userId}`);
-    return response.data;
+    const documents: DocumentMinimal[] = [];
+    let cursor: string | undefined;
+    do {
+      const response = await apiClient.get(`/documents/user/${userId}`, {
+        params: { sort, order, limit: DOCUMENTS_PAGE_SIZE, cursor },
+      });
+      documents.push(...response.data);
+      cursor = response.headers['x-next-cursor'] || undefined;
+    } while (cursor);
+    return documents;
   } catch (error) {
     console.error('Failed to fetch documents!', error);
     throw error;
@@ -31,7 +48,7 @@ export async function createDocument(
   content: string,
   userId: number,
   file: File | null, // oli String aikaisemmin
-  source_type: 'pdf' | 'paste'
+  source_type: 'pdf' | 'docx' | 'pptx' | 'latex' | 'paste'
 ): Promise<DocumentMinimal> {
   const formData = new FormData();
   formData.append('title', title);
@@ -56,10 +73,27 @@ export async function createDocument(
   }
 }
 
-/** POST /documents/:docId/autoTranslate */
-export async function autoTranslateDocument(docId: number, options: string): Promise<void> {
+/** LaTeX chunks whose translation lost markup placeholders (the markup is missing from the .tex) */
+export type MissingPlaceholders = { chunk_number: number; missing: number[] }[];
+
+/** User-facing warning about lost LaTeX markup, or null if nothing was lost */
+export function missingPlaceholdersWarning(missing: MissingPlaceholders | undefined): string | null {
+  if (!missing || missing.length === 0) return null;
+  const paragraphs = missing.map((chunk) => chunk.chunk_number + 1).join(', ');
+  return `Some LaTeX markup was lost in translation and is missing from the final document. Check paragraphs: ${paragraphs}.`;
+}
+
+/**
+ * POST /documents/:docId/autoTranslate
+ * runId tags the run's progress events, see subscribeDocumentEvents.
+ */
+export async function autoTranslateDocument(
+  docId: number,
+  options: string,
+  runId?: string
+): Promise<{ missing_placeholders?: MissingPlaceholders }> {
   try {
-    const { data } = await apiClient.post(`/documents/${docId}/autoTranslate`, { options: options });
+    const { data } = await apiClient.post(`/documents/${docId}/autoTranslate`, { options: options, run_id: runId });
     return data;
   } catch (error) {
     console.error('autoTranslateDocument failed:', error);
@@ -67,7 +101,114 @@ export async function autoTranslateDocument(docId: number, options: string): Pro
   }
 }
 
-/** POST /documents/deeplFileTranslate */
+export type DocumentEvent = {
+  type: 'progress' | 'chunk_completed' | 'error' | 'done';
+  data: {
+    translated?: number;
+    total?: number;
+    percent?: number;
+    chunk_id?: number;
+    chunk_number?: number;
+    message?: string;
+    missing_placeholders?: MissingPlaceholders;
+  };
+};
+
+const EVENT_RETRY_MS = 2000;
+
+/**
+ * GET /documents/:docId/events
+ *
+ * Subscribes to the document's progress events (Server-Sent Events).
+ * Uses fetch instead of EventSource so the Authorization header can be sent.
+ * Reconnects with Last-Event-ID until a done or error event arrives.
+ * With a runId, only events of that auto-translation run are received, so events
+ * of earlier runs (e.g. a failed attempt) are not replayed.
+ *
+ * Returns a function that closes the subscription.
+ */
+export function subscribeDocumentEvents(
+  docId: number,
+  onEvent: (event: DocumentEvent) => void,
+  runId?: string
+): () => void {
+  const controller = new AbortController();
+  let lastEventId = '';
+  let finished = false;
+
+  const handleBlock = (block: string) => {
+    let type = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+      if (line.startsWith('id:')) lastEventId = line.slice(3).trim();
+      else if (line.startsWith('event:')) type = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (!data) return;
+    onEvent({ type, data: JSON.parse(data) } as DocumentEvent);
+    if (type === 'done' || type === 'error') finished = true;
+  };
+
+  const run = async () => {
+    while (!finished && !controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Accept: 'text/event-stream' };
+        const token = localStorage.getItem('access_token');
+        if (token) headers.Authorization = `Bearer ${token}`;
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+
+        const query = runId ? `?run_id=${encodeURIComponent(runId)}` : '';
+        const response = await fetch(`${apiClient.defaults.baseURL}/documents/${docId}/events${query}`, {
+          headers,
+          credentials: 'include',
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) throw new Error(`Event stream failed: ${response.status}`);
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            handleBlock(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Document event stream error:', error);
+      }
+      if (!finished) await sleep(EVENT_RETRY_MS);
+    }
+  };
+
+  run();
+  return () => controller.abort();
+}
+
+type DeepLJobStatus = {
+  job_id: string;
+  status: 'queued' | 'translating' | 'done' | 'error';
+  seconds_remaining: number | null;
+  error: string | null;
+};
+
+const DEEPL_POLL_MIN_MS = 1000;
+const DEEPL_POLL_MAX_MS = 10000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * POST /documents/deeplFileTranslate
+ * GET  /documents/deeplFileTranslate/:jobId
+ * GET  /documents/deeplFileTranslate/:jobId/result
+ *
+ * Starts a background DeepL job, polls its status with backoff and downloads the result.
+ */
 export async function translateDeepLFile(userId: number, title: string, file: File): Promise<Blob> {
   const formData = new FormData();
   formData.append('title', title);
@@ -78,10 +219,22 @@ export async function translateDeepLFile(userId: number, title: string, file: Fi
   }
 
   try {
-    const response = await apiClient.post(`/documents/deeplFileTranslate`, formData, {
+    const { data: job } = await apiClient.post<DeepLJobStatus>(`/documents/deeplFileTranslate`, formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
+    });
+
+    let delay = DEEPL_POLL_MIN_MS;
+    for (;;) {
+      await sleep(delay);
+      const { data: status } = await apiClient.get<DeepLJobStatus>(`/documents/deeplFileTranslate/${job.job_id}`);
+      if (status.status === 'done') break;
+      if (status.status === 'error') throw new Error(status.error ?? 'DeepL translation failed');
+      delay = Math.min(delay * 2, DEEPL_POLL_MAX_MS);
+    }
+
+    const response = await apiClient.get(`/documents/deeplFileTranslate/${job.job_id}/result`, {
       responseType: 'blob',
     });
     return response.data;
@@ -129,7 +282,9 @@ export async function renameDocument(docId: number, newTitle: string): Promise<v
 }
 
 /** POST /documents/:docId/finalize */
-export async function finalizeDocument(docId: number): Promise<Document> {
+export async function finalizeDocument(
+  docId: number
+): Promise<{ final_translation: string; missing_placeholders?: MissingPlaceholders }> {
   try {
     const response = await apiClient.post(`/documents/${docId}/finalize`);
     return response.data;
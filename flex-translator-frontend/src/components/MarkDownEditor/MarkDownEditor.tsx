@@ -49,6 +49,7 @@ import ButtonHelp from '../general/ButtonHelp';
 import { useSaveChunkTranslation } from '../../hooks/useSaveChunkTranslation';
 import { useSendAnalytics } from '../../hooks/useSendAnalytics';
 import { useFinalizeDocument } from '../../hooks/useFinalizeDocument';
+import { missingPlaceholdersWarning } from '../../api/documentsApiClient';
 
 type MarkDownEditorProps = {
   document: Document;
@@ -208,8 +209,10 @@ export default function MarkDownEditor({
                     console.log('Final analytics sent.');
 
                     // --- 3) Finalize document on the backend and refresh the cache ---
-                    await finalize.mutateAsync();
+                    const result = await finalize.mutateAsync();
                     console.log('Document finalized successfully');
+                    const warning = missingPlaceholdersWarning(result.missing_placeholders);
+                    if (warning) alert(warning);
 
                     // --- 4) Set completed flag in localStorage ---
                     localStorage.setItem(`completedScreen-${document.id}`, 'true');
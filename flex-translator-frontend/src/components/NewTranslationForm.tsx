@@ -4,7 +4,7 @@
  * This component renders a form for creating a new translation document.
  * The user can either:
  * - Enter a title and paste raw text content
- * - Or upload a PDF file with a title
+ * - Or upload a PDF, Word (.docx), PowerPoint (.pptx) or LaTeX (.tex) file with a title
  *
  * Additionally, the user selects a translation mode:
  * - "Manual": go to an editor to translate paragraph by paragraph (chunks)
@@ -54,9 +54,17 @@ function NewTranslationForm() {
   const handleSubmit = async (e: FormEvent) => {
     e.preventDefault();
     if (isDisabled) return;
+    const extension = file?.name.split('.').pop()?.toLowerCase();
+    const sourceType = !file
+      ? 'paste'
+      : extension === 'tex'
+        ? 'latex'
+        : extension === 'docx' || extension === 'pptx'
+          ? extension
+          : 'pdf';
 
     await createDocumentMutation.mutateAsync(
-      { title, content, file, source_type: file ? 'pdf' : 'paste' },
+      { title, content, file, source_type: sourceType },
       {
         onSuccess: async (newDoc) => {
           setTitle('');
@@ -127,11 +135,12 @@ function NewTranslationForm() {
           className="mb-4 p-3 w-full h-36 text-base rounded-md border border-gray-300 dark:border-gray-600 dark:bg-gray-700 dark:text-white resize-y focus:outline-none focus:ring-2 focus:ring-blue-500"
         />
         <h3 className="mt-5 mb-4 text-xl font-semibold text-left text-gray-800 dark:text-white">
-          Or upload a PDF-file
+          Or upload a PDF, Word, PowerPoint or LaTeX (.tex) file
         </h3>
         <div className="flex items-center space-x-2">
           <input
             type="file"
+            accept=".pdf,.docx,.pptx,.tex"
             ref={fileInputRef}
             onChange={handleFileChange}
             className="block w-full text-sm text-gray-500
@@ -15,7 +15,7 @@ export function useCreateDocument(userId: number) {
       title: string;
       content: string;
       file: File | null;
-      source_type: 'pdf' | 'paste';
+      source_type: 'pdf' | 'docx' | 'pptx' | 'latex' | 'paste';
     }) => createDocument(title, content, userId, file, source_type),
     onSuccess: () => {
       queryClient.invalidateQueries({
@@ -6,9 +6,9 @@ export function useFinalizeDocument(documentId: number) {
 
   return useMutation({
     mutationFn: () => finalizeDocument(documentId),
-    onSuccess: finalTranslation => {
+    onSuccess: result => {
       qc.setQueryData<Document>(['document', documentId], old =>
-        old ? { ...old, final_translation: finalTranslation } : old,
+        old ? { ...old, final_translation: result.final_translation } : old,
       );
     },
   });
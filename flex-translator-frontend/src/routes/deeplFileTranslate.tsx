@@ -18,8 +18,8 @@
  *
  * Flow:
  * 1. User uploads a file
- * 2. File is submitted to backend via `translateDeepLFile`
- * 3. Backend returns a translated .docx file as a Blob
+ * 2. File is submitted to backend via `translateDeepLFile`, which starts a background job
+ * 3. The job status is polled until done, then the translated .docx file is fetched as a Blob
  * 4. Component downloads the Blob to the user's machine
  *
  * Notes:
@@ -5,6 +5,7 @@
  *  What it does:
  * - Automatically triggers the backend auto-translation process for the given :docId.
  * - Displays a full-screen loading UI (<LoadingAuto />) while the backend translates.
+ * - Progress is pushed by the backend as Server-Sent Events (no polling).
  * - When finished, navigates to the completed screen (/translate/:docId/completedScreen).
  * - If the process fails, shows an error and redirects the user back to /.
  *
@@ -17,10 +18,14 @@
  */
 
 import { createFileRoute } from '@tanstack/react-router';
-import { autoTranslateDocument } from '../../../api/documentsApiClient';
+import {
+  autoTranslateDocument,
+  missingPlaceholdersWarning,
+  subscribeDocumentEvents,
+  type MissingPlaceholders,
+} from '../../../api/documentsApiClient';
 import { useEffect, useState, useRef } from 'react';
 import LoadingAuto from '../../../components/general/LoadingAuto';
-import { fetchProgress } from '../../../api/chunksApiClient';
 import { downloadPdf } from '../../../api/documentsApiClient';
 
 export const Route = createFileRoute('/translate/$docId/autoTranslate')({
@@ -46,7 +51,10 @@ function AutoLoadingScreen() {
       link.href = url;
       const safeTitle = (document.title || 'translated_document').replace(/[<>:"/\\|?*]+/g, '_');
       console.log('doctitle:', document.title, ', safetitle:', safeTitle);
-      link.download = `${safeTitle || 'translated_document'}.docx`;
+      // The server returns the same file type as the upload (docx for PDFs)
+      const type = (data as unknown as Blob).type;
+      const extension = type.includes('presentationml') ? 'pptx' : type === 'application/x-tex' ? 'tex' : 'docx';
+      link.download = `${safeTitle || 'translated_document'}.${extension}`;
       console.log('Document made to pdf!');
 
       window.document.body.appendChild(link);
@@ -62,47 +70,54 @@ function AutoLoadingScreen() {
     if (alreadyStarted.current) return;
     alreadyStarted.current = true;
 
-    async function startAutoTranslation() {
-      try {
-        console.log(`Starting auto-translation for document ${docId}`);
-        const options = 'deepl';
+    let completed = false;
+    const complete = (missingPlaceholders?: MissingPlaceholders) => {
+      if (completed) return;
+      completed = true;
+      console.log('Auto-translation complete.');
+      const warning = missingPlaceholdersWarning(missingPlaceholders);
+      if (warning) alert(warning);
+      localStorage.setItem(`isFinished-${docId}`, 'true');
+      localStorage.setItem(`completedScreen-${docId}`, 'true');
+      navigate({
+        to: '/translate/$docId/completedScreen',
+        params: { docId: String(docId) },
+      });
+    };
+    const fail = (error: unknown) => {
+      if (completed) return;
+      completed = true;
+      console.error('Auto-translation failed:', error);
+      alert('Auto-translation failed. Please try again.');
+      navigate({ to: '/' });
+    };
 
-        // Start automatic translation in backend
-        autoTranslateDocument(Number(docId), options).then(handleSaveAsDocx);
+    console.log(`Starting auto-translation for document ${docId}`);
+    const options = 'deepl';
+    // Identifies this run's events, so events of earlier attempts are ignored
+    const runId = crypto.randomUUID();
 
-        console.log(`Auto-translation started. Polling progress...`);
-
-        // Poll until translation is ready
-        const intervalId = setInterval(async () => {
-          const progressData = await fetchProgress(Number(docId));
-          console.log(progressData);
-
-          const translated = parseInt(progressData.translated);
-          const total = parseInt(progressData.total);
-          const percent = Math.round((translated / total) * 100);
-          setPercent(percent);
-          setTranslated(translated);
-          setTotal(total);
-
-          if (percent >= 100) {
-            clearInterval(intervalId);
-            console.log('Auto-translation complete.');
-            localStorage.setItem(`isFinished-${docId}`, 'true');
-            localStorage.setItem(`completedScreen-${docId}`, 'true');
-            navigate({
-              to: '/translate/$docId/completedScreen',
-              params: { docId: String(docId) },
-            });
-          }
-        }, 500); // polling every 0.5 seconds
-      } catch (error) {
-        console.error('Auto-translation failed:', error);
-        alert('Auto-translation failed. Please try again.');
-        navigate({ to: '/' });
+    // Progress events are pushed by the backend while it translates
+    const unsubscribe = subscribeDocumentEvents(Number(docId), (event) => {
+      if (event.type === 'progress') {
+        setPercent(event.data.percent ?? 0);
+        setTranslated(event.data.translated ?? 0);
+        setTotal(event.data.total ?? 0);
+      } else if (event.type === 'done') {
+        complete(event.data.missing_placeholders);
+      } else if (event.type === 'error') {
+        fail(event.data.message);
       }
-    }
+    }, runId);
 
-    startAutoTranslation();
+    // Start automatic translation in backend; the request also returns when it is done
+    autoTranslateDocument(Number(docId), options, runId)
+      .then(async (result) => {
+        await handleSaveAsDocx();
+        complete(result?.missing_placeholders);
+      })
+      .catch(fail)
+      .finally(unsubscribe);
   }, []);
 
   return (
@@ -6,7 +6,7 @@
  * - Shows the fully translated document for :docId using <MDEditor.Markdown />.
  * - Allows the user to:
  *    • Copy the translated text to clipboard.
- *    • Download the document as PDF (via downloadPdf API).
+ *    • Download the document as DOCX, PPTX for PowerPoint sources or .tex for LaTeX sources (via downloadPdf API).
  *    • Add the document to a group with <AddToGroupSelector />.
  *    • Return to review and edit the translation again (calls onReview).
  * - Displays a loading spinner during PDF generation.
@@ -104,7 +104,9 @@ function CompletedScreenRoute() {
       link.href = url;
       const safeTitle = (document.title || 'translated_document').replace(/[<>:"/\\|?*]+/g, '_');
       console.log('doctitle:', document.title, ', safetitle:', safeTitle);
-      link.download = `${safeTitle || 'translated_document'}.docx`;
+      const extension =
+        document.source_type === 'latex' ? 'tex' : document.source_type === 'pptx' ? 'pptx' : 'docx';
+      link.download = `${safeTitle || 'translated_document'}.${extension}`;
       console.log('Document made to pdf!');
 
       window.document.body.appendChild(link);
@@ -137,7 +139,11 @@ function CompletedScreenRoute() {
       <div className="flex flex-row gap-8">
         <Button onClick={handleCopyText}>{copied ? 'Copied!' : 'Copy to clipboard'}</Button>
 
-        {document.source_type === 'pdf' && <Button onClick={handleSaveAsDocx}>Save as docx</Button>}
+        {(document.source_type === 'pdf' || document.source_type === 'docx') && (
+          <Button onClick={handleSaveAsDocx}>Save as docx</Button>
+        )}
+        {document.source_type === 'pptx' && <Button onClick={handleSaveAsDocx}>Save as pptx</Button>}
+        {document.source_type === 'latex' && <Button onClick={handleSaveAsDocx}>Save as .tex</Button>}
 
         <Button onClick={handleReview}>Review and translate again</Button>
 
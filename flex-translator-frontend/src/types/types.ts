@@ -18,7 +18,7 @@ export interface Document {
   title: string;
   original_text: string;
   final_translation: string;
-  source_type: 'paste' | 'pdf' | 'docx';
+  source_type: 'paste' | 'pdf' | 'docx' | 'pptx' | 'latex';
   created_at: string;
   modified_at: string;
   chunks: Chunk[];
@@ -66,6 +66,9 @@ export interface Group {
   name: string;
   user_id: number;
   documents: number[];
+  // Only with GET /groups?details=true
+  document_count?: number;
+  document_details?: { id: number; title: string }[];
 }
 
 export type UserSettings = {
@@ -80,7 +83,7 @@ export type UserSettings = {
 export interface AnalyticsData {
   document_id: number | null;
   chunk_id: number | null;
-  source_type: 'paste' | 'pdf' | 'docx' | null;
+  source_type: 'paste' | 'pdf' | 'docx' | 'pptx' | 'latex' | null;
   translation_mode: 'auto' | 'manual' | 'deeplAPIAuto' | null;
   chosen_model: 'gpt' | 'deepl' | null;
   original_text: string | null;